@@ -0,0 +1,166 @@
+"""
+Synthetic history databases for the benchmarks.
+
+Builds a cases.db with the app's own schema (init_db, so the indexes and
+daily_rollup triggers are the real ones) filled with cases, OT cases and
+downtimes spread over every region and type in standards.json. The same
+rows, seed and days always give the same database, so timings are
+comparable across commits.
+
+    python -m bench.generate bench/data/cases_100k.db --rows 100000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+from db.database import configure_connections, get_connection, init_db
+from db.standards import flatten_standards, get_standards_registry, BASELINE_DATE, record_standards_version
+from engine.calculations import evaluate_case
+from engine.intervals import from_minutes
+
+DEFAULT_SEED = 1234
+# History span; bigger databases get more cases per day, not more years
+DEFAULT_DAYS = 3 * 365
+# OT cases and downtimes relative to the number of cases
+OT_RATIO = 0.1
+DOCTORS = 250
+# Share of cases saved with the production toggle off
+NOT_COUNTED = 0.05
+INSERT_BATCH = 10000
+
+# Cases and downtimes fall inside the work day
+DAY_START, DAY_END = 6 * 60, 22 * 60
+MAX_DOWNTIME = 60
+
+INSERT_CASE = """
+    INSERT INTO {table} (
+        case_id, region, tipo_caso,
+        doctor, fecha, hora_inicio, hora_fin,
+        tiempo_real, std_time, efficiency, estado, case_value,
+        count_production, comments
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_DOWNTIME = """
+    INSERT INTO downtimes (fecha, hora_inicio, hora_fin, razon, duracion)
+    VALUES (?, ?, ?, ?, ?)
+"""
+DOWNTIME_REASONS = ("Scanner down", "Meeting", "Training", "Power cut", "Software update")
+
+
+def case_rows(rng, count, dates, std_times, prefix):
+    """count synthetic case tuples for INSERT_CASE, oldest date first"""
+    doctors = [f"Dr. Synthetic {n:03d}" for n in range(DOCTORS)]
+    pairs = sorted(std_times)
+    for n in range(count):
+        fecha = dates[n * len(dates) // count]
+        region, tipo = rng.choice(pairs)
+        std_time = std_times[(region, tipo)]
+        real = max(1, round(std_time * rng.uniform(0.7, 1.5)))
+        start = rng.randrange(DAY_START, DAY_END - real)
+        efficiency, _status, estado, value = evaluate_case(std_time, real)
+        yield (
+            f"{prefix}{n:07d}", region, tipo,
+            rng.choice(doctors), fecha, from_minutes(start), from_minutes(start + real),
+            real, std_time, efficiency, estado, value,
+            0 if rng.random() < NOT_COUNTED else 1, ""
+        )
+
+
+def downtime_rows(rng, count, dates):
+    """count downtimes, disjoint within each day as merge-on-write keeps them"""
+    per_day = -(-count // len(dates))
+    width = (DAY_END - DAY_START) // per_day
+    for n in range(count):
+        fecha = dates[n * len(dates) // count]
+        # Consecutive rows share a date, so n % per_day gives each its own slot
+        slot_start = DAY_START + (n % per_day) * width
+        start = slot_start + rng.randrange(width // 2)
+        end = start + rng.randint(1, min(MAX_DOWNTIME, slot_start + width - start))
+        yield fecha, from_minutes(start), from_minutes(end), rng.choice(DOWNTIME_REASONS), end - start
+
+
+def _insert(cursor, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def generate_db(path, rows, seed=DEFAULT_SEED, days=DEFAULT_DAYS, end_date=None):
+    """
+    Write a fresh database with rows cases (plus OT cases and downtimes) at
+    path and point the connection manager at it. Returns a summary dict.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    configure_connections(path=path)
+    init_db()
+
+    standards = get_standards_registry().standards()
+    std_times = {pair: std for pair, std in flatten_standards(standards).items() if std}
+    record_standards_version(standards, BASELINE_DATE)
+
+    # A fixed end date keeps the data identical whatever day it is built on
+    end = date.fromisoformat(end_date) if end_date else date(2026, 1, 1)
+    dates = [(end - timedelta(days=days - 1 - n)).isoformat() for n in range(days)]
+    rng = random.Random(seed)
+    ot_count = int(rows * OT_RATIO)
+    downtime_count = int(rows * OT_RATIO)
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        _insert(cursor, INSERT_CASE.format(table="cases"), case_rows(rng, rows, dates, std_times, "C"))
+        _insert(cursor, INSERT_CASE.format(table="ot_cases"), case_rows(rng, ot_count, dates, std_times, "OT"))
+        _insert(cursor, INSERT_DOWNTIME, downtime_rows(rng, downtime_count, dates))
+        conn.commit()
+        cursor.execute("ANALYZE")
+        conn.commit()
+        # Fold the WAL into the file so its size is the database's
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+    return {
+        "path": path,
+        "cases": rows,
+        "ot_cases": ot_count,
+        "downtimes": downtime_count,
+        "days": days,
+        "pairs": len(std_times),
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 3),
+        "bytes": os.path.getsize(path),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic cases.db")
+    parser.add_argument("path", help="Database file to (re)create")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of cases")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Days of history")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    summary = generate_db(args.path, args.rows, args.seed, args.days)
+    print(f"{summary['cases']} cases, {summary['ot_cases']} OT cases, {summary['downtimes']} downtimes "
+          f"in {summary['seconds']} s ({summary['bytes'] // 1024} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
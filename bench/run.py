@@ -0,0 +1,333 @@
+"""
+Headless benchmarks of the hot paths on synthetic histories.
+
+For each size a database is generated once (bench/generate.py, cached in
+bench/data) and the connection manager is pointed at it. Every benchmark
+calls the same functions the tabs run on their worker threads, without
+building any widget, and the results are written as JSON so two commits can
+be compared:
+
+    python -m bench.run --sizes 10k 100k 1m --out bench_results.json
+
+Startup is measured by launching main.py with --profile-startup on the
+synthetic database (CASES_DB) and reading its report back.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from db.database import configure_connections, get_connection, get_daily_rollup, rollup_downtime, close_connections
+from db.changes import fetch_row
+from db.export import HISTORY_EXPORT_COLUMNS, export_csv
+from db.overlaps import TimedRow, get_overlap_index
+from db.queries import build_case_filter
+from db.standards import get_standards_history, get_standards_registry
+from engine.calculations import evaluate_case
+from bench.generate import DEFAULT_DAYS, DEFAULT_SEED, INSERT_CASE, generate_db
+from tabs.tab_history import fetch_history_page
+from tabs.tab_production import query_production
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_REPEAT = 5
+# Days sampled by the daily production benchmark
+SAMPLE_DAYS = 50
+# Pages read by the History scroll benchmark (the model fetches one per scroll)
+SCROLL_PAGES = 25
+# Cases saved by the save throughput benchmark; removed again afterwards
+SAVE_CASES = 500
+STARTUP_TIMEOUT_S = 120
+
+
+def time_calls(fn, repeat):
+    """Run fn repeat times; wall-clock statistics in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        "runs": repeat,
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "max_ms": round(max(times), 3),
+    }
+
+
+def reset_caches():
+    """Forget per-database caches after switching the connection manager"""
+    get_overlap_index().invalidate()
+    get_standards_history().invalidate()
+
+
+def sample_dates(count, seed=DEFAULT_SEED):
+    conn = get_connection()
+    dates = [row[0] for row in conn.execute("SELECT DISTINCT fecha FROM cases ORDER BY fecha")]
+    conn.close()
+    return random.Random(seed).sample(dates, min(count, len(dates)))
+
+
+def busiest_region():
+    conn = get_connection()
+    region = conn.execute("""
+        SELECT region FROM cases GROUP BY region ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()[0]
+    conn.close()
+    return region
+
+
+# --- Benchmarks -----------------------------------------------------------
+# Each takes the run context and returns a result dict.
+
+def bench_daily_production(ctx):
+    """Register's daily aggregate: rollup buckets plus the day's downtime from them"""
+    dates = iter(ctx["dates"])
+
+    def one_day():
+        rollup_downtime(get_daily_rollup(next(dates)))
+
+    return time_calls(one_day, len(ctx["dates"]))
+
+
+def bench_production_filter(ctx):
+    """Production's filter pass (summary, per-date totals, first page), all rows"""
+    return time_calls(lambda: query_production(*build_case_filter()), ctx["repeat"])
+
+
+def bench_production_filter_month(ctx):
+    """Production's filter pass for the last 30 days of the busiest region"""
+    where, params = build_case_filter(date_from=ctx["month_from"], region=ctx["region"])
+    return time_calls(lambda: query_production(where, params), ctx["repeat"])
+
+
+def bench_history_load(ctx):
+    """History's first page, unfiltered"""
+    return time_calls(lambda: fetch_history_page("1", (), None), ctx["repeat"])
+
+
+def bench_history_filter(ctx):
+    """History's first page for a case search plus a status (LIKE scan)"""
+    where, params = build_case_filter(case_search="123", estado="OK")
+    return time_calls(lambda: fetch_history_page(where, params, None), ctx["repeat"])
+
+
+def bench_history_scroll(ctx):
+    """SCROLL_PAGES keyset pages in a row, as scrolling down History does"""
+    def scroll():
+        after = None
+        for _ in range(SCROLL_PAGES):
+            _rows, after = fetch_history_page("1", (), after)
+            if after is None:
+                break
+
+    result = time_calls(scroll, ctx["repeat"])
+    result["pages"] = SCROLL_PAGES
+    return result
+
+
+def bench_csv_export(ctx):
+    """History's CSV export of every case"""
+    path = os.path.join(ctx["tmp"], "export.csv")
+    rows = []
+    result = time_calls(
+        lambda: rows.append(export_csv(path, HISTORY_EXPORT_COLUMNS, "1", ())[0]),
+        max(1, min(ctx["repeat"], 3))
+    )
+    result["rows"] = rows[-1]
+    result["rows_per_s"] = round(rows[-1] / (result["median_ms"] / 1000)) if result["median_ms"] else None
+    result["bytes"] = os.path.getsize(path)
+    os.remove(path)
+    return result
+
+
+def save_case(cursor, fecha, start, end, region, tipo, std_time, n):
+    """Register's save path for a new case: overlap check, insert, commit, re-read"""
+    get_overlap_index().find(fecha, start, end, exclude=("cases", None))
+    real = 30
+    efficiency, _status, estado, value = evaluate_case(std_time, real)
+    cursor.execute(INSERT_CASE.format(table="cases"), (
+        f"BENCH{n:06d}", region, tipo, "", fecha, start, end,
+        real, std_time, efficiency, estado, value, 1, ""
+    ))
+    row_id = cursor.lastrowid
+    cursor.connection.commit()
+    fetch_row("cases", row_id)
+    get_overlap_index().add(fecha, TimedRow("cases", row_id, start, end, f"BENCH{n:06d}"))
+    return row_id
+
+
+def bench_save_throughput(ctx):
+    """SAVE_CASES saves one after another, each its own transaction"""
+    (region, tipo), std_time = next(item for item in sorted(ctx["std_times"].items()) if item[1])
+    fecha = ctx["dates"][0]
+    saved = []
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        started = time.perf_counter()
+        for n in range(SAVE_CASES):
+            saved.append(save_case(cursor, fecha, "08:00", "08:30", region, tipo, std_time, n))
+        seconds = time.perf_counter() - started
+    finally:
+        # Leave the database as generated for the next run
+        cursor.executemany("DELETE FROM cases WHERE id = ?", [(row_id,) for row_id in saved])
+        conn.commit()
+        conn.close()
+        for row_id in saved:
+            get_overlap_index().remove(fecha, "cases", row_id)
+    return {
+        "saves": SAVE_CASES,
+        "ms_per_save": round(seconds * 1000 / SAVE_CASES, 3),
+        "saves_per_s": round(SAVE_CASES / seconds),
+    }
+
+
+def bench_startup(ctx):
+    """main.py launched on the synthetic database, from its --profile-startup report"""
+    runs = []
+    for n in range(max(1, min(ctx["repeat"], 3))):
+        report_path = os.path.join(ctx["tmp"], f"startup_{n}.json")
+        env = dict(os.environ, CASES_DB=ctx["path"])
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, os.path.join(ROOT_DIR, "main.py"),
+             "--profile-startup", report_path, "--exit-after-startup"],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=STARTUP_TIMEOUT_S
+        )
+        process_ms = (time.perf_counter() - started) * 1000
+        if process.returncode != 0 or not os.path.exists(report_path):
+            tail = (process.stderr or process.stdout).strip().splitlines()[-1:]
+            return {"error": f"main.py exited with {process.returncode}: {' '.join(tail)}"}
+        with open(report_path) as f:
+            report = json.load(f)
+        report["process_ms"] = round(process_ms, 3)
+        runs.append(report)
+
+    result = {
+        "runs": len(runs),
+        "median_total_ms": round(statistics.median(run["total_wall_ms"] for run in runs), 3),
+        "median_process_ms": round(statistics.median(run["process_ms"] for run in runs), 3),
+    }
+    # Median wall/CPU per phase over the runs, in report order
+    for phase in runs[0]["phases"]:
+        name = phase["name"]
+        walls = [p["wall_ms"] for run in runs for p in run["phases"] if p["name"] == name]
+        cpus = [p["cpu_ms"] for run in runs for p in run["phases"] if p["name"] == name and p["cpu_ms"] is not None]
+        result.setdefault("phases", {})[name] = {
+            "wall_ms": round(statistics.median(walls), 3),
+            "cpu_ms": round(statistics.median(cpus), 3) if cpus else None,
+        }
+    return result
+
+
+BENCHMARKS = [
+    ("daily_production", bench_daily_production),
+    ("production_filter", bench_production_filter),
+    ("production_filter_month", bench_production_filter_month),
+    ("history_load", bench_history_load),
+    ("history_filter", bench_history_filter),
+    ("history_scroll", bench_history_scroll),
+    ("csv_export", bench_csv_export),
+    ("save_throughput", bench_save_throughput),
+    ("startup", bench_startup),
+]
+
+
+def database_for(rows, seed, days, regenerate=False):
+    """Path of the cached synthetic database, generating it when needed"""
+    path = os.path.join(DATA_DIR, f"cases_{rows}_s{seed}_d{days}.db")
+    if regenerate or not os.path.exists(path):
+        summary = generate_db(path, rows, seed, days)
+        print(f"  generated {path} in {summary['seconds']} s")
+    return path
+
+
+def run_size(rows, args, tmp):
+    path = database_for(rows, args.seed, args.days, args.regenerate)
+    configure_connections(path=path)
+    reset_caches()
+
+    dates = sample_dates(SAMPLE_DAYS, args.seed)
+    conn = get_connection()
+    last_date = conn.execute("SELECT MAX(fecha) FROM cases").fetchone()[0]
+    conn.close()
+    ctx = {
+        "path": path,
+        "repeat": args.repeat,
+        "tmp": tmp,
+        "dates": dates,
+        "region": busiest_region(),
+        "month_from": (date.fromisoformat(last_date) - timedelta(days=29)).isoformat(),
+        "std_times": get_standards_registry().std_index(),
+    }
+
+    results = {"rows": rows, "path": path, "bytes": os.path.getsize(path), "benchmarks": {}}
+    for name, bench in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        results["benchmarks"][name] = result = bench(ctx)
+        summary = result.get("median_ms", result.get("ms_per_save", result.get("median_total_ms")))
+        print(f"  {name}: {result.get('error') or f'{summary} ms'}")
+    close_connections()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic databases")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["10k", "100k"],
+                        help="Database sizes (cases) to run")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per benchmark")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _ in BENCHMARKS],
+                        help="Run only these benchmarks")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Days of history")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild cached databases")
+    args = parser.parse_args(argv)
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "days": args.days,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in args.sizes:
+            print(f"{label}:")
+            results["sizes"][label] = run_size(SIZES[label], args, tmp)
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,29 @@
+from collections import namedtuple
+from db.database import get_connection
+
+INSERTED = "inserted"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+class RowChange(namedtuple("RowChange", "kind table row_id row old_row")):
+    """
+    A single-row change published after a save or delete.
+
+    kind is INSERTED, UPDATED or DELETED; table is the table it happened in.
+    row is the {column: value} dict after the change (None for deletes) and
+    old_row the dict before it (None for inserts), so views can both remove
+    the old version and place the new one without reloading.
+    """
+    __slots__ = ()
+
+
+def fetch_row(table, row_id):
+    """Return one row of table as a {column: value} dict, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,))
+    values = cursor.fetchone()
+    columns = [desc[0] for desc in cursor.description]
+    conn.close()
+    return dict(zip(columns, values)) if values else None
@@ -0,0 +1,119 @@
+import logging
+import traceback
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+logger = logging.getLogger(__name__)
+
+
+class _TaskSignals(QObject):
+    """Signals emitted from worker threads, delivered on the GUI thread"""
+    finished = Signal(object, int, object)  # view, ticket, result
+    failed = Signal(object, int, str)       # view, ticket, formatted traceback
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, signals, view, ticket, fn, args):
+        super().__init__()
+        self.signals = signals
+        self.view = view
+        self.ticket = ticket
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        # Runs on a pool thread; get_connection() hands out that thread's
+        # own pooled connection
+        try:
+            result = self.fn(*self.args)
+        except Exception:
+            logger.exception("Query for %s failed", self.view)
+            self.signals.failed.emit(self.view, self.ticket, traceback.format_exc())
+        else:
+            self.signals.finished.emit(self.view, self.ticket, result)
+
+
+class DataService(QObject):
+    """
+    Runs DB reads on a QThreadPool and hands results back on the GUI thread.
+
+    Each request is tagged with a view name. Only the newest request per view
+    is delivered: when a refresh is superseded before its result arrives, the
+    old result is discarded instead of overwriting newer data. A failed
+    request is logged, passed to its on_error and announced with
+    query_failed(view, traceback) so the view can leave its loading state.
+    """
+    query_failed = Signal(str, str)
+
+    def __init__(self, max_threads=2, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        # Keep worker threads alive so their pooled connections stay reusable
+        self._pool.setExpiryTimeout(-1)
+
+        self._signals = _TaskSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+        self._next_ticket = 0
+        self._latest = {}     # view -> newest ticket
+        self._callbacks = {}  # ticket -> (on_result, on_error)
+        self.stale_dropped = 0
+
+    def submit(self, view, fn, *args, on_result, on_error=None):
+        """
+        Run fn(*args) off the GUI thread and call on_result(result) with its
+        return value, unless a newer request for the same view was made in
+        the meantime. Returns the request ticket.
+        """
+        self._next_ticket += 1
+        ticket = self._next_ticket
+        self._latest[view] = ticket
+        self._callbacks[ticket] = (on_result, on_error)
+        self._pool.start(_QueryTask(self._signals, view, ticket, fn, args))
+        return ticket
+
+    def is_current(self, view, ticket):
+        return self._latest.get(view) == ticket
+
+    def is_pending(self, view):
+        ticket = self._latest.get(view)
+        return ticket is not None and ticket in self._callbacks
+
+    def wait(self, msecs=-1):
+        """Block until queued queries are done (shutdown and headless runs)"""
+        return self._pool.waitForDone(msecs)
+
+    def _on_finished(self, view, ticket, result):
+        on_result, _on_error = self._callbacks.pop(ticket, (None, None))
+        if not self.is_current(view, ticket):
+            self.stale_dropped += 1
+            return
+        if on_result is not None:
+            on_result(result)
+
+    def _on_failed(self, view, ticket, error):
+        _on_result, on_error = self._callbacks.pop(ticket, (None, None))
+        if not self.is_current(view, ticket):
+            self.stale_dropped += 1
+            return
+        if on_error is not None:
+            on_error(error)
+        self.query_failed.emit(view, error)
+
+
+_service = None
+
+
+def get_data_service():
+    """Return the process-wide DataService (created on first use, needs a QApplication)"""
+    global _service
+    if _service is None:
+        _service = DataService()
+    return _service
+
+
+def shutdown_data_service():
+    """Let queued queries finish before connections are closed"""
+    if _service is not None:
+        _service.wait()
@@ -1,6 +1,9 @@
 import sqlite3
 import os
+import re
 import sys
+import threading
+import time
 
 def get_base_path():
     """Get the base path for data files - works for both dev and PyInstaller exe"""
@@ -11,6 +14,13 @@ def get_base_path():
         # Running as script
         return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+def get_resource_path(relative_path):
+    """Path of a data file: next to the exe/script, else inside the PyInstaller bundle"""
+    path = os.path.join(get_base_path(), relative_path)
+    if getattr(sys, 'frozen', False) and not os.path.exists(path):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return path
+
 def get_data_path():
     """Get the data directory path, creating it if needed"""
     base = get_base_path()
@@ -19,46 +29,304 @@ def get_data_path():
         os.makedirs(data_dir)
     return data_dir
 
-DB_PATH = os.path.join(get_data_path(), "cases.db")
+# CASES_DB points the app at another database file (benchmarks, copies)
+DB_PATH = os.environ.get("CASES_DB") or os.path.join(get_data_path(), "cases.db")
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
 
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            case_id TEXT,
-            region TEXT,
-            tipo_caso TEXT,
-            doctor TEXT,
-            fecha TEXT,
-            hora_inicio TEXT,
-            hora_fin TEXT,
-            tiempo_real REAL,
-            std_time REAL,
-            efficiency REAL,
-            estado TEXT,
-            case_value REAL,
-            count_production INTEGER DEFAULT 1,
-            comments TEXT DEFAULT ''
+class PooledConnection:
+    """Handle around a thread's long-lived sqlite3 connection.
+
+    Behaves like the sqlite3 connection it wraps, except that close() hands
+    the connection back to its manager instead of closing it. That keeps the
+    usual ``conn = get_connection() ... conn.close()`` pattern working while
+    the real connection is reused across calls.
+    """
+
+    def __init__(self, manager, conn):
+        self._manager = manager
+        self._conn = conn
+        self._depth = 0  # Outstanding get_connection() calls on this thread
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        """Release the connection back to the manager (does not close it)"""
+        self._manager.release(self)
+
+
+class ConnectionManager:
+    """Process-wide manager that keeps one SQLite connection per thread.
+
+    Connections are opened lazily the first time a thread asks for one and
+    are then reused until close_all() is called. Every new connection gets
+    the configured PRAGMAs applied once, so the per-query cost is just the
+    query itself.
+    """
+
+    def __init__(self, path=None, wal=True, synchronous="NORMAL",
+                 cache_size=-8000, mmap_size=64 * 1024 * 1024, busy_timeout=5000):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
+
+        self.path = path or DB_PATH
+        self.wal = wal
+        self.synchronous = synchronous
+        self.cache_size = int(cache_size)      # Pages, or KiB when negative
+        self.mmap_size = int(mmap_size)        # Bytes, 0 disables mmap
+        self.busy_timeout = int(busy_timeout)  # Milliseconds
+
+        # Keyed by OS thread id rather than threading.local: Qt worker
+        # threads get a fresh Python thread state per task, which would
+        # discard thread-local storage and open a new connection each time
+        self._handles = {}
+        self._lock = threading.Lock()
+        self.opened = 0   # Real connections opened
+        self.reused = 0   # get_connection() calls served by an open connection
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False  # Each handle is only used by its own thread
         )
-    """)
-    
-    # Add columns if they don't exist (for existing databases)
-    try:
-        cursor.execute("ALTER TABLE cases ADD COLUMN count_production INTEGER DEFAULT 1")
-    except:
-        pass
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        if self.wal:
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {self.cache_size}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        return conn
+
+    def acquire(self):
+        """Return the calling thread's connection, opening it on first use"""
+        ident = threading.get_ident()
+        with self._lock:
+            handle = self._handles.get(ident)
+            if handle is not None:
+                self.reused += 1
+        if handle is None:
+            handle = PooledConnection(self, self._open())
+            with self._lock:
+                self._handles[ident] = handle
+                self.opened += 1
+        handle._depth += 1
+        return handle
+
+    def release(self, handle):
+        """Give a handle back; uncommitted work is rolled back like a real close()"""
+        if handle._depth > 0:
+            handle._depth -= 1
+        if handle._depth == 0 and handle._conn.in_transaction:
+            handle._conn.rollback()
+
+    def close_all(self):
+        """Close every connection opened by this manager (call at shutdown)"""
+        with self._lock:
+            handles, self._handles = self._handles, {}
+        for handle in handles.values():
+            try:
+                handle._conn.close()
+            except sqlite3.Error:
+                pass
+
+    def stats(self):
+        """Connection counters, useful to check that reuse is happening"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "open": len(self._handles),
+                "opened": self.opened,
+                "reused": self.reused,
+            }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """Return the process-wide connection manager, creating it on first use"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager()
+    return _manager
+
+
+def configure_connections(**settings):
+    """
+    Replace the process-wide manager with one using the given settings
+    (path, wal, synchronous, cache_size, mmap_size, busy_timeout).
+    Existing connections are closed.
+    """
+    global _manager
+    with _manager_lock:
+        old, _manager = _manager, ConnectionManager(**settings)
+    if old is not None:
+        old.close_all()
+    return _manager
+
+
+def get_connection():
+    return get_manager().acquire()
+
+
+def connection_stats():
+    return get_manager().stats()
+
+
+def close_connections():
+    if _manager is not None:
+        _manager.close_all()
+
+# Indexes shaped around the hot queries in the tabs (daily production sums,
+# region breakdowns, downtime totals and the date-ordered case lists).
+# Changing this list needs a new entry in MIGRATIONS.
+HOT_INDEXES = [
+    ("idx_cases_daily", "cases (fecha, count_production, region, case_value)"),
+    ("idx_cases_fecha_hora", "cases (fecha, hora_inicio)"),
+    ("idx_ot_cases_daily", "ot_cases (fecha, count_production, region, case_value)"),
+    ("idx_downtimes_fecha", "downtimes (fecha, hora_inicio, duracion)"),
+]
+
+# (name, sql, params) for every query that runs on a refresh path.
+# check_query_plans() makes sure none of them scans a whole table.
+HOT_QUERIES = [
+    ("daily rollup", """
+        SELECT source, region, sum_case_value, n_cases, sum_downtime
+        FROM daily_rollup WHERE fecha = ?
+    """, ("2000-01-01",)),
+    ("daily OT cases", """
+        SELECT id, case_id, doctor, region, tipo_caso, tiempo_real, efficiency, case_value, estado
+        FROM ot_cases WHERE fecha = ? ORDER BY id DESC
+    """, ("2000-01-01",)),
+    ("daily downtimes", """
+        SELECT id, hora_inicio, hora_fin, duracion, razon
+        FROM downtimes WHERE fecha = ? ORDER BY hora_inicio DESC
+    """, ("2000-01-01",)),
+    ("filtered case page", """
+        SELECT id, case_id, doctor, region, tipo_caso, fecha, hora_inicio, hora_fin,
+               tiempo_real, efficiency, estado, case_value, fecha, hora_inicio, id
+        FROM cases
+        WHERE fecha >= ? AND fecha <= ? AND (fecha, hora_inicio, id) < (?, ?, ?)
+        ORDER BY fecha DESC, hora_inicio DESC, id DESC LIMIT ?
+    """, ("2000-01-01", "2000-01-31", "2000-01-31", "23:59", 0, 200)),
+    ("standard at date", """
+        SELECT std_time FROM standards_versions
+        WHERE region = ? AND tipo_caso = ? AND effective_from <= ?
+        ORDER BY effective_from DESC LIMIT 1
+    """, ("", "", "2000-01-01")),
+    ("case history", """
+        SELECT id, case_id, region, tipo_caso, fecha, tiempo_real, std_time, efficiency, estado, case_value
+        FROM cases ORDER BY fecha DESC, hora_inicio DESC
+    """, ()),
+]
+
+
+def get_user_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def explain_hot_queries(conn):
+    """Return {query name: [plan detail lines]} for every HOT_QUERIES entry"""
+    plans = {}
+    for name, sql, params in HOT_QUERIES:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        plans[name] = [row[-1] for row in rows]
+    return plans
+
+
+# A plan step reading a whole table without an index: "SCAN cases" from
+# SQLite 3.36 on, "SCAN TABLE cases" before (still common in bundled
+# runtimes), either with an optional "AS <alias>". Steps that walk an index
+# ("... USING [COVERING] INDEX ...") do not match.
+FULL_SCAN = re.compile(r"SCAN (?:TABLE )?(?!CONSTANT ROW$|SUBQUERY )\S+(?: AS \S+)?")
+
+
+def is_full_scan(detail):
+    """True for an EXPLAIN QUERY PLAN detail that scans a table without an index"""
+    return FULL_SCAN.fullmatch(detail.strip()) is not None
+
+
+def check_query_plans(conn=None):
+    """
+    Raise RuntimeError if any hot query falls back to a full table scan
+    (see FULL_SCAN); walking an index is fine for the ordered history query.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     try:
-        cursor.execute("ALTER TABLE cases ADD COLUMN comments TEXT DEFAULT ''")
-    except:
-        pass
+        plans = explain_hot_queries(conn)
+    finally:
+        if own_conn:
+            conn.close()
 
-    cursor.execute("""
+    offenders = []
+    for name, details in plans.items():
+        for detail in details:
+            if is_full_scan(detail):
+                offenders.append(f"{name}: {detail}")
+    if offenders:
+        raise RuntimeError("Hot queries fall back to full table scans:\n  " + "\n  ".join(offenders))
+    return plans
+
+
+CASE_COLUMNS = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT,
+    region TEXT,
+    tipo_caso TEXT,
+    doctor TEXT,
+    fecha TEXT,
+    hora_inicio TEXT,
+    hora_fin TEXT,
+    tiempo_real REAL,
+    std_time REAL,
+    efficiency REAL,
+    estado TEXT,
+    case_value REAL,
+    count_production INTEGER DEFAULT 1,
+    comments TEXT DEFAULT ''
+"""
+
+# Columns added after the first release; older databases get them on upgrade
+LATE_CASE_COLUMNS = [
+    ("count_production", "INTEGER DEFAULT 1"),
+    ("comments", "TEXT DEFAULT ''"),
+]
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def _migrate_base_schema(conn):
+    """Tables as of the first versioned schema, including late-added columns"""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS cases ({CASE_COLUMNS})")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS ot_cases ({CASE_COLUMNS})")
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS downtimes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             fecha TEXT,
@@ -68,36 +336,222 @@ def init_db():
             duracion REAL
         )
     """)
+    _add_missing_columns(conn, "cases", LATE_CASE_COLUMNS)
+    _add_missing_columns(conn, "ot_cases", LATE_CASE_COLUMNS)
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS ot_cases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            case_id TEXT,
-            region TEXT,
-            tipo_caso TEXT,
-            doctor TEXT,
-            fecha TEXT,
-            hora_inicio TEXT,
-            hora_fin TEXT,
-            tiempo_real REAL,
+
+def _migrate_hot_indexes(conn):
+    for name, target in HOT_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+# Per-day production buckets kept current by triggers, so the progress bars
+# read a handful of rows instead of re-aggregating cases on every refresh.
+# source is the table the bucket comes from ('cases', 'ot_cases' or
+# 'downtimes'); region is '' for downtimes. Only cases that count to
+# production are rolled up. n_cases is the number of rows behind the bucket
+# and the bucket is removed when it drops to zero.
+ROLLUP_SOURCES = ("cases", "ot_cases", "downtimes")
+
+COUNTS_TO_PRODUCTION = "({row}.count_production = 1 OR {row}.count_production IS NULL)"
+
+
+def _rollup_add_sql(source, row, value, downtime, condition):
+    return f"""
+        INSERT INTO daily_rollup (fecha, source, region, sum_case_value, n_cases, sum_downtime)
+        SELECT {row}.fecha, '{source}', {{region}}, {value}, 1, {downtime}
+        WHERE {condition}
+        ON CONFLICT (fecha, source, region) DO UPDATE SET
+            sum_case_value = sum_case_value + excluded.sum_case_value,
+            n_cases = n_cases + 1,
+            sum_downtime = sum_downtime + excluded.sum_downtime;
+    """
+
+
+def _rollup_remove_sql(source, row, value, downtime, condition):
+    return f"""
+        UPDATE daily_rollup SET
+            sum_case_value = sum_case_value - {value},
+            n_cases = n_cases - 1,
+            sum_downtime = sum_downtime - {downtime}
+        WHERE fecha = {row}.fecha AND source = '{source}' AND region = {{region}} AND {condition};
+        DELETE FROM daily_rollup
+        WHERE fecha = {row}.fecha AND source = '{source}' AND region = {{region}} AND n_cases <= 0;
+    """
+
+
+def _rollup_triggers(source):
+    """CREATE TRIGGER statements keeping daily_rollup in sync with one table"""
+    if source == "downtimes":
+        def parts(row):
+            return ("0", f"COALESCE({row}.duracion, 0)", "1", "''")
+        watched = "fecha, duracion"
+    else:
+        def parts(row):
+            return (f"COALESCE({row}.case_value, 0)", "0",
+                    COUNTS_TO_PRODUCTION.format(row=row), f"COALESCE({row}.region, '')")
+        watched = "fecha, region, case_value, count_production"
+
+    old_value, old_downtime, old_cond, old_region = parts("OLD")
+    new_value, new_downtime, new_cond, new_region = parts("NEW")
+    add_new = _rollup_add_sql(source, "NEW", new_value, new_downtime, new_cond).format(region=new_region)
+    remove_old = _rollup_remove_sql(source, "OLD", old_value, old_downtime, old_cond).format(region=old_region)
+
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_insert AFTER INSERT ON {source} "
+        f"BEGIN {add_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_delete AFTER DELETE ON {source} "
+        f"BEGIN {remove_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_update AFTER UPDATE OF {watched} ON {source} "
+        f"BEGIN {remove_old} {add_new} END",
+    ]
+
+
+def _migrate_daily_rollup(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            fecha TEXT NOT NULL,
+            source TEXT NOT NULL,
+            region TEXT NOT NULL DEFAULT '',
+            sum_case_value REAL NOT NULL DEFAULT 0,
+            n_cases INTEGER NOT NULL DEFAULT 0,
+            sum_downtime REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, source, region)
+        ) WITHOUT ROWID
+    """)
+    for source in ROLLUP_SOURCES:
+        for sql in _rollup_triggers(source):
+            conn.execute(sql)
+    rebuild_daily_rollup(conn)
+
+
+def rebuild_daily_rollup(conn):
+    """Recompute daily_rollup from scratch (backfill / repair)"""
+    conn.execute("DELETE FROM daily_rollup")
+    for source in ("cases", "ot_cases"):
+        conn.execute(f"""
+            INSERT INTO daily_rollup (fecha, source, region, sum_case_value, n_cases, sum_downtime)
+            SELECT fecha, '{source}', COALESCE(region, ''), SUM(COALESCE(case_value, 0)), COUNT(*), 0
+            FROM {source}
+            WHERE {COUNTS_TO_PRODUCTION.format(row=source)}
+            GROUP BY fecha, COALESCE(region, '')
+        """)
+    conn.execute("""
+        INSERT INTO daily_rollup (fecha, source, region, sum_case_value, n_cases, sum_downtime)
+        SELECT fecha, 'downtimes', '', 0, COUNT(*), SUM(COALESCE(duracion, 0))
+        FROM downtimes
+        GROUP BY fecha
+    """)
+
+
+# Standard times with the date they took effect. A NULL std_time retires a
+# type from that date on. The *_with_standard views add the standard that
+# applied on each case's fecha, for reports that must not use today's
+# standards.json.
+def _migrate_standards_versions(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS standards_versions (
+            region TEXT NOT NULL,
+            tipo_caso TEXT NOT NULL,
+            effective_from TEXT NOT NULL,
             std_time REAL,
-            efficiency REAL,
-            estado TEXT,
-            case_value REAL,
-            count_production INTEGER DEFAULT 1,
-            comments TEXT DEFAULT ''
-        )
+            PRIMARY KEY (region, tipo_caso, effective_from)
+        ) WITHOUT ROWID
     """)
-    
-    # Add columns if they don't exist (for existing databases)
-    try:
-        cursor.execute("ALTER TABLE ot_cases ADD COLUMN count_production INTEGER DEFAULT 1")
-    except:
-        pass
+    for table in ("cases", "ot_cases"):
+        conn.execute(f"""
+            CREATE VIEW IF NOT EXISTS {table}_with_standard AS
+            SELECT t.*, (
+                SELECT sv.std_time FROM standards_versions sv
+                WHERE sv.region = t.region AND sv.tipo_caso = t.tipo_caso
+                  AND sv.effective_from <= t.fecha
+                ORDER BY sv.effective_from DESC LIMIT 1
+            ) AS standard_at_fecha
+            FROM {table} t
+        """)
+
+
+def backup_database(label):
+    """Copy the open database next to itself as <db>.<label>-<time>.bak; returns the path"""
+    manager = get_manager()
+    path = f"{manager.path}.{label}-{time.strftime('%Y%m%d-%H%M%S')}.bak"
+    conn = get_connection()
+    target = sqlite3.connect(path)
     try:
-        cursor.execute("ALTER TABLE ot_cases ADD COLUMN comments TEXT DEFAULT ''")
-    except:
-        pass
+        conn.backup(target)
+    finally:
+        target.close()
+        conn.close()
+    return path
 
-    conn.commit()
+
+def get_daily_rollup(fecha):
+    """
+    Return the rollup buckets for one day as
+    {source: {region: (sum_case_value, n_cases, sum_downtime)}}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT source, region, sum_case_value, n_cases, sum_downtime
+        FROM daily_rollup WHERE fecha = ?
+    """, (fecha,))
+    rows = cursor.fetchall()
     conn.close()
+
+    rollup = {source: {} for source in ROLLUP_SOURCES}
+    for source, region, case_value, n_cases, downtime in rows:
+        rollup.setdefault(source, {})[region] = (case_value, n_cases, downtime)
+    return rollup
+
+
+def rollup_downtime(rollup):
+    """Minutes of downtime in a get_daily_rollup() result"""
+    return sum(row[2] for row in rollup["downtimes"].values())
+
+
+# Ordered (version, description, step) list. Steps must be idempotent so a
+# database created by an older build (which may already have some of the
+# objects) upgrades cleanly. Never renumber or edit a released step - append.
+MIGRATIONS = [
+    (1, "base tables and late-added case columns", _migrate_base_schema),
+    (2, "hot-path indexes", _migrate_hot_indexes),
+    (3, "trigger-maintained daily_rollup table", _migrate_daily_rollup),
+    (4, "effective-dated standards_versions table", _migrate_standards_versions),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations(conn):
+    """
+    Bring the database up to SCHEMA_VERSION in a single transaction.
+    Returns the list of versions applied; when the schema is already
+    current this only reads PRAGMA user_version and does no DDL.
+    """
+    if get_user_version(conn) >= SCHEMA_VERSION:
+        return []
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock in case another process just migrated
+        version = get_user_version(conn)
+        pending = [m for m in MIGRATIONS if m[0] > version]
+        for _version, _description, step in pending:
+            step(conn)
+        if pending:
+            conn.execute(f"PRAGMA user_version = {pending[-1][0]}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [m[0] for m in pending]
+
+
+def init_db():
+    conn = get_connection()
+    try:
+        if run_migrations(conn):
+            check_query_plans(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,186 @@
+"""
+Downtime rows: merge-on-write, and a command to merge downtimes recorded
+overlapping before merge-on-write existed:
+
+    python -m db.downtimes            # list the dates that would change
+    python -m db.downtimes --apply    # back the database up, then merge
+"""
+import argparse
+from db.database import backup_database, get_connection
+from db.overlaps import TimedRow, get_overlap_index
+from engine.intervals import DayIntervals, interval_minutes, from_minutes
+
+# Reasons of downtimes merged into one row are joined with this
+REASON_SEPARATOR = " + "
+
+
+def query_downtimes(fecha):
+    """Downtimes recorded for one date, latest start first"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, hora_inicio, hora_fin, duracion, razon
+        FROM downtimes
+        WHERE fecha = ?
+        ORDER BY hora_inicio DESC
+    """, (fecha,))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def day_intervals(rows):
+    """
+    DayIntervals keyed by row id for (id, hora_inicio, hora_fin, ...) rows.
+    Rows without readable times are left out.
+    """
+    intervals, ids = [], []
+    for row in rows:
+        try:
+            intervals.append(interval_minutes(row[1], row[2]))
+        except (AttributeError, ValueError):
+            continue
+        ids.append(row[0])
+    return DayIntervals(intervals, ids)
+
+
+def merged_reason(reasons):
+    """Distinct reasons in order, so a merged row still says what it covers"""
+    parts = []
+    for reason in reasons:
+        for part in (reason or "").split(REASON_SEPARATOR):
+            if part and part not in parts:
+                parts.append(part)
+    return REASON_SEPARATOR.join(parts)
+
+
+def _merge_into(cursor, fecha, start, end, reason):
+    """
+    Insert [start, end) on fecha, first absorbing every stored downtime it
+    overlaps. Returns (TimedRow of the new row, ids of the absorbed rows).
+    """
+    cursor.execute("""
+        SELECT id, hora_inicio, hora_fin, razon FROM downtimes WHERE fecha = ?
+    """, (fecha,))
+    rows = cursor.fetchall()
+    day = day_intervals(rows)
+    reasons = {row[0]: row[3] for row in rows}
+
+    absorbed = []
+    for i in day.overlapping(start, end):
+        start = min(start, day.starts[i])
+        end = max(end, day.ends[i])
+        absorbed.extend(day.keys[i])
+    if absorbed:
+        cursor.executemany("DELETE FROM downtimes WHERE id = ?", [(row_id,) for row_id in absorbed])
+        reason = merged_reason([reasons[row_id] for row_id in absorbed] + [reason])
+
+    hora_inicio, hora_fin = from_minutes(start), from_minutes(end)
+    cursor.execute("""
+        INSERT INTO downtimes (fecha, hora_inicio, hora_fin, razon, duracion)
+        VALUES (?, ?, ?, ?, ?)
+    """, (fecha, hora_inicio, hora_fin, reason, end - start))
+    return TimedRow("downtimes", cursor.lastrowid, hora_inicio, hora_fin, reason), absorbed
+
+
+def add_downtime(fecha, hora_inicio, hora_fin, razon):
+    """
+    Record a downtime, merging it with any it overlaps on the same date so
+    the stored rows (and the daily rollup) never count a minute twice.
+    Returns (row_id, rows_absorbed).
+    """
+    start, end = interval_minutes(hora_inicio, hora_fin)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        row, absorbed = _merge_into(cursor, fecha, start, end, razon)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    overlaps = get_overlap_index()
+    for row_id in absorbed:
+        overlaps.remove(fecha, "downtimes", row_id)
+    overlaps.add(fecha, row)
+    return row.id, len(absorbed)
+
+
+def delete_downtime(row_id):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT fecha FROM downtimes WHERE id = ?", (row_id,))
+    deleted = cursor.fetchone()
+    cursor.execute("DELETE FROM downtimes WHERE id = ?", (row_id,))
+    conn.commit()
+    conn.close()
+    if deleted:
+        get_overlap_index().remove(deleted[0], "downtimes", row_id)
+
+
+def merge_overlapping_downtimes(conn, dry_run=False):
+    """
+    Rewrite every date whose stored downtimes overlap as disjoint rows (data
+    recorded before merge-on-write). Returns {fecha: rows absorbed}; with
+    dry_run nothing is written. The caller commits.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT fecha FROM downtimes GROUP BY fecha HAVING COUNT(*) > 1
+    """)
+    absorbed = {}
+    for (fecha,) in cursor.fetchall():
+        cursor.execute("""
+            SELECT id, hora_inicio, hora_fin, razon FROM downtimes WHERE fecha = ? ORDER BY id
+        """, (fecha,))
+        rows = cursor.fetchall()
+        day = day_intervals(rows)
+        if all(len(keys) == 1 for keys in day.keys):
+            continue
+        reasons = {row[0]: row[3] for row in rows}
+        for start, end, keys in zip(day.starts, day.ends, day.keys):
+            if len(keys) == 1:
+                continue
+            absorbed[fecha] = absorbed.get(fecha, 0) + len(keys) - 1
+            if dry_run:
+                continue
+            cursor.executemany("DELETE FROM downtimes WHERE id = ?", [(row_id,) for row_id in keys])
+            cursor.execute("""
+                INSERT INTO downtimes (fecha, hora_inicio, hora_fin, razon, duracion)
+                VALUES (?, ?, ?, ?, ?)
+            """, (fecha, from_minutes(start), from_minutes(end),
+                  merged_reason(reasons[row_id] for row_id in keys), end - start))
+    return absorbed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge overlapping downtimes stored on the same date")
+    parser.add_argument("--apply", action="store_true",
+                        help="Back up the database and write the merge (default: only list)")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    try:
+        if args.apply:
+            print(f"Backup written to {backup_database('before-downtime-merge')}")
+            conn.execute("BEGIN IMMEDIATE")
+        absorbed = merge_overlapping_downtimes(conn, dry_run=not args.apply)
+        if args.apply:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    for fecha, rows in sorted(absorbed.items()):
+        print(f"{fecha}  {rows} rows absorbed into overlapping downtimes")
+    verb = "merged" if args.apply else "would be merged (run with --apply)"
+    print(f"{sum(absorbed.values())} rows on {len(absorbed)} dates {verb}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
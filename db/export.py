@@ -0,0 +1,243 @@
+"""
+Streaming exports of the case tables.
+
+Rows come from one SQLite cursor read with fetchmany(), so only a chunk is
+in memory at a time however many years are exported, and each chunk is
+written as soon as it arrives. Nothing here imports Qt: progress and
+cancellation go through callbacks so an export can run on a worker thread
+or headless.
+
+Formats: CSV and gzip-compressed CSV always; Parquet and Arrow IPC with
+typed columns (dates, floats, dictionary-encoded region/type) when the
+optional pyarrow package is installed.
+"""
+import csv
+import gzip
+import os
+import time
+from contextlib import closing
+from db.database import get_connection
+from db.queries import CASE_ORDER
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar formats are optional
+    pa = None
+
+# Rows read and written per step; also how often progress is reported
+EXPORT_CHUNK_ROWS = 5000
+# Columnar files get bigger batches so Parquet row groups stay efficient
+COLUMNAR_CHUNK_ROWS = 65536
+
+# Column kinds and the Arrow type each one is written as
+INT, FLOAT, TEXT, CATEGORY, DATE = "int", "float", "text", "category", "date"
+
+# (column, header, kind) of the History export, in file order
+HISTORY_EXPORT_COLUMNS = [
+    ("id", "ID", INT),
+    ("case_id", "Case", TEXT),
+    ("region", "Region", CATEGORY),
+    ("tipo_caso", "Case Type", CATEGORY),
+    ("fecha", "Date", DATE),
+    ("tiempo_real", "Time (min)", FLOAT),
+    ("std_time", "Std (min)", FLOAT),
+    ("efficiency", "Efficiency (%)", FLOAT),
+    ("estado", "Status", CATEGORY),
+    ("case_value", "Case Value (%)", FLOAT),
+]
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when its cancel check returns True"""
+
+
+def count_rows(where, params, table="cases"):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params)
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+
+def iter_row_chunks(columns, where, params, table="cases", chunk_size=EXPORT_CHUNK_ROWS):
+    """Yield lists of up to chunk_size rows in CASE_ORDER from one open cursor"""
+    names = ", ".join(column[0] for column in columns)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {names} FROM {table} WHERE {where} ORDER BY {CASE_ORDER}", params)
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        conn.close()
+
+
+def stream_export(path, write_chunks, columns, where, params, table="cases",
+                  progress=None, is_cancelled=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Run write_chunks(file_path, chunks) over the filtered rows.
+
+    The file is written as <path>.part and renamed over path only when
+    complete, so a failed or cancelled export never leaves a truncated file
+    behind. progress(rows_written, total_rows, seconds) is called after
+    every chunk; is_cancelled() is checked before every chunk and stops the
+    export with ExportCancelled. Returns (rows_written, seconds).
+    """
+    total = count_rows(where, params, table)
+    started = time.perf_counter()
+    state = {"rows": 0}
+
+    def chunks():
+        with closing(iter_row_chunks(columns, where, params, table, chunk_size)) as source:
+            for chunk in source:
+                if is_cancelled is not None and is_cancelled():
+                    raise ExportCancelled()
+                yield chunk
+                state["rows"] += len(chunk)
+                if progress is not None:
+                    # Rows saved after the count keep the bar from overflowing
+                    progress(state["rows"], max(total, state["rows"]), time.perf_counter() - started)
+
+    part_path = f"{path}.part"
+    try:
+        write_chunks(part_path, chunks())
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return state["rows"], time.perf_counter() - started
+
+
+def write_csv_chunks(path, columns, chunks, compress=False):
+    opener = gzip.open if compress else open
+    with opener(path, "wt", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([column[1] for column in columns])
+        for chunk in chunks:
+            writer.writerows(chunk)
+
+
+def export_csv(path, columns, where, params, table="cases", **options):
+    """Stream the filtered rows to a CSV file; see stream_export()"""
+    return stream_export(
+        path, lambda part_path, chunks: write_csv_chunks(part_path, columns, chunks),
+        columns, where, params, table, **options
+    )
+
+
+def export_csv_gz(path, columns, where, params, table="cases", **options):
+    """Stream the filtered rows to a gzip-compressed CSV file"""
+    return stream_export(
+        path, lambda part_path, chunks: write_csv_chunks(part_path, columns, chunks, compress=True),
+        columns, where, params, table, **options
+    )
+
+
+# --- Columnar formats (pyarrow) ---------------------------------------------
+
+def columnar_available():
+    return pa is not None
+
+
+def arrow_schema(columns):
+    types = {
+        INT: pa.int64(),
+        FLOAT: pa.float64(),
+        TEXT: pa.string(),
+        CATEGORY: pa.dictionary(pa.int32(), pa.string()),
+        DATE: pa.date32(),
+    }
+    return pa.schema([(header, types[kind]) for _column, header, kind in columns])
+
+
+class ArrowBatcher:
+    """
+    Turns row chunks into RecordBatches. Category columns share one growing
+    dictionary per column, so later batches only add new values to it
+    (an Arrow dictionary delta) instead of replacing it.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.schema = arrow_schema(columns)
+        self.dictionaries = {i: {} for i, column in enumerate(columns) if column[2] == CATEGORY}
+
+    def _category(self, i, values):
+        codes = self.dictionaries[i]
+        indices = [None if value is None else codes.setdefault(value, len(codes)) for value in values]
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, pa.int32()), pa.array(list(codes), pa.string())
+        )
+
+    def batch(self, chunk):
+        arrays = []
+        for i, values in enumerate(zip(*chunk)):
+            kind = self.columns[i][2]
+            if kind == CATEGORY:
+                arrays.append(self._category(i, values))
+            elif kind == DATE:
+                # Malformed dates become nulls rather than failing the export
+                parsed = pc.strptime(pa.array(values, pa.string()), format="%Y-%m-%d",
+                                     unit="s", error_is_null=True)
+                arrays.append(parsed.cast(pa.date32()))
+            else:
+                arrays.append(pa.array(values, self.schema.field(i).type))
+        return pa.record_batch(arrays, schema=self.schema)
+
+
+def write_parquet_chunks(path, columns, chunks):
+    batcher = ArrowBatcher(columns)
+    with pq.ParquetWriter(path, batcher.schema, compression="zstd") as writer:
+        for chunk in chunks:
+            writer.write_batch(batcher.batch(chunk))
+
+
+def write_arrow_chunks(path, columns, chunks):
+    batcher = ArrowBatcher(columns)
+    options = pa_ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+    with pa_ipc.new_file(path, batcher.schema, options=options) as writer:
+        for chunk in chunks:
+            writer.write_batch(batcher.batch(chunk))
+
+
+def export_parquet(path, columns, where, params, table="cases", **options):
+    """Stream the filtered rows to a Parquet file (needs pyarrow)"""
+    options.setdefault("chunk_size", COLUMNAR_CHUNK_ROWS)
+    return stream_export(
+        path, lambda part_path, chunks: write_parquet_chunks(part_path, columns, chunks),
+        columns, where, params, table, **options
+    )
+
+
+def export_arrow(path, columns, where, params, table="cases", **options):
+    """Stream the filtered rows to an Arrow IPC (Feather v2) file (needs pyarrow)"""
+    options.setdefault("chunk_size", COLUMNAR_CHUNK_ROWS)
+    return stream_export(
+        path, lambda part_path, chunks: write_arrow_chunks(part_path, columns, chunks),
+        columns, where, params, table, **options
+    )
+
+
+def export_formats():
+    """
+    [(file dialog filter, extension, export function)] usable here;
+    the columnar formats are only listed when pyarrow is installed.
+    """
+    formats = [
+        ("CSV Files (*.csv)", ".csv", export_csv),
+        ("Compressed CSV (*.csv.gz)", ".csv.gz", export_csv_gz),
+    ]
+    if columnar_available():
+        formats += [
+            ("Parquet Files (*.parquet)", ".parquet", export_parquet),
+            ("Arrow IPC Files (*.arrow)", ".arrow", export_arrow),
+        ]
+    return formats
@@ -0,0 +1,190 @@
+"""
+Overlaps between cases, OT cases and downtimes on the same day.
+
+A minute spent on two cases, or on a case and a downtime, counts twice
+toward the day's production. OverlapIndex keeps one IntervalIndex per
+date (built on first use, then updated in place as rows are saved and
+deleted) so the Register and OT tabs can check a case before saving it.
+The audit lists every overlap in a date range; run it with
+
+    python -m db.overlaps 2026-01-01 2026-03-31
+"""
+import argparse
+import threading
+from collections import namedtuple
+from itertools import groupby
+from db.database import get_connection, COUNTS_TO_PRODUCTION
+from engine.intervals import IntervalIndex, interval_minutes, overlapping_pairs
+
+# One timed row: table is 'cases', 'ot_cases' or 'downtimes'; label is the
+# case ID or the downtime reason
+TimedRow = namedtuple("TimedRow", "table id hora_inicio hora_fin label")
+Overlap = namedtuple("Overlap", "fecha first second minutes")
+
+TABLE_LABELS = {"cases": "Case", "ot_cases": "OT case", "downtimes": "Downtime"}
+
+# Cases that do not count to production cannot double-count it
+TIMED_ROWS_SQL = f"""
+    SELECT fecha, 'cases', id, hora_inicio, hora_fin, case_id FROM cases
+    WHERE fecha BETWEEN ? AND ? AND {COUNTS_TO_PRODUCTION.format(row="cases")}
+    UNION ALL
+    SELECT fecha, 'ot_cases', id, hora_inicio, hora_fin, case_id FROM ot_cases
+    WHERE fecha BETWEEN ? AND ? AND {COUNTS_TO_PRODUCTION.format(row="ot_cases")}
+    UNION ALL
+    SELECT fecha, 'downtimes', id, hora_inicio, hora_fin, razon FROM downtimes
+    WHERE fecha BETWEEN ? AND ?
+"""
+
+
+def describe(row):
+    return f"{TABLE_LABELS[row.table]} {row.label} ({row.hora_inicio}-{row.hora_fin})"
+
+
+def _row_interval(row):
+    """(start, end) minutes of a TimedRow, or None when its times are unreadable"""
+    try:
+        return interval_minutes(row.hora_inicio, row.hora_fin)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _timed_intervals(rows):
+    """(intervals, TimedRows) for rows with readable times"""
+    intervals, timed = [], []
+    for row in rows:
+        interval = _row_interval(row)
+        if interval is not None:
+            intervals.append(interval)
+            timed.append(row)
+    return intervals, timed
+
+
+def fetch_timed_rows(date_from, date_to):
+    """(fecha, TimedRow) for every timed row in the range, ordered by fecha"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(TIMED_ROWS_SQL + " ORDER BY fecha", (date_from, date_to) * 3)
+    rows = [(fecha, TimedRow(*rest)) for fecha, *rest in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def counts_to_production(row):
+    """Python mirror of COUNTS_TO_PRODUCTION for a {column: value} row"""
+    return row.get("count_production") in (1, None)
+
+
+class OverlapIndex:
+    """
+    Per-date IntervalIndex over cases, OT cases and downtimes, keyed by
+    (table, id). A date is read on first use and then kept current in place
+    by add()/remove() as rows are saved and deleted.
+    """
+
+    def __init__(self):
+        self._days = {}  # fecha -> (IntervalIndex, {(table, id): TimedRow})
+        self._lock = threading.Lock()
+
+    def day(self, fecha):
+        with self._lock:
+            day = self._days.get(fecha)
+        if day is None:
+            rows = {}
+            index = IntervalIndex()
+            for _fecha, row in fetch_timed_rows(fecha, fecha):
+                interval = _row_interval(row)
+                if interval is not None:
+                    index.add(*interval, (row.table, row.id))
+                    rows[(row.table, row.id)] = row
+            day = (index, rows)
+            with self._lock:
+                day = self._days.setdefault(fecha, day)
+        return day
+
+    def find(self, fecha, hora_inicio, hora_fin, exclude=None):
+        """
+        Timed rows on fecha overlapping hora_inicio-hora_fin. exclude is a
+        (table, id) pair to skip, e.g. the case being edited.
+        """
+        start, end = interval_minutes(hora_inicio, hora_fin)
+        index, rows = self.day(fecha)
+        with self._lock:
+            return [rows[key] for key in index.overlapping(start, end, exclude)]
+
+    def add(self, fecha, row):
+        """Index a TimedRow saved on fecha (dates not loaded yet are skipped)"""
+        interval = _row_interval(row)
+        with self._lock:
+            day = self._days.get(fecha)
+            if day is None:
+                return
+            index, rows = day
+            key = (row.table, row.id)
+            if interval is not None:
+                index.add(*interval, key)
+                rows[key] = row
+            elif index.remove(key):
+                rows.pop(key)
+
+    def remove(self, fecha, table, row_id):
+        with self._lock:
+            day = self._days.get(fecha)
+            if day is not None and day[0].remove((table, row_id)):
+                del day[1][(table, row_id)]
+
+    def invalidate(self, *fechas):
+        with self._lock:
+            if not fechas:
+                self._days.clear()
+            for fecha in fechas:
+                self._days.pop(fecha, None)
+
+    def apply_change(self, change):
+        """Move a saved or deleted case (a RowChange) within the index"""
+        if change.old_row is not None:
+            self.remove(change.old_row["fecha"], change.table, change.row_id)
+        row = change.row
+        if row is not None and counts_to_production(row):
+            self.add(row["fecha"], TimedRow(
+                change.table, change.row_id, row["hora_inicio"], row["hora_fin"], row["case_id"]
+            ))
+
+
+def audit_overlaps(date_from, date_to):
+    """Every overlap between timed rows in [date_from, date_to], by date"""
+    overlaps = []
+    for fecha, day_rows in groupby(fetch_timed_rows(date_from, date_to), key=lambda item: item[0]):
+        intervals, timed = _timed_intervals(row for _fecha, row in day_rows)
+        for first, second, minutes in overlapping_pairs(intervals, timed):
+            overlaps.append(Overlap(fecha, first, second, minutes))
+    return overlaps
+
+
+_index = None
+
+
+def get_overlap_index():
+    """Return the process-wide OverlapIndex"""
+    global _index
+    if _index is None:
+        _index = OverlapIndex()
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List overlapping cases, OT cases and downtimes")
+    parser.add_argument("date_from", help="First date, YYYY-MM-DD")
+    parser.add_argument("date_to", help="Last date, YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    overlaps = audit_overlaps(args.date_from, args.date_to)
+    for overlap in overlaps:
+        print(f"{overlap.fecha}  {describe(overlap.first)}  <->  {describe(overlap.second)}  "
+              f"{overlap.minutes} min")
+    total = sum(overlap.minutes for overlap in overlaps)
+    print(f"{len(overlaps)} overlaps, {total} overlapping minutes")
+    return 1 if overlaps else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+from db.database import get_connection
+
+# Rows fetched per page by the list views
+PAGE_SIZE = 200
+
+# Keyset order used by every case list. id breaks ties between cases that
+# share a start time, so a page boundary never skips or repeats a row.
+CASE_ORDER = "fecha DESC, hora_inicio DESC, id DESC"
+
+
+def like_pattern(text):
+    """Build a LIKE pattern matching text anywhere (case-insensitive for ASCII)"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def build_case_filter(date_from=None, date_to=None, region=None, tipo=None,
+                      doctor=None, case_search=None, estado=None):
+    """
+    Turn the list filters into a parameterized WHERE clause.
+    Empty values (None, "", "All") are ignored. Returns (where_sql, params).
+    """
+    clauses = []
+    params = []
+    if date_from:
+        clauses.append("fecha >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("fecha <= ?")
+        params.append(date_to)
+    if region and region != "All":
+        clauses.append("region = ?")
+        params.append(region)
+    if tipo and tipo != "All":
+        clauses.append("tipo_caso = ?")
+        params.append(tipo)
+    if estado and estado != "All":
+        clauses.append("estado = ?")
+        params.append(estado)
+    if doctor:
+        clauses.append("doctor LIKE ? ESCAPE '\\'")
+        params.append(like_pattern(doctor))
+    if case_search:
+        clauses.append("case_id LIKE ? ESCAPE '\\'")
+        params.append(like_pattern(case_search))
+    return (" AND ".join(clauses) or "1"), tuple(params)
+
+
+def case_matches_filter(row, date_from=None, date_to=None, region=None, tipo=None,
+                        doctor=None, case_search=None, estado=None):
+    """
+    Python mirror of build_case_filter for a single {column: value} row,
+    used to place change events without re-running the query.
+    """
+    fecha = row["fecha"] or ""
+    if date_from and fecha < date_from:
+        return False
+    if date_to and fecha > date_to:
+        return False
+    if region and region != "All" and row["region"] != region:
+        return False
+    if tipo and tipo != "All" and row["tipo_caso"] != tipo:
+        return False
+    if estado and estado != "All" and row["estado"] != estado:
+        return False
+    if doctor and doctor.lower() not in (row["doctor"] or "").lower():
+        return False
+    if case_search and case_search.lower() not in str(row["case_id"] or "").lower():
+        return False
+    return True
+
+
+def fetch_case_page(columns, where, params, after=None, limit=PAGE_SIZE, table="cases"):
+    """
+    Fetch one page of rows in CASE_ORDER.
+
+    after is the key returned for the previous page (None for the first).
+    Returns (rows, next_key); next_key is None when there are no more rows.
+    """
+    sql = f"SELECT {columns}, fecha, hora_inicio, id FROM {table} WHERE {where}"
+    args = list(params)
+    if after is not None:
+        sql += " AND (fecha, hora_inicio, id) < (?, ?, ?)"
+        args.extend(after)
+    sql += f" ORDER BY {CASE_ORDER} LIMIT ?"
+    args.append(limit)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, args)
+    raw = cursor.fetchall()
+    conn.close()
+
+    rows = [row[:-3] for row in raw]
+    next_key = tuple(raw[-1][-3:]) if len(raw) == limit else None
+    return rows, next_key
+
+
+def fetch_case_summary(where, params, table="cases"):
+    """Return (count, ok_count, total_value, avg_efficiency) for the filter"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT COUNT(*), SUM(estado = 'OK'), SUM(case_value), AVG(efficiency)
+        FROM {table} WHERE {where}
+    """, params)
+    count, ok_count, total_value, avg_efficiency = cursor.fetchone()
+    conn.close()
+    return count, ok_count or 0, total_value or 0.0, avg_efficiency or 0.0
+
+
+def fetch_daily_totals(where, params, table="cases"):
+    """Return {fecha: [case_count, total_value]} for the filter"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT fecha, COUNT(*), SUM(case_value)
+        FROM {table} WHERE {where}
+        GROUP BY fecha
+    """, params)
+    totals = {fecha: [count, value or 0.0] for fecha, count, value in cursor.fetchall()}
+    conn.close()
+    return totals
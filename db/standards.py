@@ -0,0 +1,358 @@
+import copy
+import json
+import logging
+import os
+import shutil
+import threading
+from bisect import bisect_right
+from types import MappingProxyType
+from db.database import get_connection, get_resource_path
+from engine.units import compile_units_eq, units_at_100
+
+logger = logging.getLogger(__name__)
+
+STANDARDS_FILE = os.path.join("data", "standards.json")
+UNITS_EQ_FILE = os.path.join("data", "units_eq.json")
+
+# Previous versions kept next to a file as <name>.bak.1 (newest) .. .bak.N
+BACKUP_COUNT = 3
+
+
+def validate_standards(data):
+    """True if data has the {region: {"Aligners": {type: minutes}}} shape"""
+    if not isinstance(data, dict):
+        return False
+    for region_data in data.values():
+        if not isinstance(region_data, dict) or not isinstance(region_data.get("Aligners"), dict):
+            return False
+        for std_time in region_data["Aligners"].values():
+            if isinstance(std_time, bool) or not isinstance(std_time, (int, float)):
+                return False
+    return True
+
+
+def validate_units_eq(data):
+    """True if data has the {region: {percent: units}} shape"""
+    if not isinstance(data, dict):
+        return False
+    for region_data in data.values():
+        if not isinstance(region_data, dict):
+            return False
+        for pct, units in region_data.items():
+            if not pct.lstrip("-").isdigit() or not isinstance(units, (int, float)):
+                return False
+    return True
+
+
+VALIDATORS = {STANDARDS_FILE: validate_standards, UNITS_EQ_FILE: validate_units_eq}
+
+
+def backup_path(path, n):
+    return f"{path}.bak.{n}"
+
+
+def _fsync_dir(directory):
+    # Makes the rename itself durable; not supported on Windows
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_json_atomic(path, data, backups=BACKUP_COUNT):
+    """
+    Write data as compact JSON without ever leaving a half-written file.
+
+    The new content goes to <path>.tmp and is fsynced; the current file is
+    kept as <path>.bak.1 (older backups shift up to .bak.<backups>); then the
+    temp file is renamed over path. A crash at any point leaves either the
+    old or the new file in place, plus the backups to fall back to.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+
+    if backups and os.path.exists(path):
+        for n in range(backups, 1, -1):
+            if os.path.exists(backup_path(path, n - 1)):
+                os.replace(backup_path(path, n - 1), backup_path(path, n))
+        # Hard link keeps path in place until the rename below
+        newest = backup_path(path, 1)
+        if os.path.exists(newest):
+            os.remove(newest)
+        try:
+            os.link(path, newest)
+        except OSError:
+            shutil.copy2(path, newest)
+
+    os.replace(tmp_path, path)
+    _fsync_dir(directory)
+
+
+def load_json_with_fallback(path, validate=None, backups=BACKUP_COUNT):
+    """
+    Parse path, falling back to the newest backup that parses and validates.
+    Returns (data, source_path). Raises the first error when nothing is usable.
+    """
+    first_error = None
+    for candidate in [path] + [backup_path(path, n) for n in range(1, backups + 1)]:
+        try:
+            with open(candidate, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            first_error = first_error or e
+            continue
+        if validate is not None and not validate(data):
+            first_error = first_error or ValueError(f"{candidate} has an invalid structure")
+            continue
+        if candidate != path:
+            logger.warning("%s is unreadable (%s); using backup %s", path, first_error, candidate)
+        return data, candidate
+    raise first_error
+
+
+def freeze(value):
+    """Read-only view of parsed JSON: dicts become mappingproxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class _CachedFile:
+    """One parsed JSON file plus whatever was derived from it"""
+    __slots__ = ("stamp", "raw", "view", "derived", "source")
+
+    def __init__(self, stamp, raw, source):
+        self.stamp = stamp
+        self.raw = raw
+        self.source = source  # Path actually parsed (a backup after a bad write)
+        self.view = freeze(raw)
+        self.derived = {}
+
+
+class StandardsRegistry:
+    """
+    Process-wide cache of standards.json and units_eq.json.
+
+    Each file is parsed once and re-parsed only when its mtime or size
+    changes, so every tab shares one copy and a standards_updated signal no
+    longer costs a parse per tab. Callers get read-only views; StandardsTab,
+    which edits, asks for a private copy with standards_copy(). A file that
+    is corrupt or fails validation is replaced by its newest good backup.
+    """
+
+    def __init__(self, resolve_path=get_resource_path):
+        self._resolve_path = resolve_path
+        self._files = {}
+        self._lock = threading.Lock()
+        self.parses = 0  # Files actually parsed, for diagnostics
+
+    def _file(self, relative_path):
+        path = self._resolve_path(relative_path)
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None  # Missing; a backup may still be there
+        with self._lock:
+            cached = self._files.get(relative_path)
+            if cached is None or cached.stamp != stamp:
+                raw, source = load_json_with_fallback(path, VALIDATORS.get(relative_path))
+                cached = _CachedFile(stamp, raw, source)
+                self.parses += 1
+                self._files[relative_path] = cached
+            return cached
+
+    def _derived(self, relative_path, name, build):
+        cached = self._file(relative_path)
+        if name not in cached.derived:
+            cached.derived[name] = build(cached.raw)
+        return cached.derived[name]
+
+    def source(self, relative_path):
+        """Path the cached copy of a file was actually read from"""
+        return self._file(relative_path).source
+
+    def invalidate(self):
+        """Forget everything; the next access re-reads the files"""
+        with self._lock:
+            self._files.clear()
+
+    # --- Standards --------------------------------------------------------
+
+    def standards(self):
+        """Read-only {region: {"Aligners": {type: std_time}}}"""
+        return self._file(STANDARDS_FILE).view
+
+    def standards_copy(self):
+        """Mutable deep copy for editing"""
+        return copy.deepcopy(self._file(STANDARDS_FILE).raw)
+
+    def std_index(self):
+        """Flat {(region, type): std_time} index"""
+        return self._derived(STANDARDS_FILE, "index", flatten_standards)
+
+    def std_time(self, region, tipo):
+        """Standard time for a region/type, or None"""
+        return self.std_index().get((region, tipo))
+
+    # --- Units equivalency ------------------------------------------------
+
+    def units_eq(self):
+        """Read-only {region: {production %: units}}"""
+        return self._file(UNITS_EQ_FILE).view
+
+    def units_tables(self):
+        """Compiled {region: UnitsTable}"""
+        return self._derived(UNITS_EQ_FILE, "tables", compile_units_eq)
+
+    def units_at_100(self):
+        return self._derived(UNITS_EQ_FILE, "at_100", lambda raw: units_at_100(self.units_tables()))
+
+
+_registry = None
+
+
+def get_standards_registry():
+    """Return the process-wide StandardsRegistry"""
+    global _registry
+    if _registry is None:
+        _registry = StandardsRegistry()
+    return _registry
+
+
+# --- Effective-dated standards (standards_versions table) --------------------
+
+# Versions seeded from the first standards.json apply to all earlier history
+BASELINE_DATE = "0001-01-01"
+
+
+def flatten_standards(standards):
+    """{(region, type): std_time} for a standards dict"""
+    return {
+        (region, tipo): std_time
+        for region, data in standards.items()
+        for tipo, std_time in data.get("Aligners", {}).items()
+    }
+
+
+class StandardsHistory:
+    """
+    In-memory copy of standards_versions for per-date lookups.
+
+    The table is small (one row per type per change), so it is read once
+    into {(region, type): ([effective_from...], [std_time...])} and each
+    lookup is a bisect. Writers call invalidate().
+    """
+
+    def __init__(self):
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._versions is None:
+                conn = get_connection()
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT region, tipo_caso, effective_from, std_time
+                    FROM standards_versions
+                    ORDER BY region, tipo_caso, effective_from
+                """)
+                versions = {}
+                for region, tipo, effective_from, std_time in cursor.fetchall():
+                    dates, values = versions.setdefault((region, tipo), ([], []))
+                    dates.append(effective_from)
+                    values.append(std_time)
+                conn.close()
+                self._versions = versions
+            return self._versions
+
+    def invalidate(self):
+        with self._lock:
+            self._versions = None
+
+    def is_empty(self):
+        return not self._load()
+
+    def std_time_at(self, region, tipo, fecha):
+        """Standard in effect on fecha, or None (unknown or retired type)"""
+        entry = self._load().get((region, tipo))
+        if entry is None:
+            return None
+        dates, values = entry
+        i = bisect_right(dates, fecha)
+        return values[i - 1] if i else None
+
+    def latest(self):
+        """{(region, type): std_time} of the newest version of every type"""
+        return {key: values[-1] for key, (_dates, values) in self._load().items()}
+
+
+def record_standards_version(standards, effective_from, history=None):
+    """
+    Store the types whose standard on effective_from differs from standards
+    (and retire types no longer listed) in one transaction.
+    Returns the number of version rows written.
+    """
+    history = history or get_standards_history()
+    flat = flatten_standards(standards)
+    known = set(history.latest())
+    rows = []
+    for key, std_time in flat.items():
+        if history.std_time_at(*key, effective_from) != std_time:
+            rows.append((*key, effective_from, std_time))
+    for key in known - set(flat):
+        if history.std_time_at(*key, effective_from) is not None:
+            rows.append((*key, effective_from, None))
+    if not rows:
+        return 0
+
+    conn = get_connection()
+    try:
+        conn.executemany("""
+            INSERT OR REPLACE INTO standards_versions (region, tipo_caso, effective_from, std_time)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+    finally:
+        conn.close()
+    history.invalidate()
+    return len(rows)
+
+
+def sync_standards_versions(standards, today):
+    """
+    Make standards_versions reflect standards.json at startup: seed it on
+    first run (effective for all history), and record edits made to the file
+    outside the app as effective today.
+    """
+    history = get_standards_history()
+    if history.is_empty():
+        return record_standards_version(standards, BASELINE_DATE, history)
+    latest = history.latest()
+    flat = flatten_standards(standards)
+    current = {key: value for key, value in latest.items() if value is not None}
+    if current == flat:
+        return 0
+    return record_standards_version(standards, today, history)
+
+
+_history = None
+
+
+def get_standards_history():
+    """Return the process-wide StandardsHistory"""
+    global _history
+    if _history is None:
+        _history = StandardsHistory()
+    return _history
@@ -0,0 +1,124 @@
+"""
+Production math shared by the Register and OT tabs and by batch jobs.
+
+Nothing here imports Qt: every function takes plain numbers (scalar API) or
+sequences/NumPy arrays (the *_batch API) so it can be profiled, benchmarked
+and run headless.
+"""
+import numpy as np
+
+# Reference: 9-hour workday (6:00 AM - 3:00 PM) = 540 minutes = 100%
+# But using 408.3 minutes as base to match ICON Warford Primary = 6.980%
+DAILY_BASE_MINUTES = 408.3
+
+# Efficiency thresholds (%)
+OK_THRESHOLD = 100.0
+WARN_THRESHOLD = 95.0
+
+OK = "OK"
+WARN = "WARN"
+LOW = "LOW"
+
+
+# --- Scalar API -----------------------------------------------------------
+
+def efficiency(std_time, real_minutes):
+    """Efficiency % of a case: standard time over real time"""
+    return (std_time / real_minutes) * 100
+
+
+def classify(efficiency_pct):
+    """Display status: OK at 100%+, WARN from 95%, LOW below"""
+    if efficiency_pct >= OK_THRESHOLD:
+        return OK
+    if efficiency_pct >= WARN_THRESHOLD:
+        return WARN
+    return LOW
+
+
+def stored_status(efficiency_pct):
+    """
+    Status written to the database. The estado column only knows OK/LOW,
+    so a WARN case is stored as LOW.
+    """
+    return OK if efficiency_pct >= OK_THRESHOLD else LOW
+
+
+def case_value(std_time):
+    """Fixed percentage value of a case: (std_time / 408.3) * 100"""
+    return (std_time / DAILY_BASE_MINUTES) * 100
+
+
+def downtime_value(downtime_minutes):
+    """Downtime counts as production at the same per-minute rate as cases"""
+    if downtime_minutes <= 0:
+        return 0
+    return (downtime_minutes / DAILY_BASE_MINUTES) * 100
+
+
+def equivalent_units(case_value_pct, units_at_100):
+    """Units a production percentage is worth, given the region's units at 100%"""
+    return (case_value_pct / 100) * units_at_100
+
+
+def evaluate_case(std_time, real_minutes):
+    """
+    Everything the tabs need for one case.
+    Returns (efficiency, display_status, stored_status, case_value).
+    """
+    eff = efficiency(std_time, real_minutes)
+    return eff, classify(eff), stored_status(eff), case_value(std_time)
+
+
+def daily_equivalent_units(region_values, units_at_100):
+    """
+    Sum equivalent units over {region: case_value_pct}; units_at_100 maps
+    region -> units at 100%. Regions without an entry count as zero.
+    """
+    total = 0.0
+    for region, value in region_values.items():
+        if region in units_at_100 and value:
+            total += equivalent_units(value, units_at_100[region])
+    return total
+
+
+# --- Batch API ------------------------------------------------------------
+
+def efficiency_batch(std_times, real_minutes):
+    """Vectorized efficiency(); rows with no real time give NaN"""
+    std_times = np.asarray(std_times, dtype=float)
+    real_minutes = np.asarray(real_minutes, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = std_times / real_minutes * 100
+    return np.where(real_minutes > 0, result, np.nan)
+
+
+def classify_batch(efficiencies):
+    """Vectorized classify(); NaN efficiencies classify as LOW"""
+    efficiencies = np.asarray(efficiencies, dtype=float)
+    return np.select(
+        [efficiencies >= OK_THRESHOLD, efficiencies >= WARN_THRESHOLD],
+        [OK, WARN], default=LOW
+    )
+
+
+def stored_status_batch(efficiencies):
+    """Vectorized stored_status()"""
+    efficiencies = np.asarray(efficiencies, dtype=float)
+    return np.where(efficiencies >= OK_THRESHOLD, OK, LOW)
+
+
+def case_value_batch(std_times):
+    """Vectorized case_value()"""
+    return np.asarray(std_times, dtype=float) / DAILY_BASE_MINUTES * 100
+
+
+def downtime_value_batch(downtime_minutes):
+    """Vectorized downtime_value()"""
+    downtime_minutes = np.asarray(downtime_minutes, dtype=float)
+    return np.where(downtime_minutes > 0, downtime_minutes / DAILY_BASE_MINUTES * 100, 0.0)
+
+
+def equivalent_units_batch(case_values, units_at_100):
+    """Vectorized equivalent_units(); units_at_100 may be a scalar or an array"""
+    return np.asarray(case_values, dtype=float) / 100 * np.asarray(units_at_100, dtype=float)
@@ -0,0 +1,219 @@
+"""
+Half-open time intervals [start, end) in minutes since midnight.
+
+Downtimes are stored as "HH:mm" start/end strings. An end before the start
+means the interval runs past midnight, so it is kept on its own day with
+end > 1440. DayIntervals holds one day's intervals merged into disjoint
+runs sorted by start, so the runs a new interval overlaps are found by
+bisection. IntervalIndex is an interval tree for intervals that may
+overlap each other. Nothing here touches the database or Qt.
+"""
+import random
+from bisect import bisect_left, bisect_right
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(hhmm):
+    """Minutes since midnight for an "HH:mm" string"""
+    hours, minutes = hhmm.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def from_minutes(minutes):
+    """ "HH:mm" for minutes since midnight (wraps past midnight)"""
+    minutes = int(minutes) % MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def interval_minutes(hora_inicio, hora_fin):
+    """(start, end) minutes for a start/end pair; an earlier end means next day"""
+    start = to_minutes(hora_inicio)
+    end = to_minutes(hora_fin)
+    if end < start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def merge_intervals(intervals):
+    """Union of (start, end) pairs as sorted, disjoint (start, end) pairs"""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start < merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class DayIntervals:
+    """
+    One day's intervals, kept disjoint and sorted by start.
+
+    Overlapping input is merged on construction. keys holds whatever was
+    passed along with each input interval (row ids for downtimes); a merged
+    interval keeps the keys of every interval it absorbed.
+    """
+    __slots__ = ("starts", "ends", "keys")
+
+    def __init__(self, intervals=(), keys=None):
+        keys = keys if keys is not None else [None] * len(intervals)
+        pairs = sorted(zip(intervals, keys), key=lambda pair: pair[0])
+        self.starts = []
+        self.ends = []
+        self.keys = []
+        for (start, end), key in pairs:
+            if end <= start:
+                continue
+            if self.ends and start < self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+                self.keys[-1].append(key)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+                self.keys.append([key])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end):
+        """Indices of the intervals that overlap [start, end)"""
+        if end <= start:
+            return range(0)
+        return range(bisect_right(self.ends, start), bisect_left(self.starts, end))
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "seq", "priority", "max_end", "left", "right")
+
+    def __init__(self, start, end, key, seq, priority):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.seq = seq  # Insertion order, breaks ties between equal starts
+        self.priority = priority
+        self.max_end = end  # Largest end in this subtree
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_end = self.end
+        if self.left is not None and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+
+def _split(node, order):
+    """(nodes before order, nodes at or after order) of a subtree"""
+    if node is None:
+        return None, None
+    if (node.start, node.seq) < order:
+        node.right, right = _split(node.right, order)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, order)
+    node.update()
+    return left, node
+
+
+def _merge(left, right):
+    """Join two subtrees where every node of left comes before right"""
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+class IntervalIndex:
+    """
+    Intervals that may overlap each other (cases, OT cases and downtimes of
+    one day) in an interval tree: a treap ordered by start where each node
+    also knows the largest end in its subtree. Finding what overlaps
+    [start, end) skips every subtree whose ends cannot reach start, so a
+    lookup is O(log n + matches) however long any interval is, and add()
+    and remove() update the tree in place in O(log n). Keys must be
+    hashable and unique.
+    """
+    __slots__ = ("_root", "_nodes", "_seq", "_random")
+
+    def __init__(self, intervals=(), keys=()):
+        self._root = None
+        self._nodes = {}
+        self._seq = 0
+        self._random = random.Random(0)  # Same shape for the same input
+        for (start, end), key in zip(intervals, keys):
+            self.add(start, end, key)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, key):
+        return key in self._nodes
+
+    def add(self, start, end, key):
+        """Insert [start, end) under key (replacing an interval with the same key)"""
+        if key in self._nodes:
+            self.remove(key)
+        node = _Node(start, end, key, self._seq, self._random.random())
+        self._seq += 1
+        left, right = _split(self._root, (start, node.seq))
+        self._root = _merge(_merge(left, node), right)
+        self._nodes[key] = node
+
+    def remove(self, key):
+        """Drop the interval stored under key; False when there is none"""
+        node = self._nodes.pop(key, None)
+        if node is None:
+            return False
+        left, rest = _split(self._root, (node.start, node.seq))
+        _node, right = _split(rest, (node.start, node.seq + 1))
+        self._root = _merge(left, right)
+        return True
+
+    def overlapping(self, start, end, exclude=None):
+        """Keys of the intervals overlapping [start, end), in start order"""
+        found = []
+        if end <= start:
+            return found
+        stack = []
+        node = self._root
+        # In-order walk that never enters a subtree ending at or before start
+        while stack or node is not None:
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break  # Everything after this starts too late
+            if node.end > start and node.key != exclude:
+                found.append(node.key)
+            node = node.right
+        return found
+
+
+def overlapping_pairs(intervals, keys):
+    """
+    Every pair of overlapping intervals as (key_a, key_b, minutes) with a
+    starting first: one sweep over the intervals sorted by start.
+    """
+    pairs = []
+    active = []  # (end, key) of intervals still open at the sweep position
+    for (start, end), key in sorted(zip(intervals, keys), key=lambda pair: pair[0]):
+        if end <= start:
+            continue
+        active = [(active_end, active_key) for active_end, active_key in active if active_end > start]
+        for active_end, active_key in active:
+            pairs.append((active_key, key, min(end, active_end) - start))
+        active.append((end, key))
+    return pairs
@@ -0,0 +1,173 @@
+"""
+Re-baseline stored case results against the versioned standard times.
+
+plan_rebaseline() is the dry run: it reads the cases in a date range
+through the *_with_standard views, so each row gets the standard that was
+in effect on its own fecha (standards_versions), recomputes std_time,
+efficiency, estado and case_value with one vectorized pass per table and
+returns a plan with the per-group diff. apply_rebaseline() writes a plan in
+a single transaction. Nothing here imports Qt.
+"""
+from collections import namedtuple
+import numpy as np
+from db.database import get_connection
+from engine.calculations import efficiency_batch, stored_status_batch, case_value_batch
+
+REBASELINE_TABLES = ("cases", "ot_cases")
+
+# One (table, region, case type) bucket of the dry-run report
+GroupDiff = namedtuple(
+    "GroupDiff",
+    "table region tipo rows changed old_std new_std to_ok to_low value_delta"
+)
+
+
+class RebaselinePlan:
+    """Result of a dry run: per-group diffs plus the row updates to write"""
+
+    def __init__(self, date_from, date_to):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.groups = []      # GroupDiff, one per (table, region, tipo)
+        self.updates = {}     # table -> list of (std, eff, estado, value, id, old_std)
+        self.skipped = 0      # Rows whose region/type had no standard on their date
+
+    @property
+    def changed_rows(self):
+        return sum(len(rows) for rows in self.updates.values())
+
+    def report_lines(self):
+        """Human-readable diff, one line per group that changes"""
+        lines = []
+        for group in self.groups:
+            if not group.changed:
+                continue
+            # Rows stored without a std_time have no old value to show
+            old_std = "none" if np.isnan(group.old_std) else f"{group.old_std:.2f}"
+            lines.append(
+                f"{group.table}: {group.region} / {group.tipo}: {group.changed} of {group.rows} rows, "
+                f"std {old_std} -> {group.new_std:.2f} min, "
+                f"{group.to_ok} to OK, {group.to_low} to LOW, value {group.value_delta:+.2f}%"
+            )
+        if self.skipped:
+            lines.append(f"{self.skipped} rows skipped: no standard in effect on their date")
+        if not lines:
+            lines.append("No stored results differ from the standards in effect on their dates.")
+        return lines
+
+
+def _load_rows(cursor, table, date_from, date_to):
+    """Rows in the range with standard_at_fecha from the versions table"""
+    cursor.execute(f"""
+        SELECT id, region, tipo_caso, tiempo_real, std_time, efficiency, estado, case_value,
+               standard_at_fecha
+        FROM {table}_with_standard
+        WHERE fecha BETWEEN ? AND ?
+    """, (date_from, date_to))
+    return cursor.fetchall()
+
+
+def _plan_table(plan, table, rows):
+    if not rows:
+        return
+    ids, regions, tipos, tiempo_real, old_std, old_eff, old_estado, old_value, new_std = zip(*rows)
+    regions = np.array(regions, dtype=object)
+    tipos = np.array(tipos, dtype=object)
+    tiempo_real = np.array(tiempo_real, dtype=float)
+    old_std = np.array(old_std, dtype=float)
+    old_eff = np.array(old_eff, dtype=float)
+    old_estado = np.array(old_estado, dtype=object)
+    old_value = np.array(old_value, dtype=float)
+    # NaN where no standard was in effect on the row's date (or it was retired)
+    new_std = np.array(new_std, dtype=float)
+
+    # Group codes for (region, tipo) without a Python pass over the rows
+    region_names, region_idx = np.unique(regions.astype(str), return_inverse=True)
+    tipo_names, tipo_idx = np.unique(tipos.astype(str), return_inverse=True)
+    group_codes, group_idx = np.unique(region_idx * len(tipo_names) + tipo_idx, return_inverse=True)
+
+    # One vectorized recompute for the whole table
+    known = ~np.isnan(new_std)
+    new_eff = efficiency_batch(np.where(known, new_std, 0.0), tiempo_real)
+    new_eff = np.where(np.isnan(new_eff), old_eff, new_eff)
+    new_estado = stored_status_batch(new_eff)
+    new_value = case_value_batch(np.where(known, new_std, 0.0))
+    # A NULL stored std_time never compares close, so those rows are rewritten
+    changed = known & ~np.isclose(new_std, old_std, rtol=0, atol=1e-9)
+    to_ok = changed & (new_estado == "OK") & (old_estado != "OK")
+    to_low = changed & (new_estado == "LOW") & (old_estado == "OK")
+    # A NULL stored value counts as 0, as SUM() treats it in the daily totals
+    value_delta = np.where(changed, new_value - np.nan_to_num(old_value), 0.0)
+
+    plan.skipped += int((~known).sum())
+
+    # Per-group diff with bincount instead of a loop over rows
+    n_groups = len(group_codes)
+    counts = np.bincount(group_idx, minlength=n_groups)
+    changed_counts = np.bincount(group_idx, weights=changed, minlength=n_groups)
+    ok_counts = np.bincount(group_idx, weights=to_ok, minlength=n_groups)
+    low_counts = np.bincount(group_idx, weights=to_low, minlength=n_groups)
+    deltas = np.bincount(group_idx, weights=value_delta, minlength=n_groups)
+    # Standards shown per group: averages over the rows that change (the
+    # new one varies inside a group when the range spans several versions)
+    old_known = changed & ~np.isnan(old_std)
+    old_sums = np.bincount(group_idx, weights=np.where(old_known, old_std, 0.0), minlength=n_groups)
+    old_counts = np.bincount(group_idx, weights=old_known, minlength=n_groups)
+    new_sums = np.bincount(group_idx, weights=np.where(changed, new_std, 0.0), minlength=n_groups)
+    known_counts = np.bincount(group_idx, weights=known, minlength=n_groups)
+    old_group_std = np.divide(old_sums, old_counts, out=np.full(n_groups, np.nan), where=old_counts > 0)
+    new_group_std = np.divide(new_sums, changed_counts, out=np.full(n_groups, np.nan), where=changed_counts > 0)
+    for g, code in enumerate(group_codes):
+        if not known_counts[g]:
+            continue
+        plan.groups.append(GroupDiff(
+            table, region_names[code // len(tipo_names)], tipo_names[code % len(tipo_names)],
+            int(counts[g]), int(changed_counts[g]), float(old_group_std[g]), float(new_group_std[g]),
+            int(ok_counts[g]), int(low_counts[g]), float(deltas[g])
+        ))
+
+    rows_idx = np.flatnonzero(changed)
+    plan.updates[table] = list(zip(
+        new_std[rows_idx].tolist(), new_eff[rows_idx].tolist(),
+        new_estado[rows_idx].tolist(), new_value[rows_idx].tolist(),
+        np.array(ids)[rows_idx].tolist(),
+        # None (not NaN) so the optimistic check matches NULL std_time
+        [None if np.isnan(std) else std for std in old_std[rows_idx].tolist()]
+    ))
+
+
+def plan_rebaseline(date_from, date_to, tables=REBASELINE_TABLES):
+    """Dry run: compute what re-baselining [date_from, date_to] would change"""
+    plan = RebaselinePlan(date_from, date_to)
+    conn = get_connection()
+    cursor = conn.cursor()
+    for table in tables:
+        _plan_table(plan, table, _load_rows(cursor, table, date_from, date_to))
+    conn.close()
+    return plan
+
+
+def apply_rebaseline(plan):
+    """
+    Write a plan in one transaction. Rows whose std_time changed since the
+    dry run (edited in the meantime) are left alone, so the result can be
+    less than plan.changed_rows. Returns rows updated.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    updated = 0
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        for table, rows in plan.updates.items():
+            cursor.executemany(f"""
+                UPDATE {table} SET std_time = ?, efficiency = ?, estado = ?, case_value = ?
+                WHERE id = ? AND std_time IS ?
+            """, rows)
+            updated += cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return updated
@@ -0,0 +1,85 @@
+"""
+Units-equivalency lookup compiled from units_eq.json.
+
+units_eq.json maps region -> {production %: units}. compile_units_eq()
+turns each region into a UnitsTable once, at load: thresholds sorted as
+floats with their units and the two extrapolation slopes precomputed, so a
+lookup is a bisect (scalar) or np.interp (batch) instead of re-sorting and
+re-converting the keys on every call.
+
+Semantics match the original RegisterTab.get_units_for_production: linear
+interpolation between thresholds; above the highest threshold and below
+the lowest, the first/last segment's difference is applied per 5% (the
+thresholds are 5% apart), and the result never goes below zero at the
+bottom end.
+"""
+from bisect import bisect_right
+import numpy as np
+
+EXTRAPOLATION_STEP = 5  # Percentage points the edge segments are scaled by
+
+
+class UnitsTable:
+    """Compiled thresholds for one region"""
+    __slots__ = ("thresholds", "units", "threshold_array", "units_array",
+                 "upper_slope", "lower_slope", "units_at_100")
+
+    def __init__(self, region_data):
+        points = sorted((int(pct), float(units)) for pct, units in region_data.items())
+        self.thresholds = [float(pct) for pct, _ in points]
+        self.units = [units for _, units in points]
+        self.threshold_array = np.array(self.thresholds)
+        self.units_array = np.array(self.units)
+        # Units per percentage point beyond either end
+        if len(points) > 1:
+            self.upper_slope = (self.units[-1] - self.units[-2]) / EXTRAPOLATION_STEP
+            self.lower_slope = (self.units[1] - self.units[0]) / EXTRAPOLATION_STEP
+        else:
+            self.upper_slope = self.lower_slope = 0.0
+        self.units_at_100 = region_data.get("100", 0)
+
+    def units_for(self, production_pct):
+        """Units needed for one production percentage"""
+        thresholds = self.thresholds
+        if production_pct >= thresholds[-1]:
+            return self.units[-1] + (production_pct - thresholds[-1]) * self.upper_slope
+        if production_pct < thresholds[0]:
+            return max(0, self.units[0] - (thresholds[0] - production_pct) * self.lower_slope)
+        i = bisect_right(thresholds, production_pct)
+        lower, upper = thresholds[i - 1], thresholds[i]
+        ratio = (production_pct - lower) / (upper - lower)
+        return self.units[i - 1] + (self.units[i] - self.units[i - 1]) * ratio
+
+    def units_for_batch(self, production_pcts):
+        """Vectorized units_for() over an array of production percentages"""
+        pcts = np.asarray(production_pcts, dtype=float)
+        top = self.thresholds[-1]
+        bottom = self.thresholds[0]
+        inside = np.interp(pcts, self.threshold_array, self.units_array)
+        above = self.units[-1] + (pcts - top) * self.upper_slope
+        below = np.maximum(0, self.units[0] - (bottom - pcts) * self.lower_slope)
+        return np.where(pcts >= top, above, np.where(pcts < bottom, below, inside))
+
+
+def compile_units_eq(units_eq):
+    """Compile the raw units_eq.json dict into {region: UnitsTable}"""
+    return {region: UnitsTable(data) for region, data in units_eq.items() if data}
+
+
+def units_for_production(tables, region, production_pct):
+    """Units needed for production_pct in region (0 for unknown regions)"""
+    table = tables.get(region)
+    return table.units_for(production_pct) if table else 0
+
+
+def units_for_production_batch(tables, region, production_pcts):
+    """Units for an array of production percentages in one region"""
+    table = tables.get(region)
+    if table is None:
+        return np.zeros(np.shape(production_pcts))
+    return table.units_for_batch(production_pcts)
+
+
+def units_at_100(tables):
+    """{region: units at 100%}, as used for the daily equivalent units"""
+    return {region: table.units_at_100 for region, table in tables.items()}
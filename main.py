@@ -1,8 +1,26 @@
 import sys
+from startup import StartupTimer, parse_startup_options
+
+# Created before the Qt imports so --profile-startup can time them
+startup = StartupTimer()
+profiler = None
+if __name__ == "__main__":
+    startup_options, qt_argv = parse_startup_options(sys.argv)
+    if startup_options.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+from PySide6 import __version__ as pyside_version
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QTabWidget
 )
-from db.database import init_db
+from PySide6.QtCore import QTimer, Signal, qVersion
+from db.database import init_db, close_connections
+from db.standards import get_standards_registry, sync_standards_versions
+from datetime import datetime
+from db.data_service import shutdown_data_service
+from db.overlaps import get_overlap_index
 import qtawesome as qta
 
 
@@ -11,44 +29,144 @@ from tabs.tab_production import ProductionTab
 from tabs.tab_history import HistoryTab
 from tabs.tab_overtime import OvertimeTab
 from tabs.tab_standards import StandardsTab
+from tabs.refresh_bus import RefreshBus
+from tabs.lazy_tab import LazyTab
+
+# Idle time after the window is shown before the lazy tabs are prewarmed
+PREWARM_DELAY_MS = 100
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Emitted once every lazy tab is built
+    startup_done = Signal()
+
+    def __init__(self, startup=None, print_startup=False):
         super().__init__()
         self.setWindowTitle("Production Performance Calculator")
         self.setWindowIcon(qta.icon('fa5s.calculator', color='#2d89ef'))
+        self.startup = startup or StartupTimer()
+        # Timing lines go to stdout only when asked for (--profile-startup)
+        self.print_startup = print_startup
 
         self.tabs = QTabWidget()
         
-        self.register_tab = RegisterTab()
-        self.production_tab = ProductionTab()
-        self.history_tab = HistoryTab()
-        self.overtime_tab = OvertimeTab()
-        self.standards_tab = StandardsTab()
+        # Register (shown first) and OT are built now: OT is the largest page
+        # and the fixed window size is taken from it. The other tabs are
+        # built on first activation, or prewarmed once the window is up.
+        with self.startup.phase("register tab"):
+            self.register_tab = RegisterTab()
+        with self.startup.phase("overtime tab"):
+            self.overtime_tab = OvertimeTab()
+        self.production_tab = None
+        self.history_tab = None
+        self.standards_tab = None
+        self.lazy_pages = {
+            "production": LazyTab(ProductionTab),
+            "history": LazyTab(HistoryTab),
+            "standards": LazyTab(StandardsTab),
+        }
+        self.lazy_pages["production"].built.connect(self.on_production_built)
+        self.lazy_pages["history"].built.connect(self.on_history_built)
+        self.lazy_pages["standards"].built.connect(self.on_standards_built)
+        self.prewarm_started = False
+        self.first_painted = False
         
-        # Connect register tab to production tab for dynamic updates
-        self.register_tab.case_saved.connect(self.production_tab.load_data)
-        self.register_tab.case_saved.connect(self.history_tab.load_all_cases)
+        # Views refresh through the bus: invalidations are batched per event
+        # loop tick and hidden tabs only reload when they are shown. Saves and
+        # deletes are published as row changes the list views apply in place.
+        # Lazy tabs register when they are built; until then there is nothing
+        # to refresh, they load current data when built.
+        self.refresh_bus = RefreshBus(self.tabs, self)
+        self.refresh_bus.register("register", self.register_tab, self.register_tab.load_daily_production)
+        self.refresh_bus.register("overtime", self.overtime_tab, self.overtime_tab.load_data,
+                                  self.overtime_tab.apply_change)
         
-        # Connect production tab edit/delete to register tab
-        self.production_tab.case_updated.connect(self.on_production_case_updated)
-        
-        # Connect OT tab to refresh when cases change
-        self.overtime_tab.ot_saved.connect(self.history_tab.load_all_cases)
+        # Saved cases show up in Production and History
+        self.register_tab.case_changed.connect(self.refresh_bus.publish)
+        self.overtime_tab.ot_changed.connect(
+            lambda change: self.refresh_bus.publish(change, source="overtime"))
         
-        # Connect standards tab to refresh Register and OT when standards change
-        self.standards_tab.standards_updated.connect(self.on_standards_updated)
+        # Saved and deleted cases change the overlap checks of their dates
+        for signal in (self.register_tab.case_changed, self.overtime_tab.ot_changed):
+            signal.connect(get_overlap_index().apply_change)
         
         self.tabs.addTab(self.register_tab, qta.icon('fa5s.edit', color='#4aa3ff'), "Register")
         self.tabs.addTab(self.overtime_tab, qta.icon('fa5s.clock', color='#FF9800'), "OT")
-        self.tabs.addTab(self.production_tab, qta.icon('fa5s.chart-bar', color='#4aa3ff'), "Production")
-        self.tabs.addTab(self.history_tab, qta.icon('fa5s.history', color='#4aa3ff'), "History")
-        self.tabs.addTab(self.standards_tab, qta.icon('fa5s.cog', color='#9E9E9E'), "Standards")
+        self.tabs.addTab(self.lazy_pages["production"], qta.icon('fa5s.chart-bar', color='#4aa3ff'), "Production")
+        self.tabs.addTab(self.lazy_pages["history"], qta.icon('fa5s.history', color='#4aa3ff'), "History")
+        self.tabs.addTab(self.lazy_pages["standards"], qta.icon('fa5s.cog', color='#9E9E9E'), "Standards")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         self.setCentralWidget(self.tabs)
         self.adjustSize()
         self.setFixedSize(self.size())
 
+    def on_tab_changed(self, index):
+        page = self.tabs.widget(index)
+        for name, lazy_page in self.lazy_pages.items():
+            if lazy_page is page and not page.is_built():
+                page.ensure_built()
+                self.startup.record(f"{name} tab (on activation)", page.build_ms, page.build_cpu_ms)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.prewarm_started:
+            self.prewarm_started = True
+            self.startup.start("first paint")
+            # Let the first paint and Register's queries go first
+            QTimer.singleShot(PREWARM_DELAY_MS, self.prewarm_next_tab)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.prewarm_started and not self.first_painted:
+            self.first_painted = True
+            # The tabs are painted right after the window, in the same frame
+            QTimer.singleShot(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        self.startup.stop("first paint")
+        if self.print_startup:
+            print(self.startup.report("Window shown"))
+
+    def prewarm_next_tab(self):
+        """Build one lazy tab per idle tick so the window stays responsive"""
+        for name, page in self.lazy_pages.items():
+            if not page.is_built():
+                page.ensure_built()
+                self.startup.record(f"{name} tab (prewarm)", page.build_ms, page.build_cpu_ms)
+                QTimer.singleShot(0, self.prewarm_next_tab)
+                return
+        if self.print_startup:
+            print(self.startup.report("All tabs ready"))
+        self.startup_done.emit()
+
+    def on_production_built(self, tab):
+        self.production_tab = tab
+        self.refresh_bus.register("production", self.lazy_pages["production"], tab.load_data,
+                                  tab.apply_change)
+        tab.case_changed.connect(lambda change: self.refresh_bus.publish(change, source="production"))
+        tab.case_changed.connect(get_overlap_index().apply_change)
+        # Connect production tab edit/delete to register tab
+        tab.case_updated.connect(self.on_production_case_updated)
+
+    def on_history_built(self, tab):
+        self.history_tab = tab
+        self.refresh_bus.register("history", self.lazy_pages["history"], tab.load_all_cases,
+                                  tab.apply_change)
+
+    def on_standards_built(self, tab):
+        self.standards_tab = tab
+        # Connect standards tab to refresh Register and OT when standards change
+        tab.standards_updated.connect(self.on_standards_updated)
+        # Re-baselined cases change stored values everywhere
+        tab.cases_rebaselined.connect(
+            lambda: self.refresh_bus.invalidate("register", "overtime", "production", "history"))
+
+    def closeEvent(self, event):
+        # A running export still holds a connection on its worker thread
+        if self.history_tab is not None:
+            self.history_tab.shutdown()
+        super().closeEvent(event)
+
     def on_standards_updated(self):
         """Reload standards in Register and OT tabs when standards are modified"""
         self.register_tab.load_standards()
@@ -60,22 +178,47 @@ class MainWindow(QMainWindow):
         """Handle case update/delete from production tab"""
         # Check if production_tab has an editing_case_id (edit action)
         if hasattr(self.production_tab, 'editing_case_id') and self.production_tab.editing_case_id:
-            # Load case into register tab for editing
+            # Load case into register tab for editing - nothing changed yet,
+            # the save will invalidate the views
             self.register_tab.load_case_for_edit(self.production_tab.editing_case_id)
             self.production_tab.editing_case_id = None
             # Switch to Register tab
             self.tabs.setCurrentIndex(0)
         else:
-            # Just refresh register tab (delete action)
-            self.register_tab.load_daily_production()
-        
-        # Refresh history tab
-        self.history_tab.load_all_cases()
+            # Delete action - the row change already reached History
+            self.refresh_bus.invalidate("register")
+
+
+def write_startup_profile(startup, options, profiler=None):
+    """Write the --profile-startup report and the --cprofile stats"""
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(options.cprofile)
+        print(f"Startup cProfile written to {options.cprofile}")
+    if options.profile_startup:
+        path = startup.write_json(options.profile_startup, qt=qVersion(), pyside=pyside_version)
+        print(f"Startup profile written to {path}")
+    if options.exit_after_startup:
+        QApplication.quit()
+
 
 if __name__ == "__main__":
-    init_db()
-    app = QApplication(sys.argv)
+    startup.record_since_start("imports")
+    with startup.phase("init_db"):
+        init_db()
+    registry = get_standards_registry()
+    with startup.phase("json files"):
+        standards = registry.standards()
+        registry.units_eq()
+    with startup.phase("standards versions"):
+        sync_standards_versions(standards, datetime.now().strftime("%Y-%m-%d"))
+    with startup.phase("QApplication"):
+        app = QApplication(qt_argv)
+    app.aboutToQuit.connect(shutdown_data_service)
+    app.aboutToQuit.connect(close_connections)
     
+    # Parsing only: applying the rules to widgets counts toward the tabs
+    startup.start("stylesheet")
     app.setStyleSheet("""
     QWidget {
         background-color: #1e1e1e;
@@ -204,19 +347,19 @@ if __name__ == "__main__":
         border-radius: 6px;
     }
 
-    QTableWidget {
+    QTableView {
         background-color: #2b2b2b;
         alternate-background-color: #333333;
         gridline-color: #3c3c3c;
         selection-background-color: #2d89ef;
     }
 
-    QTableWidget::item {
+    QTableView::item {
         padding: 6px;
         border-bottom: 1px solid #3c3c3c;
     }
 
-    QTableWidget::item:alternate {
+    QTableView::item:alternate {
         background-color: #333333;
     }
 
@@ -228,8 +371,12 @@ if __name__ == "__main__":
         font-weight: bold;
     }
     """)
+    startup.stop("stylesheet")
     
-    window = MainWindow()
+    with startup.phase("main window"):
+        window = MainWindow(startup, print_startup=bool(startup_options.profile_startup))
+    if startup_options.profile_startup or profiler is not None or startup_options.exit_after_startup:
+        window.startup_done.connect(lambda: write_startup_profile(startup, startup_options, profiler))
     window.show()
     sys.exit(app.exec())
 
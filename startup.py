@@ -0,0 +1,113 @@
+"""
+Startup timing and profiling.
+
+main.py wraps each startup phase (imports, DB init, standards, stylesheet,
+each tab, first paint) in a StartupTimer, so a slow launch (e.g. a query
+that grows with the history) shows up as one phase getting longer.
+
+Nothing is reported by default. With --profile-startup the report is
+printed when the window is shown and again once every tab is ready, and
+written to a JSON file with wall and CPU time for each phase, for
+comparing builds (PyInstaller builds included); --cprofile additionally
+dumps a cProfile of the whole startup.
+This module (and db.database, for the app folder) only uses the standard
+library so it can be imported, and start timing, before PySide6.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from db.database import get_base_path
+
+DEFAULT_REPORT_NAME = "startup_profile.json"
+
+
+def parse_startup_options(argv):
+    """
+    Split the profiling flags off argv. Returns (options, remaining argv);
+    the rest is left for QApplication.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile-startup", nargs="?", metavar="JSON_PATH",
+                        const=os.path.join(get_base_path(), DEFAULT_REPORT_NAME), default=None)
+    parser.add_argument("--cprofile", metavar="PSTATS_PATH", default=None)
+    parser.add_argument("--exit-after-startup", action="store_true")
+    options, rest = parser.parse_known_args(argv[1:])
+    return options, argv[:1] + rest
+
+
+class StartupTimer:
+    """Wall-clock and CPU duration of named startup phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.phases = []  # (name, wall ms, cpu ms, depth) in the order they finished
+        self._open = {}   # name -> (wall start, cpu start, depth)
+
+    def start(self, name):
+        """Begin a phase; for code that cannot be wrapped in phase()"""
+        self._open[name] = (time.perf_counter(), time.process_time(), len(self._open))
+
+    def stop(self, name):
+        wall, cpu, depth = self._open.pop(name)
+        self.phases.append((
+            name, (time.perf_counter() - wall) * 1000, (time.process_time() - cpu) * 1000, depth
+        ))
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def record(self, name, wall_ms, cpu_ms=None):
+        """Add a phase timed elsewhere"""
+        self.phases.append((name, wall_ms, cpu_ms, len(self._open)))
+
+    def record_since_start(self, name):
+        """A phase covering everything since the timer was created (imports)"""
+        self.phases.append((
+            name, self.elapsed_ms(), (time.process_time() - self.cpu_started) * 1000, len(self._open)
+        ))
+
+    def elapsed_ms(self):
+        """Milliseconds since the timer was created"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self, title):
+        """One line: total time so far and every phase"""
+        phases = ", ".join(f"{name} {wall:.0f} ms" for name, wall, _cpu, _depth in self.phases)
+        return f"{title} after {self.elapsed_ms():.0f} ms ({phases})"
+
+    def as_dict(self):
+        return {
+            "total_wall_ms": round(self.elapsed_ms(), 3),
+            "total_cpu_ms": round((time.process_time() - self.cpu_started) * 1000, 3),
+            "phases": [
+                {
+                    "name": name,
+                    "wall_ms": round(wall, 3),
+                    "cpu_ms": None if cpu is None else round(cpu, 3),
+                    "depth": depth,  # Phases nested in another have depth > 0
+                }
+                for name, wall, cpu, depth in self.phases
+            ],
+            "frozen": bool(getattr(sys, 'frozen', False)),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def write_json(self, path, **extra):
+        """Write the report; extra keys (e.g. library versions) are added as-is"""
+        report = self.as_dict()
+        report.update(extra)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return path
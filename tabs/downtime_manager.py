@@ -3,18 +3,28 @@ from PySide6.QtWidgets import (
     QPushButton, QTableWidget, QTableWidgetItem, QComboBox, QMessageBox
 )
 from PySide6.QtCore import QTime, QDate
-from db.database import get_connection
+from db.data_service import get_data_service
+from db.downtimes import query_downtimes, add_downtime, delete_downtime
+from db.overlaps import get_overlap_index
+from .overlap_prompt import confirm_overlaps
 from datetime import datetime
 
 
 class DowntimeManager(QWidget):
-    def __init__(self, parent=None, on_update_callback=None):
+    def __init__(self, parent=None, on_update_callback=None, fecha=None):
         super().__init__(parent)
         self.on_update_callback = on_update_callback
         self.delete_mode = False
+        # Date downtimes are shown for and recorded on; follows the Register date
+        self.fecha = fecha or datetime.now().strftime("%Y-%m-%d")
         self.init_ui()
         self.load_downtimes()
 
+    def set_date(self, fecha):
+        if fecha != self.fecha:
+            self.fecha = fecha
+            self.load_downtimes()
+
     def init_ui(self):
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -85,29 +95,20 @@ class DowntimeManager(QWidget):
         end = self.downtime_end.time().toString("HH:mm")
         reason = self.downtime_reason.currentText()
 
-        # Calculate duration
-        start_mins = self.downtime_start.time().hour() * 60 + self.downtime_start.time().minute()
-        end_mins = self.downtime_end.time().hour() * 60 + self.downtime_end.time().minute()
-        duration = end_mins - start_mins
-        if duration < 0:
-            duration += 24 * 60
-
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO downtimes (fecha, hora_inicio, hora_fin, razon, duracion)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            datetime.now().strftime("%Y-%m-%d"),
-            start,
-            end,
-            reason,
-            duration
-        ))
+        # An end before the start runs past midnight; equal times are empty
+        if start == end:
+            QMessageBox.warning(self, "Invalid Downtime", "End time must be different from start time.")
+            return
 
-        conn.commit()
-        conn.close()
+        # Case minutes inside a downtime would count twice; overlapping
+        # downtimes are fine, they are merged into one row
+        overlaps = [
+            row for row in get_overlap_index().find(self.fecha, start, end)
+            if row.table != "downtimes"
+        ]
+        if not confirm_overlaps(self, "downtime", overlaps):
+            return
+        add_downtime(self.fecha, start, end, reason)
 
         self.load_downtimes()
         self.downtime_start.setTime(QTime.currentTime())
@@ -118,20 +119,12 @@ class DowntimeManager(QWidget):
             self.on_update_callback()
 
     def load_downtimes(self):
-        conn = get_connection()
-        cursor = conn.cursor()
-        today = datetime.now().strftime("%Y-%m-%d")
-
-        cursor.execute("""
-            SELECT id, hora_inicio, hora_fin, duracion, razon
-            FROM downtimes
-            WHERE fecha = ?
-            ORDER BY hora_inicio DESC
-        """, (today,))
-
-        rows = cursor.fetchall()
-        conn.close()
+        get_data_service().submit(
+            "downtimes", query_downtimes, self.fecha,
+            on_result=self.populate_table
+        )
 
+    def populate_table(self, rows):
         self.table.setRowCount(len(rows))
         self.row_ids = []
 
@@ -270,12 +263,7 @@ class DowntimeManager(QWidget):
         if reply != QMessageBox.StandardButton.Yes:
             return
         
-        row_id = self.row_ids[row]
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM downtimes WHERE id = ?", (row_id,))
-        conn.commit()
-        conn.close()
+        delete_downtime(self.row_ids[row])
 
         self.load_downtimes()
         
@@ -0,0 +1,132 @@
+import threading
+import traceback
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushButton, QMessageBox
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from db.export import ExportCancelled
+
+
+class _ExportSignals(QObject):
+    """Signals emitted from the export thread, delivered on the GUI thread"""
+    progress = Signal(int, int, float)  # rows written, total rows, seconds
+    finished = Signal(int, float)       # rows written, seconds
+    failed = Signal(str)                # formatted traceback
+    cancelled = Signal()
+
+
+class ExportTask(QRunnable):
+    """
+    Runs an export function from db.export on a pool thread.
+    fn(*args, progress=..., is_cancelled=...) must return (rows, seconds).
+    """
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = _ExportSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        # The pool thread gets its own pooled connection from get_connection()
+        try:
+            rows, seconds = self.fn(
+                *self.args, progress=self.signals.progress.emit, is_cancelled=self._cancel.is_set
+            )
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc())
+        else:
+            self.signals.finished.emit(rows, seconds)
+
+
+class ExportProgress(QWidget):
+    """
+    Progress bar, throughput readout and Cancel button for one background
+    export at a time. Hidden until an export starts; the last result stays
+    in the label afterwards.
+    """
+    export_done = Signal(bool)  # True when the file was written
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task = None
+        self.path = None
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1)
+        layout.addWidget(self.progress_bar, 1)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #999;")
+        layout.addWidget(self.status_label)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_btn)
+        self.setLayout(layout)
+        self.hide()
+
+    def is_running(self):
+        return self.task is not None
+
+    def start(self, path, fn, *args):
+        """Run fn(path, *args, progress=..., is_cancelled=...) in the background"""
+        self.path = path
+        self.task = ExportTask(fn, path, *args)
+        self.task.signals.progress.connect(self.on_progress)
+        self.task.signals.finished.connect(self.on_finished)
+        self.task.signals.failed.connect(self.on_failed)
+        self.task.signals.cancelled.connect(self.on_cancelled)
+
+        self.progress_bar.setRange(0, 0)  # Busy until the row count is known
+        self.progress_bar.show()
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        self.status_label.setText("Counting rows...")
+        self.show()
+        QThreadPool.globalInstance().start(self.task)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Cancelling...")
+
+    def wait(self, msecs=-1):
+        """Cancel a running export and wait for its thread (shutdown)"""
+        if self.task is not None:
+            self.task.cancel()
+        return QThreadPool.globalInstance().waitForDone(msecs)
+
+    def on_progress(self, rows, total, seconds):
+        if self.task is None or self.task.is_cancelled():
+            return
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(rows)
+        rate = rows / seconds if seconds > 0 else 0
+        self.status_label.setText(f"{rows:,} / {total:,} rows · {rate:,.0f} rows/s")
+
+    def finish(self, message, written):
+        self.task = None
+        self.progress_bar.hide()
+        self.cancel_btn.hide()
+        self.status_label.setText(message)
+        self.export_done.emit(written)
+
+    def on_finished(self, rows, seconds):
+        rate = rows / seconds if seconds > 0 else rows
+        self.finish(f"✅ Exported {rows:,} rows in {seconds:.1f}s ({rate:,.0f} rows/s)", True)
+
+    def on_cancelled(self):
+        self.finish("Export cancelled", False)
+
+    def on_failed(self, error):
+        self.finish("❌ Export failed", False)
+        QMessageBox.critical(self, "Export Error", f"Could not export {self.path}:\n\n{error.strip().splitlines()[-1]}")
@@ -0,0 +1,84 @@
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class FilterController(QObject):
+    """
+    Debounces filter requests so a burst of input runs one filter pass.
+
+    Text fields call request() on every keystroke; each call restarts the
+    debounce timer and supersedes any pass still pending, so typing a
+    six-character case ID rebuilds the table once. Combos and date pickers
+    call request_now(), which cancels the pending pass and runs immediately.
+
+    With asynchronous=True run_filter only submits the work to the data
+    service (which drops results superseded by a newer submit for the same
+    view); the pass then calls mark_finished() once its result is applied,
+    so filter_finished fires once per pass with the latency of the whole
+    pass rather than of the submit.
+    """
+    filter_finished = Signal(float)  # Latency of the pass in milliseconds
+
+    def __init__(self, run_filter, delay_ms=250, asynchronous=False, parent=None):
+        super().__init__(parent)
+        self._run_filter = run_filter
+        self.delay_ms = delay_ms
+        self.asynchronous = asynchronous
+        self.requests = 0            # Calls to request()/request_now()
+        self.passes = 0              # Filter passes actually run
+        self.last_latency_ms = None  # Duration of the last filter pass
+        self.last_wait_ms = None     # First request of the burst -> pass done
+        self._burst_started = None
+        self._pass_started = None
+        self._pass_burst_started = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run)
+
+    def request(self):
+        """Schedule a filter pass after delay_ms of quiet"""
+        self._note_request()
+        self._timer.start(self.delay_ms)
+
+    def request_now(self):
+        """Cancel any pending pass and filter right away"""
+        self._note_request()
+        self._timer.stop()
+        self._run()
+
+    def cancel(self):
+        """Drop a pending pass without running it"""
+        self._timer.stop()
+        self._burst_started = None
+
+    def _note_request(self):
+        self.requests += 1
+        if self._burst_started is None:
+            self._burst_started = time.perf_counter()
+
+    def _run(self):
+        self._pass_started = time.perf_counter()
+        self._pass_burst_started = self._burst_started
+        self._burst_started = None
+        self.passes += 1
+        self._run_filter()
+        if not self.asynchronous:
+            self.mark_finished()
+
+    def mark_finished(self):
+        """Record the latency of the pass; asynchronous passes call this when applied"""
+        if self._pass_started is not None:
+            self._record(self._pass_started, self._pass_burst_started)
+            self._pass_started = None
+
+    def mark_failed(self):
+        """End an asynchronous pass whose query failed, without recording it"""
+        self._pass_started = None
+
+    def _record(self, pass_started, burst_started):
+        end = time.perf_counter()
+        self.last_latency_ms = (end - pass_started) * 1000
+        if burst_started is not None:
+            self.last_wait_ms = (end - burst_started) * 1000
+        self.filter_finished.emit(self.last_latency_ms)
@@ -0,0 +1,164 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor, QBrush
+
+
+# Column layout of a history row: (header, formatter)
+HISTORY_COLUMNS = [
+    ("ID", lambda case: str(case[0])),
+    ("Case", lambda case: str(case[1])),
+    ("Region", lambda case: str(case[2])),
+    ("Case Type", lambda case: str(case[3])),
+    ("Date", lambda case: str(case[4])),
+    ("Time (min)", lambda case: f"{case[5]:.1f}"),
+    ("Std (min)", lambda case: f"{case[6]:.1f}"),
+    ("Efficiency %", lambda case: f"{case[7]:.1f}%"),
+    ("Status", lambda case: str(case[8])),
+    ("Case Value %", lambda case: f"{case[9]:.3f}%"),
+]
+
+EFFICIENCY_COLUMN = 7  # Colored green/red by OK/LOW
+
+
+def order_key(case):
+    return (case[4], case[10], case[0])
+
+
+def sorted_position(cases, case):
+    """Index where case goes in a list kept in CASE_ORDER (descending)"""
+    key = order_key(case)
+    low, high = 0, len(cases)
+    while low < high:
+        mid = (low + high) // 2
+        if order_key(cases[mid]) > key:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    Read-only, paged model for the History table.
+
+    Rows are history tuples (id, case_id, region, tipo_caso, fecha,
+    tiempo_real, std_time, efficiency, estado, case_value, hora_inicio) in
+    CASE_ORDER. Pages come from a fetch_page(after) callable returning
+    (rows, next_key) and are pulled in as the view scrolls, so opening the
+    tab costs one page whatever the size of the table. Cells are formatted
+    on demand in data(); saves and deletes are applied with
+    insert_case/remove_case.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        # {db id: case tuple} of the loaded rows, to find a case by bisection
+        self._cases = {}
+        self._fetch_page = None
+        self._next_key = None
+
+        self._ok_bg = QBrush(QColor(76, 175, 80))    # Green
+        self._low_bg = QBrush(QColor(244, 67, 54))   # Red
+        self._white_fg = QBrush(QColor(255, 255, 255))
+
+    def set_source(self, fetch_page, first_page=None):
+        """
+        Reset the model to a new filter. first_page is the (rows, next_key)
+        result of fetch_page(None) when it was already loaded elsewhere;
+        otherwise it is fetched here.
+        """
+        if first_page is None:
+            first_page = fetch_page(None)
+        self.beginResetModel()
+        self._fetch_page = fetch_page
+        rows, self._next_key = first_page
+        self._rows = list(rows)
+        self._cases = {case[0]: case for case in self._rows}
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._next_key is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        rows, self._next_key = self._fetch_page(self._next_key)
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self._cases.update((case[0], case) for case in rows)
+        self.endInsertRows()
+
+    # --- Single-row deltas -------------------------------------------------
+
+    def find_case(self, db_id):
+        """Row of the loaded case with this database id, or None"""
+        case = self._cases.get(db_id)
+        if case is None:
+            return None
+        row = sorted_position(self._rows, case)
+        return row if row < len(self._rows) and self._rows[row] is case else None
+
+    def remove_case(self, db_id):
+        row = self.find_case(db_id)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._cases[self._rows[row][0]]
+        del self._rows[row]
+        self.endRemoveRows()
+        return True
+
+    def insert_case(self, case):
+        """
+        Insert a case at its CASE_ORDER position. Cases that sort past the
+        loaded window are left for fetchMore to bring in. Returns True when
+        the case was placed in the loaded rows.
+        """
+        row = sorted_position(self._rows, case)
+        if row == len(self._rows) and self._next_key is not None:
+            return False
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, case)
+        self._cases[case[0]] = case
+        self.endInsertRows()
+        return True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HISTORY_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HISTORY_COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        case = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return HISTORY_COLUMNS[column][1](case)
+        if column == EFFICIENCY_COLUMN:
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return self._ok_bg if case[8] == "OK" else self._low_bg
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return self._white_fg
+        if role == Qt.ItemDataRole.UserRole:
+            return case[0]
+        return None
+
+    def case_at(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def sample_text(self, column, limit):
+        """Display text of the first limit loaded rows of a column"""
+        formatter = HISTORY_COLUMNS[column][1]
+        return [formatter(case) for case in self._rows[:limit]]
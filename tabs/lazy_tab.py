@@ -0,0 +1,39 @@
+import time
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtCore import Signal
+
+
+class LazyTab(QWidget):
+    """
+    Tab page that builds its real tab on first use.
+
+    The page goes into the QTabWidget right away; factory() runs (with the
+    tab's startup queries) only when ensure_built() is called, on first
+    activation or when MainWindow prewarms it in idle time. built is
+    emitted once with the new tab so it can be wired up.
+    """
+    built = Signal(object)
+
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self._factory = factory
+        self.tab = None
+        self.build_ms = None
+        self.build_cpu_ms = None
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+    def is_built(self):
+        return self.tab is not None
+
+    def ensure_built(self):
+        """Build the tab if needed and return it"""
+        if self.tab is None:
+            started, cpu_started = time.perf_counter(), time.process_time()
+            self.tab = self._factory()
+            self.layout().addWidget(self.tab)
+            self.build_ms = (time.perf_counter() - started) * 1000
+            self.build_cpu_ms = (time.process_time() - cpu_started) * 1000
+            self.built.emit(self.tab)
+        return self.tab
@@ -0,0 +1,26 @@
+from PySide6.QtWidgets import QMessageBox
+from db.overlaps import describe
+
+# Overlapping rows listed in the prompt; the rest are summarized
+MAX_LISTED = 5
+
+
+def confirm_overlaps(parent, what, overlaps):
+    """
+    Ask before saving something whose time overlaps other rows of the day
+    (those minutes would count twice). Returns True to save anyway.
+    """
+    if not overlaps:
+        return True
+    lines = [describe(row) for row in overlaps[:MAX_LISTED]]
+    if len(overlaps) > MAX_LISTED:
+        lines.append(f"... and {len(overlaps) - MAX_LISTED} more")
+    reply = QMessageBox.question(
+        parent,
+        "Overlapping Time",
+        f"This {what} overlaps:\n\n" + "\n".join(lines) +
+        "\n\nOverlapping minutes count twice toward production. Save anyway?",
+        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        QMessageBox.StandardButton.No
+    )
+    return reply == QMessageBox.StandardButton.Yes
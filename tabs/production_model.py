@@ -0,0 +1,293 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor, QFont, QBrush
+
+
+# Column layout of a case row: (header, formatter)
+PRODUCTION_COLUMNS = [
+    ("Case ID", lambda case: str(case[1])),
+    ("Doctor", lambda case: str(case[2] or "-")),
+    ("Region", lambda case: str(case[3])),
+    ("Type", lambda case: str(case[4])),
+    ("Start", lambda case: str(case[6])),
+    ("End", lambda case: str(case[7])),
+    ("Time", lambda case: f"{case[8]:.0f}"),
+    ("Eff %", lambda case: f"{case[9]:.0f}%"),
+    ("Value %", lambda case: f"{case[11]:.1f}%"),
+]
+
+STATUS_COLUMNS = (7, 8)  # Efficiency and value cells are colored by OK/LOW
+BOLD_COLUMNS = (0, 1)    # Case ID and doctor
+
+
+def entry_key(entry):
+    """CASE_ORDER key of a row; a date header sorts just above its cases"""
+    if isinstance(entry, str):
+        return (entry, 1)
+    return (entry[5], 0, entry[6], entry[0])
+
+
+def sorted_position(entries, key):
+    """Index of the first row whose key is below key (rows are descending)"""
+    low, high = 0, len(entries)
+    while low < high:
+        mid = (low + high) // 2
+        if entry_key(entries[mid]) > key:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+class ProductionTableModel(QAbstractTableModel):
+    """
+    Read-only, paged model for the Production table.
+
+    Case rows are the tuples loaded by ProductionTab (id, case_id, doctor,
+    region, tipo_caso, fecha, hora_inicio, hora_fin, tiempo_real, efficiency,
+    estado, case_value), in CASE_ORDER. Pages come from a fetch_page(after)
+    callable returning (rows, next_key) and are pulled in as the view
+    scrolls (canFetchMore/fetchMore). Each date gets a virtual header row in
+    front of its cases; nothing is stored per cell, data() formats on demand
+    and hands out shared brushes and fonts. Saves and deletes are applied
+    with insert_case/remove_case/adjust_daily instead of a reload.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # One entry per visible row: a case tuple, or the fecha string of a
+        # date header
+        self._rows = []
+        # Zebra parity of each row within its date group (0 for headers)
+        self._parity = []
+        # {db id: case tuple} of the loaded cases, to find one by bisection
+        self._cases = {}
+        # {fecha: [case_count, total_value]} over the whole filter, so
+        # headers are right even when a group is only partly loaded
+        self._daily = {}
+        self._fetch_page = None
+        self._next_key = None
+
+        self._header_bg = QBrush(QColor(75, 75, 85))
+        self._header_fg = QBrush(QColor(220, 220, 220))
+        self._zebra = (QBrush(QColor(43, 43, 43)), QBrush(QColor(55, 55, 55)))
+        self._ok_bg = QBrush(QColor(76, 175, 80))
+        self._low_bg = QBrush(QColor(244, 67, 54))
+        self._white_fg = QBrush(QColor(255, 255, 255))
+        self._bold_font = QFont()
+        self._bold_font.setBold(True)
+        self._center = int(Qt.AlignmentFlag.AlignCenter)
+
+    def set_source(self, fetch_page, daily_totals, first_page=None):
+        """
+        Reset the model to a new filter. first_page is the (rows, next_key)
+        result of fetch_page(None) when it was already loaded elsewhere
+        (e.g. on a worker thread); otherwise it is fetched here.
+        """
+        if first_page is None:
+            first_page = fetch_page(None)
+        self.beginResetModel()
+        self._rows = []
+        self._parity = []
+        self._cases = {case[0]: case for case in first_page[0]}
+        self._daily = daily_totals
+        self._fetch_page = fetch_page
+        rows, self._next_key = first_page
+        entries, parity = self._layout(rows)
+        self._rows.extend(entries)
+        self._parity.extend(parity)
+        self.endResetModel()
+
+    def _layout(self, cases):
+        """Return the row entries (with new headers) and parities for appended cases"""
+        entries = []
+        parities = []
+        last = self._rows[-1] if self._rows else None
+        last_parity = self._parity[-1] if self._parity else 0
+        for case in cases:
+            fecha = case[5]
+            if isinstance(last, tuple) and last[5] == fecha:
+                parity = 1 - last_parity
+            else:
+                entries.append(fecha)
+                parities.append(0)
+                parity = 0
+            entries.append(case)
+            parities.append(parity)
+            last, last_parity = case, parity
+        return entries, parities
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._next_key is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        rows, self._next_key = self._fetch_page(self._next_key)
+        if not rows:
+            return
+        entries, parity = self._layout(rows)
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self._rows.extend(entries)
+        self._parity.extend(parity)
+        self._cases.update((case[0], case) for case in rows)
+        self.endInsertRows()
+
+    # --- Single-row deltas -------------------------------------------------
+
+    def find_case(self, db_id):
+        """Row of the loaded case with this database id, or None"""
+        case = self._cases.get(db_id)
+        if case is None:
+            return None
+        row = sorted_position(self._rows, entry_key(case))
+        return row if row < len(self._rows) and self._rows[row] is case else None
+
+    def _group_bounds(self, row):
+        """(header_row, last_row) of the date group containing row"""
+        header = row
+        while not isinstance(self._rows[header], str):
+            header -= 1
+        last = row
+        while last + 1 < len(self._rows) and not isinstance(self._rows[last + 1], str):
+            last += 1
+        return header, last
+
+    def _restripe(self, header, last):
+        """Recompute zebra parity for one group and repaint its rows"""
+        for row in range(header + 1, last + 1):
+            self._parity[row] = (row - header - 1) % 2
+        if last > header:
+            self.dataChanged.emit(self.index(header + 1, 0),
+                                  self.index(last, self.columnCount() - 1),
+                                  [Qt.ItemDataRole.BackgroundRole])
+
+    def _header_changed(self, fecha):
+        row = sorted_position(self._rows, entry_key(fecha))
+        if row < len(self._rows) and self._rows[row] == fecha:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 0),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+    def adjust_daily(self, fecha, delta_cases, delta_value):
+        """Shift a date header's totals by one case's contribution"""
+        totals = self._daily.setdefault(fecha, [0, 0.0])
+        totals[0] += delta_cases
+        totals[1] += delta_value
+        if totals[0] <= 0:
+            del self._daily[fecha]
+        self._header_changed(fecha)
+
+    def remove_case(self, db_id):
+        """Remove a loaded case (and its header if the group empties)"""
+        row = self.find_case(db_id)
+        if row is None:
+            return False
+        header, last = self._group_bounds(row)
+        if header + 1 == last:
+            first = header
+        else:
+            first = row
+        self.beginRemoveRows(QModelIndex(), first, row)
+        del self._cases[db_id]
+        del self._rows[first:row + 1]
+        del self._parity[first:row + 1]
+        self.endRemoveRows()
+        if first != header:
+            self._restripe(header, last - 1)
+        return True
+
+    def insert_case(self, case):
+        """
+        Insert a case at its CASE_ORDER position. Cases that sort past the
+        loaded window are left for fetchMore to bring in. Returns True when
+        the case was placed in the loaded rows.
+        """
+        # Lands in front of the next group's header when the date is new
+        pos = sorted_position(self._rows, entry_key(case))
+        if pos == len(self._rows) and self._next_key is not None:
+            return False
+
+        previous = self._rows[pos - 1] if pos else None
+        has_group = previous == case[5] or (isinstance(previous, tuple) and previous[5] == case[5])
+        if has_group:
+            self.beginInsertRows(QModelIndex(), pos, pos)
+            self._rows.insert(pos, case)
+            self._parity.insert(pos, 0)
+            self.endInsertRows()
+        else:
+            self.beginInsertRows(QModelIndex(), pos, pos + 1)
+            self._rows[pos:pos] = [case[5], case]
+            self._parity[pos:pos] = [0, 0]
+            self.endInsertRows()
+            pos += 1
+        self._cases[case[0]] = case
+        self._restripe(*self._group_bounds(pos))
+        return True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(PRODUCTION_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return PRODUCTION_COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._rows[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._center
+
+        if isinstance(entry, str):
+            # Date header row with daily total - spaced out text, no icon
+            if role == Qt.ItemDataRole.DisplayRole:
+                if column != 0:
+                    return ""
+                daily_cases, daily_value = self._daily.get(entry, (0, 0.0))
+                return f"    {entry}          {daily_cases} cases          Value: {daily_value:.2f}%    "
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return self._header_bg
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return self._header_fg
+            if role == Qt.ItemDataRole.FontRole:
+                return self._bold_font
+            return None
+
+        case = entry
+        if role == Qt.ItemDataRole.DisplayRole:
+            return PRODUCTION_COLUMNS[column][1](case)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if column in STATUS_COLUMNS:
+                return self._ok_bg if case[10] == "OK" else self._low_bg
+            return self._zebra[self._parity[index.row()]]
+        if role == Qt.ItemDataRole.ForegroundRole and column in STATUS_COLUMNS:
+            return self._white_fg
+        if role == Qt.ItemDataRole.FontRole and column in BOLD_COLUMNS:
+            return self._bold_font
+        if role == Qt.ItemDataRole.UserRole:
+            return case[0]
+        return None
+
+    def header_rows(self, first=0, last=None):
+        """Row numbers of the virtual date headers (for spans and row heights)"""
+        last = len(self._rows) - 1 if last is None else last
+        return [row for row in range(first, last + 1) if isinstance(self._rows[row], str)]
+
+    def is_header(self, row):
+        return 0 <= row < len(self._rows) and isinstance(self._rows[row], str)
+
+    def case_at(self, row):
+        """Case tuple shown at a table row, or None for headers/invalid rows"""
+        if 0 <= row < len(self._rows) and not isinstance(self._rows[row], str):
+            return self._rows[row]
+        return None
+
+    def db_id(self, row):
+        case = self.case_at(row)
+        return case[0] if case else None
@@ -0,0 +1,80 @@
+from PySide6.QtCore import QObject, QTimer
+
+
+class RefreshBus(QObject):
+    """
+    Central invalidation bus for the tab views.
+
+    Tabs register a refresh callable under a view name. Anything that changes
+    data calls invalidate() with the views it affects; the names are marked
+    dirty and flushed once at the end of the current event-loop tick, so
+    several invalidations from one save cause at most one refresh per view.
+    Only the view on the visible tab is refreshed right away; hidden views
+    stay dirty and refresh when their tab is shown.
+
+    Views that can apply a single-row change also register apply_change.
+    publish() hands a RowChange to each of them; a view that cannot place
+    the change (it returns False) falls back to being invalidated.
+    """
+
+    def __init__(self, tab_widget, parent=None):
+        super().__init__(parent)
+        self._tabs = tab_widget
+        self._views = {}      # name -> (widget, refresh)
+        self._appliers = {}   # name -> apply_change(change) -> bool
+        self._dirty = set()
+        self._flush_scheduled = False
+        self.refresh_counts = {}  # name -> refreshes run, for diagnostics
+        self.delta_counts = {}    # name -> changes applied in place
+        tab_widget.currentChanged.connect(self._on_tab_changed)
+
+    def register(self, name, widget, refresh, apply_change=None):
+        """Register a view; widget is the tab page that shows it"""
+        self._views[name] = (widget, refresh)
+        if apply_change is not None:
+            self._appliers[name] = apply_change
+        self.refresh_counts.setdefault(name, 0)
+        self.delta_counts.setdefault(name, 0)
+
+    def publish(self, change, source=None):
+        """
+        Apply a RowChange to every view that accepts deltas. source names the
+        view that made the change and already updated itself. Dirty views are
+        skipped: their pending refresh will pick the change up anyway.
+        """
+        for name, apply_change in self._appliers.items():
+            if name == source or name in self._dirty:
+                continue
+            if apply_change(change):
+                self.delta_counts[name] += 1
+            else:
+                self.invalidate(name)
+
+    def invalidate(self, *names):
+        """Mark views dirty; they are refreshed once the event loop is idle"""
+        self._dirty.update(name for name in names if name in self._views)
+        if self._dirty and not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def is_dirty(self, name):
+        return name in self._dirty
+
+    def flush(self):
+        """Refresh the dirty views that are currently visible"""
+        self._flush_scheduled = False
+        current = self._tabs.currentWidget()
+        for name in sorted(self._dirty):
+            if self._views[name][0] is current:
+                self._refresh(name)
+
+    def _on_tab_changed(self, index):
+        widget = self._tabs.widget(index)
+        for name in sorted(self._dirty):
+            if self._views[name][0] is widget:
+                self._refresh(name)
+
+    def _refresh(self, name):
+        self._dirty.discard(name)
+        self.refresh_counts[name] += 1
+        self._views[name][1]()
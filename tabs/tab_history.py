@@ -1,20 +1,55 @@
 from PySide6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
-    QDateEdit, QComboBox, QFileDialog
+    QPushButton, QLineEdit, QTableView,
+    QDateEdit, QComboBox, QFileDialog, QMessageBox
 )
-from PySide6.QtCore import QDate
-from PySide6.QtGui import QColor
-from db.database import get_connection
-import csv
+from PySide6.QtCore import QDate, Qt
+from db.data_service import get_data_service
+from db.export import HISTORY_EXPORT_COLUMNS, export_formats
+from db.queries import build_case_filter, case_matches_filter, fetch_case_page
+from .export_progress import ExportProgress
+from .filter_controller import FilterController
+from .history_model import HistoryTableModel
+
+# hora_inicio is not shown; it is kept last so row changes can be placed
+# in CASE_ORDER without a reload
+HISTORY_QUERY_COLUMNS = (
+    "id, case_id, region, tipo_caso, fecha, tiempo_real, std_time, "
+    "efficiency, estado, case_value, hora_inicio"
+)
+
+# Rows measured to size the columns; measuring every cell is what made
+# resizeColumnsToContents() slow on a long history
+WIDTH_SAMPLE_ROWS = 100
+CELL_PADDING = 24
+
+
+def fetch_history_page(where, params, after):
+    return fetch_case_page(HISTORY_QUERY_COLUMNS, where, params, after)
+
+
+def history_row(row):
+    """History tuple for a cases {column: value} dict"""
+    return (
+        row["id"], row["case_id"], row["region"], row["tipo_caso"], row["fecha"],
+        row["tiempo_real"], row["std_time"], row["efficiency"], row["estado"],
+        row["case_value"], row["hora_inicio"]
+    )
+
 
 class HistoryTab(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
+        self.columns_sized = False
+        self.shown_filter = None  # Filter values of the rows in the model
+        get_data_service().query_failed.connect(self.on_query_failed)
         self.load_all_cases()
 
     def init_ui(self):
+        # Case search is debounced; status and date filter immediately
+        self.filter_controller = FilterController(self.filter_cases, asynchronous=True, parent=self)
+
         main_layout = QVBoxLayout()
 
         # Title
@@ -28,102 +63,138 @@ class HistoryTab(QWidget):
         filter_layout.addWidget(QLabel("Search Case:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Case ID...")
-        self.search_input.textChanged.connect(self.filter_cases)
+        self.search_input.textChanged.connect(self.filter_controller.request)
         filter_layout.addWidget(self.search_input)
 
         filter_layout.addWidget(QLabel("Status:"))
         self.status_filter = QComboBox()
         self.status_filter.addItems(["All", "OK", "LOW"])
-        self.status_filter.currentTextChanged.connect(self.filter_cases)
+        self.status_filter.currentTextChanged.connect(self.filter_controller.request_now)
         filter_layout.addWidget(self.status_filter)
 
         filter_layout.addWidget(QLabel("From:"))
         self.date_from = QDateEdit()
         self.date_from.setDate(QDate.currentDate().addMonths(-1))
-        self.date_from.dateChanged.connect(self.filter_cases)
+        self.date_from.dateChanged.connect(self.filter_controller.request_now)
         filter_layout.addWidget(self.date_from)
 
-        export_btn = QPushButton("Export CSV")
-        export_btn.clicked.connect(self.export_csv)
-        filter_layout.addWidget(export_btn)
+        self.export_btn = QPushButton("Export")
+        self.export_btn.clicked.connect(self.export_csv)
+        filter_layout.addWidget(self.export_btn)
 
         main_layout.addLayout(filter_layout)
 
-        # Table
-        self.table = QTableWidget()
+        # Background export: progress, throughput and cancel
+        self.export_progress = ExportProgress()
+        self.export_progress.export_done.connect(lambda _written: self.export_btn.setEnabled(True))
+        main_layout.addWidget(self.export_progress)
+
+        # Table: pages are fetched as the view scrolls
+        self.model = HistoryTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setAlternatingRowColors(True)
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Case", "Region", "Case Type",
-            "Date", "Time (min)", "Std (min)", "Efficiency %", "Status", "Case Value %"
-        ])
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         main_layout.addWidget(self.table)
 
         self.setLayout(main_layout)
-        self.all_cases = []
 
     def load_all_cases(self):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, case_id, region, tipo_caso,
-                   fecha, tiempo_real, std_time, efficiency, estado, case_value
-            FROM cases
-            ORDER BY fecha DESC, hora_inicio DESC
-        """)
-        self.all_cases = cursor.fetchall()
-        conn.close()
-        self.filter_cases()
+        """Reload the first page for the current filters (refresh entry point)"""
+        self.filter_controller.request_now()
+
+    def current_filter_values(self):
+        """Filter widget values, as keyword arguments for build_case_filter"""
+        return dict(
+            date_from=self.date_from.date().toString("yyyy-MM-dd"),
+            case_search=self.search_input.text(),
+            estado=self.status_filter.currentText()
+        )
 
     def filter_cases(self):
-        search_text = self.search_input.text().lower()
-        status_filter = self.status_filter.currentText()
-        date_from = self.date_from.date().toString("yyyy-MM-dd")
-
-        filtered = [
-            case for case in self.all_cases
-            if (search_text in str(case[1]).lower() or not search_text)
-            and (status_filter == "All" or status_filter == case[8])
-            and case[4] >= date_from
-        ]
-
-        self.table.setRowCount(len(filtered))
-
-        for idx, case in enumerate(filtered):
-            self.table.setItem(idx, 0, QTableWidgetItem(str(case[0])))
-            self.table.setItem(idx, 1, QTableWidgetItem(str(case[1])))
-            self.table.setItem(idx, 2, QTableWidgetItem(str(case[2])))
-            self.table.setItem(idx, 3, QTableWidgetItem(str(case[3])))
-            self.table.setItem(idx, 4, QTableWidgetItem(str(case[4])))
-            self.table.setItem(idx, 5, QTableWidgetItem(f"{case[5]:.1f}"))
-            self.table.setItem(idx, 6, QTableWidgetItem(f"{case[6]:.1f}"))
-            
-            efficiency_item = QTableWidgetItem(f"{case[7]:.1f}%")
-            if case[8] == "OK":
-                efficiency_item.setBackground(QColor(76, 175, 80))  # Green
-                efficiency_item.setForeground(QColor(255, 255, 255))
-            else:
-                efficiency_item.setBackground(QColor(244, 67, 54))  # Red
-                efficiency_item.setForeground(QColor(255, 255, 255))
-            self.table.setItem(idx, 7, efficiency_item)
-            
-            self.table.setItem(idx, 8, QTableWidgetItem(case[8]))
-            self.table.setItem(idx, 9, QTableWidgetItem(f"{case[9]:.3f}%"))
-
-        self.table.resizeColumnsToContents()
+        values = self.current_filter_values()
+        where, params = build_case_filter(**values)
+        # Only the first page is queried; a newer filter pass supersedes this one
+        get_data_service().submit(
+            "history", fetch_history_page, where, params, None,
+            on_result=lambda first_page: self.on_cases_loaded(where, params, values, first_page)
+        )
+
+    def on_cases_loaded(self, where, params, values, first_page):
+        self.shown_filter = values
+        self.model.set_source(lambda after: fetch_history_page(where, params, after), first_page)
+        if not self.columns_sized and self.model.rowCount():
+            self.size_columns()
+        self.filter_controller.mark_finished()
+
+    def on_query_failed(self, view, error):
+        """Leave the pending filter pass when its query failed"""
+        if view != "history":
+            return
+        self.filter_controller.mark_failed()
+        QMessageBox.warning(self, "Error", f"Failed to load cases:\n{error.strip().splitlines()[-1]}")
+
+    def size_columns(self):
+        """Fit column widths to the header and a sample of the loaded rows"""
+        metrics = self.table.fontMetrics()
+        header_metrics = self.table.horizontalHeader().fontMetrics()
+        for column in range(self.model.columnCount()):
+            header = self.model.headerData(column, Qt.Orientation.Horizontal)
+            width = max(
+                [header_metrics.horizontalAdvance(header)] +
+                [metrics.horizontalAdvance(text) for text in self.model.sample_text(column, WIDTH_SAMPLE_ROWS)]
+            )
+            self.table.setColumnWidth(column, width + CELL_PADDING)
+        self.columns_sized = True
+
+    def case_matches(self, case_row):
+        """Whether a cases {column: value} dict passes the filter shown"""
+        return case_matches_filter(case_row, **self.shown_filter)
+
+    def apply_change(self, change):
+        """
+        Apply a RowChange to the loaded rows, one row at a time.
+        Returns False when a full reload is needed instead.
+        """
+        if change.table != "cases":
+            return True
+        if self.shown_filter is None or get_data_service().is_pending("history"):
+            return False
+
+        self.model.remove_case(change.row_id)
+        if change.row is not None and self.case_matches(change.row):
+            self.model.insert_case(history_row(change.row))
+        return True
+
+    def export_filter(self):
+        """The current search/status/date filter as (where_sql, params)"""
+        return build_case_filter(**self.current_filter_values())
 
     def export_csv(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Export History", "", "CSV Files (*.csv)")
-        if file_path:
-            try:
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        "ID", "Case", "Region", "Case Type",
-                        "Date", "Time (min)", "Std (min)", "Efficiency (%)", "Status", "Case Value (%)"
-                    ])
-                    for case in self.all_cases:
-                        writer.writerow(case)
-                print(f"✅ File exported: {file_path}")
-            except Exception as e:
-                print(f"❌ Export error: {e}")
+        """
+        Stream the cases matching the current filters to a file in the
+        background. CSV and compressed CSV are always offered; Parquet and
+        Arrow when pyarrow is installed.
+        """
+        if self.export_progress.is_running():
+            return
+        formats = export_formats()
+        file_path, chosen = QFileDialog.getSaveFileName(
+            self, "Export History", "", ";;".join(name for name, _ext, _fn in formats)
+        )
+        if not file_path:
+            return
+        # A typed extension wins over the selected filter
+        typed = [fmt for fmt in formats if file_path.lower().endswith(fmt[1])]
+        if typed:
+            _name, _extension, export_fn = max(typed, key=lambda fmt: len(fmt[1]))
+        else:
+            _name, extension, export_fn = next((fmt for fmt in formats if fmt[0] == chosen), formats[0])
+            file_path += extension
+        where, params = self.export_filter()
+        self.export_btn.setEnabled(False)
+        self.export_progress.start(file_path, export_fn, HISTORY_EXPORT_COLUMNS, where, params)
+
+    def shutdown(self):
+        """Stop a running export before the connections are closed"""
+        self.export_progress.wait()
@@ -1,6 +1,3 @@
-import json
-import os
-import sys
 from PySide6.QtWidgets import (
     QWidget, QFormLayout, QComboBox, QLineEdit,
     QPushButton, QLabel, QTimeEdit, QVBoxLayout, QHBoxLayout, QGroupBox, QDateEdit,
@@ -8,22 +5,20 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import QTime, QDate, Qt, Signal, QPropertyAnimation, QEasingCurve
 from PySide6.QtGui import QFont, QColor, QBrush
-from db.database import get_connection
+from db.database import get_connection, get_daily_rollup
+from db.data_service import get_data_service
+from db.standards import get_standards_registry, get_standards_history
+from db.overlaps import get_overlap_index
+from db.changes import RowChange, INSERTED, UPDATED, DELETED, fetch_row
+from engine.calculations import OK, WARN, LOW, evaluate_case, daily_equivalent_units
 from datetime import datetime
+from .overlap_prompt import confirm_overlaps
 from .toggle_switch import ToggleSwitch
+from .filter_controller import FilterController
 
 
-def get_resource_path(relative_path):
-    """Get absolute path to resource - works for dev and PyInstaller"""
-    if getattr(sys, 'frozen', False):
-        exe_dir = os.path.dirname(sys.executable)
-        exe_path = os.path.join(exe_dir, relative_path)
-        if os.path.exists(exe_path):
-            return exe_path
-        return os.path.join(sys._MEIPASS, relative_path)
-    else:
-        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        return os.path.join(base, relative_path)
+# Result label text and color per status
+STATUS_DISPLAY = {OK: ("OK", "#4CAF50"), WARN: ("⚠ WARN", "#FFC107"), LOW: ("LOW", "#F44336")}
 
 
 def card(title, widget):
@@ -65,8 +60,23 @@ class DateEditWithShortcut(QDateEdit):
         super().keyPressEvent(event)
 
 
+def query_ot_cases(selected_date):
+    """OT cases for one date, newest first"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, case_id, doctor, region, tipo_caso, tiempo_real, efficiency, case_value, estado
+        FROM ot_cases
+        WHERE fecha = ?
+        ORDER BY id DESC
+    """, (selected_date,))
+    cases = cursor.fetchall()
+    conn.close()
+    return cases
+
+
 class OvertimeTab(QWidget):
-    ot_saved = Signal()  # Signal emitted when OT case is saved
+    ot_changed = Signal(object)  # RowChange for the saved/deleted OT case
     
     def __init__(self):
         super().__init__()
@@ -77,15 +87,29 @@ class OvertimeTab(QWidget):
         self.init_ui()
 
     def load_standards(self):
-        standards_path = get_resource_path(os.path.join("data", "standards.json"))
-        with open(standards_path, "r") as f:
-            self.standards = json.load(f)
+        # Shared, read-only copy; only re-parsed when the file changed
+        registry = get_standards_registry()
+        self.standards = registry.standards()
+        self.std_index = registry.std_index()
+
+    def standard_for(self, region, tipo, fecha):
+        """
+        Standard time in effect on fecha (from standards_versions). Types not
+        versioned yet fall back to the current standards.json value.
+        """
+        std_time = get_standards_history().std_time_at(region, tipo, fecha)
+        if std_time is None:
+            std_time = self.std_index.get((region, tipo))
+        return std_time
 
     def load_units_eq(self):
-        units_path = get_resource_path(os.path.join("data", "units_eq.json"))
-        with open(units_path, "r") as f:
-            self.units_eq = json.load(f)
-
+        registry = get_standards_registry()
+        self.units_eq = registry.units_eq()
+        # Compiled once per file version; lookups no longer re-sort the thresholds
+        self.units_tables = registry.units_tables()
+        # Units at 100% per region, for the daily equivalent-units total
+        self.units_at_100 = registry.units_at_100()
+    
     def init_ui(self):
         # Form fields
         self.case_id = QLineEdit()
@@ -259,7 +283,8 @@ class OvertimeTab(QWidget):
         summary_widget.setLayout(summary_layout)
         right_layout.addWidget(card("OT Daily Summary", summary_widget))
         
-        # Filter/Finder section
+        # Filter/Finder section - text search is debounced, dropdowns apply immediately
+        self.filter_controller = FilterController(self.filter_ot_cases, parent=self)
         filter_layout = QHBoxLayout()
         filter_layout.setSpacing(12)
         
@@ -271,20 +296,20 @@ class OvertimeTab(QWidget):
         self.filter_input = QLineEdit()
         self.filter_input.setPlaceholderText("Search...")
         self.filter_input.setMaximumWidth(150)
-        self.filter_input.textChanged.connect(self.filter_ot_cases)
+        self.filter_input.textChanged.connect(self.filter_controller.request)
         
         # Region dropdown filter
         self.region_filter = QComboBox()
         self.region_filter.addItem("All Regions")
         self.region_filter.addItems(self.standards.keys())
         self.region_filter.setMaximumWidth(130)
-        self.region_filter.currentTextChanged.connect(self.filter_ot_cases)
+        self.region_filter.currentTextChanged.connect(self.filter_controller.request_now)
         
         # Type dropdown filter
         self.type_filter = QComboBox()
         self.type_filter.addItem("All Types")
         self.type_filter.setMaximumWidth(130)
-        self.type_filter.currentTextChanged.connect(self.filter_ot_cases)
+        self.type_filter.currentTextChanged.connect(self.filter_controller.request_now)
         
         # Populate types from all regions
         all_types = set()
@@ -407,12 +432,6 @@ class OvertimeTab(QWidget):
             self.end_time.setTime(self.start_time.time())
             self.end_time.blockSignals(False)
 
-    def calculate_case_value(self, std_time):
-        """Calculate case value percentage"""
-        DAILY_BASE_MINUTES = 408.3
-        case_value = (std_time / DAILY_BASE_MINUTES) * 100
-        return case_value
-
     def calculate(self):
         region = self.region.currentText()
         tipo = self.tipo.currentText()
@@ -420,8 +439,10 @@ class OvertimeTab(QWidget):
         if not region or not tipo:
             return
 
-        std_time = self.standards[region]["Aligners"][tipo]
-        case_value = self.calculate_case_value(std_time)
+        std_time = self.standard_for(region, tipo, self.case_date.date().toString("yyyy-MM-dd"))
+        if std_time is None:
+            self.result_label.setText("No standard for this date")
+            return
 
         start = self.start_time.time()
         end = self.end_time.time()
@@ -431,60 +452,38 @@ class OvertimeTab(QWidget):
             self.result_label.setText("Invalid time")
             return
 
-        efficiency = (std_time / real_minutes) * 100
-        
-        if efficiency >= 100:
-            status = "OK"
-            color = "#4CAF50"
-        elif efficiency >= 95:
-            status = "⚠ WARN"
-            color = "#FFC107"
-        else:
-            status = "LOW"
-            color = "#F44336"
+        efficiency, status, _estado, case_value = evaluate_case(std_time, real_minutes)
+        label, color = STATUS_DISPLAY[status]
 
-        result_text = f"{efficiency:.1f}% – {status}\nOT Case Value: {case_value:.3f}%"
+        result_text = f"{efficiency:.1f}% – {label}\nOT Case Value: {case_value:.3f}%"
         self.result_label.setText(result_text)
         self.result_label.setStyleSheet(f"color: {color}; font-size: 13px; font-weight: bold; text-align: center;")
 
     def on_date_changed(self):
         """Called when date picker changes - reload OT data for that date"""
+        self.load_data()
+
+    def load_data(self):
         self.load_daily_ot_production()
         self.load_ot_cases()
 
     def load_daily_ot_production(self):
-        conn = get_connection()
-        cursor = conn.cursor()
         # Use selected date from picker
         selected_date = self.case_date.date().toString("yyyy-MM-dd")
         
-        # Get total OT case values (only count_production = 1)
-        cursor.execute("""
-            SELECT SUM(case_value)
-            FROM ot_cases
-            WHERE fecha = ? AND (count_production = 1 OR count_production IS NULL)
-        """, (selected_date,))
-        
-        result = cursor.fetchone()
-        total_ot = result[0] if result[0] else 0.0
-        
-        # Get cases by region for equivalent units calculation (only count_production = 1)
-        cursor.execute("""
-            SELECT region, SUM(case_value)
-            FROM ot_cases
-            WHERE fecha = ? AND (count_production = 1 OR count_production IS NULL)
-            GROUP BY region
-        """, (selected_date,))
-        
-        region_cases = cursor.fetchall()
-        conn.close()
+        # Trigger-maintained per-region OT totals (only count_production = 1),
+        # read on a worker thread
+        get_data_service().submit(
+            "overtime.daily", get_daily_rollup, selected_date,
+            on_result=self.apply_daily_ot_production
+        )
+
+    def apply_daily_ot_production(self, rollup):
+        region_values = {region: row[0] for region, row in rollup["ot_cases"].items()}
+        total_ot = sum(region_values.values())
         
         # Calculate equivalent units based on region
-        total_equivalent_units = 0.0
-        for region, case_value in region_cases:
-            if region in self.units_eq and case_value:
-                units_at_100 = self.units_eq[region].get("100", 0)
-                total_equivalent_units += (case_value / 100) * units_at_100
+        total_equivalent_units = daily_equivalent_units(region_values, self.units_at_100)
         
         self.daily_ot_label.setText(f"OT Production: {total_ot:.2f}%")
         self.ot_units_label.setText(f"OT Equivalent Units: {total_equivalent_units:.2f}")
@@ -533,80 +532,113 @@ class OvertimeTab(QWidget):
 
     def load_ot_cases(self):
         """Load OT cases for selected date into the table"""
-        conn = get_connection()
-        cursor = conn.cursor()
         selected_date = self.case_date.date().toString("yyyy-MM-dd")
-        
-        cursor.execute("""
-            SELECT id, case_id, doctor, region, tipo_caso, tiempo_real, efficiency, case_value, estado
-            FROM ot_cases
-            WHERE fecha = ?
-            ORDER BY id DESC
-        """, (selected_date,))
-        
-        cases = cursor.fetchall()
-        conn.close()
-        
+        get_data_service().submit(
+            "overtime.cases", query_ot_cases, selected_date,
+            on_result=self.populate_ot_table
+        )
+
+    def populate_ot_table(self, cases):
         self.ot_table.setRowCount(len(cases))
-        self.ot_case_ids = []  # Store database IDs for edit/delete
+        self.ot_case_ids = [case[0] for case in cases]  # Store database IDs for edit/delete
         
         for row_idx, case in enumerate(cases):
-            db_id, case_id, doctor, region, tipo, tiempo_real, efficiency, case_value, estado = case
-            self.ot_case_ids.append(db_id)
-            
-            # Case ID - bold
-            case_item = QTableWidgetItem(str(case_id))
-            case_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            font = QFont()
-            font.setBold(True)
-            case_item.setFont(font)
-            self.ot_table.setItem(row_idx, 0, case_item)
-            
-            # Doctor - bold
-            doctor_item = QTableWidgetItem(str(doctor) if doctor else "")
-            doctor_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            doctor_item.setFont(font)
-            self.ot_table.setItem(row_idx, 1, doctor_item)
-            
-            # Region
-            region_item = QTableWidgetItem(str(region))
-            region_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.ot_table.setItem(row_idx, 2, region_item)
-            
-            # Type
-            tipo_item = QTableWidgetItem(str(tipo))
-            tipo_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.ot_table.setItem(row_idx, 3, tipo_item)
-            
-            # Time
-            time_item = QTableWidgetItem(f"{tiempo_real:.0f}")
-            time_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.ot_table.setItem(row_idx, 4, time_item)
-            
-            # Efficiency with color
-            eff_item = QTableWidgetItem(f"{efficiency:.0f}")
-            eff_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if estado == "OK":
-                eff_item.setForeground(QBrush(QColor(76, 175, 80)))  # Green
-            else:
-                eff_item.setForeground(QBrush(QColor(244, 67, 54)))  # Red
-            self.ot_table.setItem(row_idx, 5, eff_item)
-            
-            # Value with color (same as efficiency)
-            value_item = QTableWidgetItem(f"{case_value:.2f}")
-            value_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if estado == "OK":
-                value_item.setForeground(QBrush(QColor(76, 175, 80)))  # Green
-            else:
-                value_item.setForeground(QBrush(QColor(244, 67, 54)))  # Red
-            self.ot_table.setItem(row_idx, 6, value_item)
-            
-            # Zebra striping
-            if row_idx % 2 == 1:
-                for col in range(7):
-                    item = self.ot_table.item(row_idx, col)
-                    if item:
-                        item.setBackground(QColor(45, 45, 45))
+            self.set_ot_row(row_idx, case)
+        self.stripe_ot_rows(0)
+
+    def set_ot_row(self, row_idx, case):
+        db_id, case_id, doctor, region, tipo, tiempo_real, efficiency, case_value, estado = case
+        
+        # Case ID - bold
+        case_item = QTableWidgetItem(str(case_id))
+        case_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        font = QFont()
+        font.setBold(True)
+        case_item.setFont(font)
+        self.ot_table.setItem(row_idx, 0, case_item)
+        
+        # Doctor - bold
+        doctor_item = QTableWidgetItem(str(doctor) if doctor else "")
+        doctor_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        doctor_item.setFont(font)
+        self.ot_table.setItem(row_idx, 1, doctor_item)
+        
+        # Region
+        region_item = QTableWidgetItem(str(region))
+        region_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.ot_table.setItem(row_idx, 2, region_item)
+        
+        # Type
+        tipo_item = QTableWidgetItem(str(tipo))
+        tipo_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.ot_table.setItem(row_idx, 3, tipo_item)
+        
+        # Time
+        time_item = QTableWidgetItem(f"{tiempo_real:.0f}")
+        time_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.ot_table.setItem(row_idx, 4, time_item)
+        
+        # Efficiency with color
+        eff_item = QTableWidgetItem(f"{efficiency:.0f}")
+        eff_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        if estado == "OK":
+            eff_item.setForeground(QBrush(QColor(76, 175, 80)))  # Green
+        else:
+            eff_item.setForeground(QBrush(QColor(244, 67, 54)))  # Red
+        self.ot_table.setItem(row_idx, 5, eff_item)
+        
+        # Value with color (same as efficiency)
+        value_item = QTableWidgetItem(f"{case_value:.2f}")
+        value_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        if estado == "OK":
+            value_item.setForeground(QBrush(QColor(76, 175, 80)))  # Green
+        else:
+            value_item.setForeground(QBrush(QColor(244, 67, 54)))  # Red
+        self.ot_table.setItem(row_idx, 6, value_item)
+
+    def stripe_ot_rows(self, first):
+        """Zebra striping from row first down (rows shift after an insert/removal)"""
+        for row_idx in range(first, self.ot_table.rowCount()):
+            background = QColor(45, 45, 45) if row_idx % 2 == 1 else QBrush()
+            for col in range(7):
+                item = self.ot_table.item(row_idx, col)
+                if item:
+                    item.setBackground(background)
+
+    def apply_change(self, change):
+        """
+        Apply an ot_cases RowChange to the table for the selected date, one
+        row at a time. Returns False when a full reload is needed instead.
+        """
+        if change.table != "ot_cases":
+            return True
+        if get_data_service().is_pending("overtime.cases"):
+            return False
+
+        first = self.ot_table.rowCount()
+        if change.row_id in self.ot_case_ids:
+            row_idx = self.ot_case_ids.index(change.row_id)
+            del self.ot_case_ids[row_idx]
+            self.ot_table.removeRow(row_idx)
+            first = row_idx
+
+        selected_date = self.case_date.date().toString("yyyy-MM-dd")
+        row = change.row
+        if row is not None and row["fecha"] == selected_date:
+            # Newest first: ids are descending down the table
+            row_idx = 0
+            while row_idx < len(self.ot_case_ids) and self.ot_case_ids[row_idx] > change.row_id:
+                row_idx += 1
+            self.ot_case_ids.insert(row_idx, change.row_id)
+            self.ot_table.insertRow(row_idx)
+            self.set_ot_row(row_idx, (
+                row["id"], row["case_id"], row["doctor"], row["region"], row["tipo_caso"],
+                row["tiempo_real"], row["efficiency"], row["case_value"], row["estado"]
+            ))
+            self.filter_ot_row(row_idx)
+            first = min(first, row_idx)
+        self.stripe_ot_rows(first)
+        return True
 
     def save_ot_case(self):
         region = self.region.currentText()
@@ -627,10 +659,20 @@ class OvertimeTab(QWidget):
             self.result_label.setText("Enter Case ID")
             return
 
-        std_time = self.standards[region]["Aligners"][tipo]
-        efficiency = (std_time / tiempo_real) * 100
-        estado = "OK" if efficiency >= 100 else "LOW"
-        case_value = self.calculate_case_value(std_time)
+        std_time = self.standard_for(region, tipo, case_date)
+        if std_time is None:
+            self.result_label.setText("No standard for this date")
+            return
+        efficiency, _status, estado, case_value = evaluate_case(std_time, tiempo_real)
+
+        # Minutes shared with another case or a downtime would count twice
+        if self.count_toggle.isChecked():
+            overlaps = get_overlap_index().find(
+                case_date, start.toString("HH:mm"), end.toString("HH:mm"),
+                exclude=("ot_cases", self.editing_ot_id)
+            )
+            if not confirm_overlaps(self, "OT case", overlaps):
+                return
         
         # Get toggle and comments values
         count_production = 1 if self.count_toggle.isChecked() else 0
@@ -641,6 +683,9 @@ class OvertimeTab(QWidget):
 
         # Check if we're editing an existing case
         if hasattr(self, 'editing_ot_id') and self.editing_ot_id:
+            db_id = self.editing_ot_id
+            old_row = fetch_row("ot_cases", db_id)
+            kind = UPDATED
             cursor.execute("""
                 UPDATE ot_cases SET
                     case_id = ?, region = ?, tipo_caso = ?,
@@ -673,22 +718,27 @@ class OvertimeTab(QWidget):
                 tiempo_real, std_time, efficiency, estado, case_value,
                 count_production, comments
             ))
+            db_id = cursor.lastrowid
+            old_row = None
+            kind = INSERTED
             msg = "OT Case Saved"
 
         conn.commit()
         conn.close()
+        change = RowChange(kind, "ot_cases", db_id, fetch_row("ot_cases", db_id), old_row)
 
         self.result_label.setText(msg)
         self.result_label.setStyleSheet("color: #FF9800; font-size: 13px; font-weight: bold; text-align: center;")
         self.load_daily_ot_production()
-        self.load_ot_cases()
+        if not self.apply_change(change):
+            self.load_ot_cases()
         self.case_id.clear()
         self.doctor.clear()
         self.comments_input.clear()
         self.count_toggle.setChecked(True)  # Reset toggle to ON
         self.end_time.setTime(QTime(0, 0))  # Clear end time
         
-        self.ot_saved.emit()
+        self.ot_changed.emit(change)
 
     def edit_selected_ot_case(self):
         """Load selected OT case into form for editing"""
@@ -750,6 +800,7 @@ class OvertimeTab(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            old_row = fetch_row("ot_cases", db_id)
             conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM ot_cases WHERE id = ?", (db_id,))
@@ -759,11 +810,18 @@ class OvertimeTab(QWidget):
             self.result_label.setText("OT Case Deleted")
             self.result_label.setStyleSheet("color: #F44336; font-size: 13px; font-weight: bold; text-align: center;")
             self.load_daily_ot_production()
-            self.load_ot_cases()
-            self.ot_saved.emit()
+            change = RowChange(DELETED, "ot_cases", db_id, None, old_row)
+            if not self.apply_change(change):
+                self.load_ot_cases()
+            self.ot_changed.emit(change)
 
     def filter_ot_cases(self):
         """Filter OT cases table based on all filter inputs"""
+        for row in range(self.ot_table.rowCount()):
+            self.filter_ot_row(row)
+
+    def filter_ot_row(self, row):
+        """Show or hide one OT table row according to the filter inputs"""
         search_text = self.filter_input.text().strip().lower()
         filter_field = self.filter_field.currentText()
         region_filter = self.region_filter.currentText()
@@ -777,43 +835,43 @@ class OvertimeTab(QWidget):
         
         text_column_idx = column_map.get(filter_field, 0)
         
-        for row in range(self.ot_table.rowCount()):
-            show_row = True
-            
-            # Text search filter
-            if search_text:
-                item = self.ot_table.item(row, text_column_idx)
-                if item:
-                    cell_text = item.text().lower()
-                    if search_text not in cell_text:
-                        show_row = False
-                else:
+        show_row = True
+        
+        # Text search filter
+        if search_text:
+            item = self.ot_table.item(row, text_column_idx)
+            if item:
+                cell_text = item.text().lower()
+                if search_text not in cell_text:
                     show_row = False
-            
-            # Region filter
-            if show_row and region_filter != "All Regions":
-                region_item = self.ot_table.item(row, 2)  # Region is column 2
-                if region_item:
-                    if region_item.text() != region_filter:
-                        show_row = False
-                else:
+            else:
+                show_row = False
+        
+        # Region filter
+        if show_row and region_filter != "All Regions":
+            region_item = self.ot_table.item(row, 2)  # Region is column 2
+            if region_item:
+                if region_item.text() != region_filter:
                     show_row = False
-            
-            # Type filter
-            if show_row and type_filter != "All Types":
-                type_item = self.ot_table.item(row, 3)  # Type is column 3
-                if type_item:
-                    if type_item.text() != type_filter:
-                        show_row = False
-                else:
+            else:
+                show_row = False
+        
+        # Type filter
+        if show_row and type_filter != "All Types":
+            type_item = self.ot_table.item(row, 3)  # Type is column 3
+            if type_item:
+                if type_item.text() != type_filter:
                     show_row = False
-            
-            self.ot_table.setRowHidden(row, not show_row)
+            else:
+                show_row = False
+        
+        self.ot_table.setRowHidden(row, not show_row)
 
     def clear_filter(self):
         """Clear all filters and show all rows"""
         self.filter_input.clear()
         self.region_filter.setCurrentIndex(0)  # "All Regions"
         self.type_filter.setCurrentIndex(0)  # "All Types"
+        self.filter_controller.cancel()  # Everything is shown already
         for row in range(self.ot_table.rowCount()):
             self.ot_table.setRowHidden(row, False)
@@ -1,24 +1,65 @@
 from PySide6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QComboBox, QLineEdit,
-    QPushButton, QDateEdit, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+    QPushButton, QDateEdit, QTableView, QHeaderView, QMessageBox
 )
 from PySide6.QtCore import QDate, Qt, Signal
-from PySide6.QtGui import QColor, QFont, QBrush
 from db.database import get_connection
+from db.queries import (
+    build_case_filter, case_matches_filter, fetch_case_page, fetch_case_summary, fetch_daily_totals
+)
+from db.data_service import get_data_service
+from db.changes import RowChange, DELETED, fetch_row
 from datetime import datetime, timedelta
+from .production_model import ProductionTableModel
+from .filter_controller import FilterController
+
+
+PRODUCTION_QUERY_COLUMNS = (
+    "id, case_id, doctor, region, tipo_caso, fecha, hora_inicio, hora_fin, "
+    "tiempo_real, efficiency, estado, case_value"
+)
+
+
+def fetch_production_page(where, params, after):
+    return fetch_case_page(PRODUCTION_QUERY_COLUMNS, where, params, after)
+
+
+def query_production(where, params):
+    """Everything a filter pass needs: stats, per-date totals and the first page"""
+    return (
+        fetch_case_summary(where, params),
+        fetch_daily_totals(where, params),
+        fetch_production_page(where, params, None)
+    )
+
+
+def production_row(row):
+    """Model tuple for a cases {column: value} dict (PRODUCTION_QUERY_COLUMNS order)"""
+    return (
+        row["id"], row["case_id"], row["doctor"], row["region"], row["tipo_caso"],
+        row["fecha"], row["hora_inicio"], row["hora_fin"], row["tiempo_real"],
+        row["efficiency"], row["estado"], row["case_value"]
+    )
 
 class ProductionTab(QWidget):
     case_updated = Signal()  # Signal emitted when a case is edited/deleted
+    case_changed = Signal(object)  # RowChange for a case deleted here
     
     def __init__(self):
         super().__init__()
-        self.all_cases = []
-        self.case_db_ids = {}  # Map table rows to database IDs
+        # Filter values and [count, ok, value, efficiency sum] of the model
+        # currently shown, so row changes can update the stats in place
+        self.shown_filter = None
+        self.shown_totals = None
         self.init_ui()
+        get_data_service().query_failed.connect(self.on_query_failed)
         self.load_regions_and_types()
         self.load_data()
 
     def init_ui(self):
+        # Doctor search is debounced; combos and dates filter immediately
+        self.filter_controller = FilterController(self.filter_data, asynchronous=True, parent=self)
+
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(8, 10, 8, 8)  # Reduced top margin
         main_layout.setSpacing(10)
@@ -57,7 +98,7 @@ class ProductionTab(QWidget):
         self.date_from.setDate(QDate.currentDate())
         self.date_from.setCalendarPopup(True)
         self.date_from.setFixedWidth(100)
-        self.date_from.dateChanged.connect(self.filter_data)
+        self.date_from.dateChanged.connect(self.filter_controller.request_now)
         date_row.addWidget(self.date_from)
         
         date_row.addWidget(QLabel("To:"))
@@ -65,7 +106,7 @@ class ProductionTab(QWidget):
         self.date_to.setDate(QDate.currentDate())
         self.date_to.setCalendarPopup(True)
         self.date_to.setFixedWidth(100)
-        self.date_to.dateChanged.connect(self.filter_data)
+        self.date_to.dateChanged.connect(self.filter_controller.request_now)
         date_row.addWidget(self.date_to)
         
         date_row.addStretch()
@@ -79,20 +120,20 @@ class ProductionTab(QWidget):
         filters_row.addWidget(QLabel("Region:"))
         self.filter_region = QComboBox()
         self.filter_region.setFixedWidth(100)
-        self.filter_region.currentTextChanged.connect(self.filter_data)
+        self.filter_region.currentTextChanged.connect(self.filter_controller.request_now)
         filters_row.addWidget(self.filter_region)
         
         filters_row.addWidget(QLabel("Type:"))
         self.filter_type = QComboBox()
         self.filter_type.setFixedWidth(100)
-        self.filter_type.currentTextChanged.connect(self.filter_data)
+        self.filter_type.currentTextChanged.connect(self.filter_controller.request_now)
         filters_row.addWidget(self.filter_type)
         
         filters_row.addWidget(QLabel("Doctor:"))
         self.filter_doctor = QLineEdit()
         self.filter_doctor.setPlaceholderText("Search...")
         self.filter_doctor.setFixedWidth(100)
-        self.filter_doctor.textChanged.connect(self.filter_data)
+        self.filter_doctor.textChanged.connect(self.filter_controller.request)
         filters_row.addWidget(self.filter_doctor)
         
         filters_row.addStretch()
@@ -102,21 +143,20 @@ class ProductionTab(QWidget):
         main_layout.addSpacing(20)
 
         # Table
-        self.table = QTableWidget()
+        self.model = ProductionTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # Connected after setModel so the view has shifted its own spans first
+        self.model.rowsInserted.connect(lambda _parent, first, last: self.apply_header_spans(first, last))
         self.table.setAlternatingRowColors(False)
         self.table.verticalHeader().setVisible(False)
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels([
-            "Case ID", "Doctor", "Region", "Type", "Start", "End", 
-            "Time", "Eff %", "Value %"
-        ])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.table.setShowGrid(True)
         self.table.setGridStyle(Qt.PenStyle.SolidLine)
         
         # Style for grid lines
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #5a5a5a;
             }
             QHeaderView::section {
@@ -192,189 +232,143 @@ class ProductionTab(QWidget):
         
         conn.close()
         
-        self.filter_region.clear()
-        self.filter_region.addItem("All")
-        self.filter_region.addItems(regions)
-        
-        self.filter_type.clear()
-        self.filter_type.addItem("All")
-        self.filter_type.addItems(types)
+        # Repopulating fires currentTextChanged several times; the caller
+        # runs a single filter pass afterwards instead
+        for combo, items in ((self.filter_region, regions), (self.filter_type, types)):
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("All")
+            combo.addItems(items)
+            combo.blockSignals(False)
 
     def load_data(self):
-        conn = get_connection()
-        cursor = conn.cursor()
+        self.load_regions_and_types()
+        self.filter_controller.request_now()
 
-        cursor.execute("""
-            SELECT id, case_id, doctor, region, tipo_caso, fecha, hora_inicio, hora_fin, 
-                   tiempo_real, efficiency, estado, case_value
-            FROM cases
-            ORDER BY fecha DESC, hora_inicio DESC
-        """)
+    def current_filter_values(self):
+        """Filter widget values, as keyword arguments for build_case_filter"""
+        return dict(
+            date_from=self.date_from.date().toString("yyyy-MM-dd"),
+            date_to=self.date_to.date().toString("yyyy-MM-dd"),
+            region=self.filter_region.currentText(),
+            tipo=self.filter_type.currentText(),
+            doctor=self.filter_doctor.text().strip()
+        )
 
-        self.all_cases = cursor.fetchall()
-        conn.close()
-        
-        self.load_regions_and_types()
-        self.filter_data()
+    def current_filter(self):
+        """WHERE clause and parameters for the current filter widgets"""
+        return build_case_filter(**self.current_filter_values())
 
     def filter_data(self):
-        date_from = self.date_from.date().toString("yyyy-MM-dd")
-        date_to = self.date_to.date().toString("yyyy-MM-dd")
-        region_filter = self.filter_region.currentText()
-        type_filter = self.filter_type.currentText()
-        doctor_filter = self.filter_doctor.text().lower()
-        
-        # Filter cases - indices shifted by 1 due to id field at index 0
-        filtered = []
-        for row in self.all_cases:
-            fecha = row[5]  # fecha is now at index 5
-            if fecha < date_from or fecha > date_to:
-                continue
-            if region_filter != "All" and row[3] != region_filter:  # region at index 3
-                continue
-            if type_filter != "All" and row[4] != type_filter:  # tipo at index 4
-                continue
-            if doctor_filter and doctor_filter not in (row[2] or "").lower():  # doctor at index 2
-                continue
-            filtered.append(row)
-        
-        # Group by date
-        grouped = {}
-        for row in filtered:
-            fecha = row[5]  # fecha at index 5
-            if fecha not in grouped:
-                grouped[fecha] = []
-            grouped[fecha].append(row)
-        
-        # Calculate stats - indices shifted
-        total_cases = len(filtered)
-        ok_count = sum(1 for row in filtered if row[10] == "OK")  # estado at index 10
+        values = self.current_filter_values()
+        where, params = build_case_filter(**values)
+        # Queries run on a worker thread; a newer filter pass supersedes this one
+        get_data_service().submit(
+            "production", query_production, where, params,
+            on_result=lambda result: self.apply_filter_result(where, params, result, values)
+        )
+
+    def apply_filter_result(self, where, params, result, values=None):
+        summary, daily_totals, first_page = result
+
+        # Stats over the whole filter, computed by SQLite
+        total_cases, ok_count, total_value, avg_efficiency = summary
+        self.shown_filter = values
+        self.shown_totals = [total_cases, ok_count, total_value, avg_efficiency * total_cases]
+        self.update_stats()
+
+        # Only the first page is loaded; the view pulls more as it scrolls
+        self.model.set_source(
+            lambda after: fetch_production_page(where, params, after),
+            daily_totals, first_page
+        )
+        self.table.clearSpans()
+        self.apply_header_spans(0, self.model.rowCount() - 1)
+        self.filter_controller.mark_finished()
+
+    def on_query_failed(self, view, error):
+        """Leave the pending filter pass when its query failed"""
+        if view != "production":
+            return
+        self.filter_controller.mark_failed()
+        QMessageBox.warning(self, "Error", f"Failed to load cases:\n{error.strip().splitlines()[-1]}")
+
+    def update_stats(self):
+        total_cases, ok_count, total_value, efficiency_sum = self.shown_totals
+        avg_efficiency = efficiency_sum / total_cases if total_cases else 0.0
         low_count = total_cases - ok_count
-        total_value = sum(row[11] for row in filtered)  # case_value at index 11
-        avg_efficiency = sum(row[9] for row in filtered) / total_cases if total_cases > 0 else 0  # efficiency at index 9
 
         self.stats_avg.setText(f"Avg Eff: {avg_efficiency:.1f}%")
         self.stats_total.setText(f"Cases: {total_cases}")
         self.stats_ok.setText(f"Value: {total_value:.2f}%")
         self.stats_low.setText(f"OK: {ok_count} | LOW: {low_count}")
-        
-        # Count rows needed (dates + cases)
-        total_rows = sum(1 + len(cases) for cases in grouped.values())
-        self.table.setRowCount(total_rows)
-        
-        # Clear the row to db_id mapping
-        self.case_db_ids = {}
-        
-        row_idx = 0
-        sorted_dates = sorted(grouped.keys(), reverse=True)
-        
-        for fecha in sorted_dates:
-            # Calculate daily total value - case_value at index 11
-            daily_value = sum(case[11] for case in grouped[fecha])
-            daily_cases = len(grouped[fecha])
-            
-            # Date header row with daily total - spaced out text, no icon
-            date_item = QTableWidgetItem(f"    {fecha}          {daily_cases} cases          Value: {daily_value:.2f}%    ")
-            date_item.setBackground(QColor(75, 75, 85))  # Lighter color
-            date_item.setForeground(QColor(220, 220, 220))
-            font = QFont()
-            font.setBold(True)
-            date_item.setFont(font)
-            date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            self.table.setItem(row_idx, 0, date_item)
-            self.table.setRowHeight(row_idx, 32)  # Taller row for date header
-            # Fill rest of date row with same background
-            for col in range(1, 9):
-                empty_item = QTableWidgetItem("")
-                empty_item.setBackground(QColor(75, 75, 85))
-                self.table.setItem(row_idx, col, empty_item)
-            
-            self.table.setSpan(row_idx, 0, 1, 9)  # Span across all columns
-            row_idx += 1
-            
-            # Case rows for this date - zebra striping within each date group
-            for case_idx, case in enumerate(grouped[fecha]):
-                # Store mapping from table row to database id
-                self.case_db_ids[row_idx] = case[0]  # id at index 0
-                
-                # Alternate row colors based on case index within the date group
-                bg_color = QColor(43, 43, 43) if (case_idx % 2 == 0) else QColor(55, 55, 55)
-                
-                # Case ID - Bold (case_id at index 1)
-                case_id_item = QTableWidgetItem(str(case[1]))
-                case_id_item.setBackground(bg_color)
-                case_id_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                bold_font = QFont()
-                bold_font.setBold(True)
-                case_id_item.setFont(bold_font)
-                self.table.setItem(row_idx, 0, case_id_item)
-                
-                # Doctor - Bold (doctor at index 2)
-                doctor_item = QTableWidgetItem(str(case[2] or "-"))
-                doctor_item.setBackground(bg_color)
-                doctor_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                doctor_item.setFont(bold_font)
-                self.table.setItem(row_idx, 1, doctor_item)
-                
-                # Other columns - centered (indices shifted)
-                other_items = [
-                    str(case[3]),           # Region (index 3)
-                    str(case[4]),           # Type (index 4)
-                    str(case[6]),           # Start (index 6)
-                    str(case[7]),           # End (index 7)
-                    f"{case[8]:.0f}",       # Time (index 8)
-                ]
-                
-                for col, text in enumerate(other_items, start=2):
-                    item = QTableWidgetItem(text)
-                    item.setBackground(bg_color)
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.table.setItem(row_idx, col, item)
-                
-                # Efficiency with color - centered (efficiency at index 9, estado at index 10)
-                efficiency_item = QTableWidgetItem(f"{case[9]:.0f}%")
-                efficiency_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                if case[10] == "OK":
-                    efficiency_item.setBackground(QColor(76, 175, 80))
-                    efficiency_item.setForeground(QColor(255, 255, 255))
-                else:
-                    efficiency_item.setBackground(QColor(244, 67, 54))
-                    efficiency_item.setForeground(QColor(255, 255, 255))
-                self.table.setItem(row_idx, 7, efficiency_item)
-                
-                # Case Value - colored based on OK/LOW status (case_value at index 11)
-                value_item = QTableWidgetItem(f"{case[11]:.1f}%")
-                value_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                if case[10] == "OK":
-                    value_item.setBackground(QColor(76, 175, 80))
-                    value_item.setForeground(QColor(255, 255, 255))
-                else:
-                    value_item.setBackground(QColor(244, 67, 54))
-                    value_item.setForeground(QColor(255, 255, 255))
-                self.table.setItem(row_idx, 8, value_item)
-                
-                row_idx += 1
+
+    def apply_change(self, change):
+        """
+        Apply a RowChange to the shown rows, stats and date totals without
+        re-querying. Returns False when a full refresh is needed instead.
+        """
+        if change.table != "cases":
+            return True
+        if self.shown_filter is None or get_data_service().is_pending("production"):
+            # No result shown yet, or a pass is in flight that may predate the change
+            return False
+
+        for row, sign in ((change.old_row, -1), (change.row, 1)):
+            if row is None or not case_matches_filter(row, **self.shown_filter):
+                continue
+            value = row["case_value"] or 0.0
+            self.shown_totals[0] += sign
+            self.shown_totals[1] += sign * (row["estado"] == "OK")
+            self.shown_totals[2] += sign * value
+            self.shown_totals[3] += sign * (row["efficiency"] or 0.0)
+            self.model.adjust_daily(row["fecha"], sign, sign * value)
+            if sign < 0:
+                self.model.remove_case(change.row_id)
+            else:
+                self.model.insert_case(production_row(row))
+        self.update_stats()
+
+        if change.row is not None:
+            self.add_filter_choice(self.filter_region, change.row["region"])
+            self.add_filter_choice(self.filter_type, change.row["tipo_caso"])
+        return True
+
+    def add_filter_choice(self, combo, text):
+        """Add a new region/type to a filter combo, keeping it sorted after 'All'"""
+        if not text or combo.findText(text) >= 0:
+            return
+        position = 1
+        while position < combo.count() and combo.itemText(position) < text:
+            position += 1
+        combo.blockSignals(True)
+        combo.insertItem(position, text)
+        combo.blockSignals(False)
+
+    def apply_header_spans(self, first, last):
+        """Span and heighten the virtual date header rows between first and last"""
+        for row in self.model.header_rows(first, last):
+            self.table.setSpan(row, 0, 1, 9)  # Span across all columns
+            self.table.setRowHeight(row, 32)  # Taller row for date header
 
     def edit_selected_case(self):
         """Emit signal to edit selected case - handled by main window"""
-        selected_row = self.table.currentRow()
-        if selected_row not in self.case_db_ids:
+        db_id = self.model.db_id(self.table.currentIndex().row())
+        if db_id is None:
             return  # Date header row or invalid
         
-        db_id = self.case_db_ids[selected_row]
         # Store the ID for RegisterTab to pick up
         self.editing_case_id = db_id
         self.case_updated.emit()
 
     def delete_selected_case(self):
         """Delete selected case from database"""
-        selected_row = self.table.currentRow()
-        if selected_row not in self.case_db_ids:
+        case = self.model.case_at(self.table.currentIndex().row())
+        if case is None:
             return  # Date header row or invalid
         
-        db_id = self.case_db_ids[selected_row]
-        case_id_text = self.table.item(selected_row, 0).text()
+        db_id = case[0]
+        case_id_text = str(case[1])
         
         reply = QMessageBox.question(
             self, "Confirm Delete",
@@ -383,13 +377,18 @@ class ProductionTab(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            old_row = fetch_row("cases", db_id)
             conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM cases WHERE id = ?", (db_id,))
             conn.commit()
             conn.close()
             
-            self.load_data()
+            # Drop the one row in place; other views get the same change
+            change = RowChange(DELETED, "cases", db_id, None, old_row)
+            if not self.apply_change(change):
+                self.load_data()
+            self.case_changed.emit(change)
             self.case_updated.emit()
 
 
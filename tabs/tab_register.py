@@ -1,4 +1,3 @@
-import json
 import os
 import sys
 
@@ -12,26 +11,22 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import QTime, QDate, Qt, Signal, QPropertyAnimation, QEasingCurve
 from PySide6.QtGui import QFont
-from db.database import get_connection
-from datetime import datetime
+from db.database import get_connection, get_daily_rollup, rollup_downtime
+from db.data_service import get_data_service
+from db.standards import get_standards_registry, get_standards_history
+from db.overlaps import get_overlap_index
+from db.changes import RowChange, INSERTED, UPDATED, fetch_row
+from engine.calculations import (
+    OK, WARN, LOW, evaluate_case, classify, downtime_value, daily_equivalent_units
+)
+from engine.units import units_for_production
 from .downtime_manager import DowntimeManager
+from .overlap_prompt import confirm_overlaps
 from .toggle_switch import ToggleSwitch
 
 
-def get_resource_path(relative_path):
-    """Get absolute path to resource - works for dev and PyInstaller"""
-    if getattr(sys, 'frozen', False):
-        # Running as compiled exe - look in exe directory first, then _MEIPASS
-        exe_dir = os.path.dirname(sys.executable)
-        exe_path = os.path.join(exe_dir, relative_path)
-        if os.path.exists(exe_path):
-            return exe_path
-        # Fall back to bundled data
-        return os.path.join(sys._MEIPASS, relative_path)
-    else:
-        # Running as script
-        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        return os.path.join(base, relative_path)
+# Result/progress colors per status
+STATUS_COLORS = {OK: "#4CAF50", WARN: "#FFC107", LOW: "#F44336"}
 
 
 def card(title, widget):
@@ -92,7 +87,7 @@ class DateEditWithShortcut(QDateEdit):
 
 
 class RegisterTab(QWidget):
-    case_saved = Signal()  # Signal emitted when a case is saved
+    case_changed = Signal(object)  # RowChange describing the saved case
     
     def __init__(self):
         super().__init__()
@@ -253,9 +248,12 @@ class RegisterTab(QWidget):
         right_layout.addWidget(comments_card)
         
         # Downtime section
-        downtime_widget = DowntimeManager(on_update_callback=self.load_daily_production)
-        downtime_widget.setMaximumHeight(300)
-        downtime_card = card("Downtime", downtime_widget)
+        self.downtime_manager = DowntimeManager(
+            on_update_callback=self.load_daily_production,
+            fecha=self.case_date.date().toString("yyyy-MM-dd")
+        )
+        self.downtime_manager.setMaximumHeight(300)
+        downtime_card = card("Downtime", self.downtime_manager)
         right_layout.addWidget(downtime_card)
         
         right_layout.addWidget(progress_group)
@@ -274,53 +272,36 @@ class RegisterTab(QWidget):
         self.load_daily_production()
 
     def load_standards(self):
-        standards_path = get_resource_path(os.path.join("data", "standards.json"))
-        with open(standards_path, "r") as f:
-            self.standards = json.load(f)
+        # Shared, read-only copy; only re-parsed when the file changed
+        registry = get_standards_registry()
+        self.standards = registry.standards()
+        self.std_index = registry.std_index()
+
+    def standard_for(self, region, tipo, fecha):
+        """
+        Standard time in effect on fecha (from standards_versions). Types not
+        versioned yet fall back to the current standards.json value.
+        """
+        std_time = get_standards_history().std_time_at(region, tipo, fecha)
+        if std_time is None:
+            std_time = self.std_index.get((region, tipo))
+        return std_time
 
     def load_units_eq(self):
         """Load units equivalency for production calculation"""
-        units_path = get_resource_path(os.path.join("data", "units_eq.json"))
-        with open(units_path, "r") as f:
-            self.units_eq = json.load(f)
+        registry = get_standards_registry()
+        self.units_eq = registry.units_eq()
+        # Compiled once per file version; lookups no longer re-sort the thresholds
+        self.units_tables = registry.units_tables()
+        # Units at 100% per region, for the daily equivalent-units total
+        self.units_at_100 = registry.units_at_100()
     
     def get_units_for_production(self, region, production_pct):
         """
         Get units needed for a given production percentage based on region.
         Uses linear interpolation between defined thresholds.
         """
-        if region not in self.units_eq:
-            return 0
-        
-        region_data = self.units_eq[region]
-        thresholds = sorted([int(k) for k in region_data.keys()], reverse=True)
-        
-        # If production is at or above highest threshold
-        if production_pct >= thresholds[0]:
-            # Calculate units per percent and extrapolate
-            units_per_5pct = region_data[str(thresholds[0])] - region_data[str(thresholds[1])]
-            extra_pct = production_pct - thresholds[0]
-            extra_units = (extra_pct / 5) * units_per_5pct
-            return region_data[str(thresholds[0])] + extra_units
-        
-        # Find the two thresholds to interpolate between
-        for i in range(len(thresholds) - 1):
-            if thresholds[i] >= production_pct >= thresholds[i + 1]:
-                upper = thresholds[i]
-                lower = thresholds[i + 1]
-                upper_units = region_data[str(upper)]
-                lower_units = region_data[str(lower)]
-                
-                # Linear interpolation
-                ratio = (production_pct - lower) / (upper - lower)
-                return lower_units + (upper_units - lower_units) * ratio
-        
-        # Below minimum threshold - extrapolate down
-        lowest = thresholds[-1]
-        second_lowest = thresholds[-2]
-        units_per_5pct = region_data[str(second_lowest)] - region_data[str(lowest)]
-        below_pct = lowest - production_pct
-        return max(0, region_data[str(lowest)] - (below_pct / 5) * units_per_5pct)
+        return units_for_production(self.units_tables, region, production_pct)
     
     def on_case_id_changed(self, text):
         """Auto-set start time when Case ID is first entered"""
@@ -340,36 +321,6 @@ class RegisterTab(QWidget):
             self.end_time.setTime(self.start_time.time())
             self.end_time.blockSignals(False)
     
-    def calculate_case_value(self, std_time):
-        """
-        Calculate fixed percentage value for a case based on standard time.
-        Reference: 9-hour workday (6:00 AM - 3:00 PM) = 540 minutes = 100%
-        But using 408.3 minutes as base to match ICON Warford Primary = 6.980%
-        Formula: case_value = (std_time / 408.3) * 100
-        """
-        DAILY_BASE_MINUTES = 408.3  # Base for percentage calculation
-        case_value = (std_time / DAILY_BASE_MINUTES) * 100
-        return case_value
-
-    def get_daily_downtime(self, date=None):
-        """Get total downtime minutes for given date (or today if not specified)"""
-        conn = get_connection()
-        cursor = conn.cursor()
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
-        
-        cursor.execute("""
-            SELECT SUM(duracion)
-            FROM downtimes
-            WHERE fecha = ?
-        """, (date,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        total_downtime = result[0] if result[0] else 0.0
-        return total_downtime
-
     def calculate(self):
         region = self.region.currentText()
         tipo = self.tipo.currentText()
@@ -377,8 +328,10 @@ class RegisterTab(QWidget):
         if not region or not tipo:
             return
 
-        std_time = self.standards[region]["Aligners"][tipo]
-        case_value = self.calculate_case_value(std_time)
+        std_time = self.standard_for(region, tipo, self.case_date.date().toString("yyyy-MM-dd"))
+        if std_time is None:
+            self.result_label.setText("No standard for this date")
+            return
 
         start = self.start_time.time()
         end = self.end_time.time()
@@ -388,18 +341,9 @@ class RegisterTab(QWidget):
             self.result_label.setText("Invalid time")
             return
 
-        efficiency = (std_time / real_minutes) * 100
-        
-        # Determine status and color
-        if efficiency >= 100:
-            status = "OK"
-            color = "#4CAF50"
-        elif efficiency >= 95:
-            status = "WARN"
-            color = "#FFC107"
-        else:
-            status = "LOW"
-            color = "#F44336"
+        # Determine status and color (WARN is shown here but stored as LOW)
+        efficiency, status, _estado, case_value = evaluate_case(std_time, real_minutes)
+        color = STATUS_COLORS[status]
 
         # Display result with dynamic color showing efficiency and case value in two lines
         result_text = f"{efficiency:.1f}% – {status}\nCase Value: {case_value:.3f}%"
@@ -407,56 +351,38 @@ class RegisterTab(QWidget):
         self.result_label.setStyleSheet(f"color: {color}; font-size: 13px; font-weight: bold; text-align: center;")
 
     def on_date_changed(self):
-        """Called when the date picker changes - reload production for that date"""
+        """Called when the date picker changes - reload production and downtimes for that date"""
+        self.downtime_manager.set_date(self.case_date.date().toString("yyyy-MM-dd"))
         self.load_daily_production()
 
     def load_daily_production(self):
-        conn = get_connection()
-        cursor = conn.cursor()
         # Use selected date from picker instead of today
         selected_date = self.case_date.date().toString("yyyy-MM-dd")
         
-        # Get total case values for selected date (only count_production = 1)
-        cursor.execute("""
-            SELECT SUM(case_value)
-            FROM cases
-            WHERE fecha = ? AND (count_production = 1 OR count_production IS NULL)
-        """, (selected_date,))
-        
-        result = cursor.fetchone()
-        total_cases = result[0] if result[0] else 0.0
-        
-        # Get cases by region for equivalent units calculation (only count_production = 1)
-        cursor.execute("""
-            SELECT region, SUM(case_value)
-            FROM cases
-            WHERE fecha = ? AND (count_production = 1 OR count_production IS NULL)
-            GROUP BY region
-        """, (selected_date,))
-        
-        region_cases = cursor.fetchall()
-        conn.close()
+        # Trigger-maintained per-region totals (only count_production = 1),
+        # read on a worker thread
+        get_data_service().submit(
+            "register.daily", get_daily_rollup, selected_date,
+            on_result=self.apply_daily_production
+        )
+
+    def apply_daily_production(self, rollup):
+        region_values = {region: row[0] for region, row in rollup["cases"].items()}
+        total_cases = sum(region_values.values())
         
         # Calculate equivalent units based on region
-        total_equivalent_units = 0.0
-        for region, case_value in region_cases:
-            if region in self.units_eq and case_value:
-                # Get units at 100% for this region
-                units_at_100 = self.units_eq[region].get("100", 0)
-                # Equivalent units = (case_value / 100) * units_at_100
-                total_equivalent_units += (case_value / 100) * units_at_100
+        total_equivalent_units = daily_equivalent_units(region_values, self.units_at_100)
         
         # Get total downtime and calculate as production value
-        total_downtime = self.get_daily_downtime(selected_date)
-        DAILY_BASE_MINUTES = 408.3  # Base for percentage calculation
-        downtime_value = (total_downtime / DAILY_BASE_MINUTES) * 100 if total_downtime > 0 else 0
+        total_downtime = rollup_downtime(rollup)
+        total_downtime_value = downtime_value(total_downtime)
         
         # Total production = cases + downtime (both count as production)
-        total_production = total_cases + downtime_value
+        total_production = total_cases + total_downtime_value
         
         display_label = f"Daily Production: {total_production:.2f}%"
         if total_downtime > 0:
-            display_label += f" (Cases: {total_cases:.2f}% + Downtime: {downtime_value:.2f}%)"
+            display_label += f" (Cases: {total_cases:.2f}% + Downtime: {total_downtime_value:.2f}%)"
         
         self.daily_production_label.setText(display_label)
         self.equivalent_units_label.setText(f"Equivalent Units: {total_equivalent_units:.2f}")
@@ -467,13 +393,8 @@ class RegisterTab(QWidget):
         # Animate the progress bar
         self.animate_progress_bar(int(total_production))
         
-        # Change color based on performance
-        if total_production < 95:
-            bar_color = "#F44336"
-        elif total_production < 100:
-            bar_color = "#FFC107"
-        else:
-            bar_color = "#4CAF50"
+        # Change color based on performance (same thresholds as a case)
+        bar_color = STATUS_COLORS[classify(total_production)]
         
         self.progress_bar.setStyleSheet(f"""
             QProgressBar {{
@@ -563,10 +484,20 @@ class RegisterTab(QWidget):
             self.result_label.setText("Enter Case ID")
             return
 
-        std_time = self.standards[region]["Aligners"][tipo]
-        efficiency = (std_time / tiempo_real) * 100
-        estado = "OK" if efficiency >= 100 else "LOW"
-        case_value = self.calculate_case_value(std_time)
+        std_time = self.standard_for(region, tipo, case_date)
+        if std_time is None:
+            self.result_label.setText("No standard for this date")
+            return
+        efficiency, _status, estado, case_value = evaluate_case(std_time, tiempo_real)
+
+        # Minutes shared with another case or a downtime would count twice
+        if self.count_toggle.isChecked():
+            overlaps = get_overlap_index().find(
+                case_date, start.toString("HH:mm"), end.toString("HH:mm"),
+                exclude=("cases", self.editing_case_id)
+            )
+            if not confirm_overlaps(self, "case", overlaps):
+                return
 
         conn = get_connection()
         cursor = conn.cursor()
@@ -577,6 +508,9 @@ class RegisterTab(QWidget):
 
         # Check if we're editing an existing case
         if self.editing_case_id:
+            db_id = self.editing_case_id
+            old_row = fetch_row("cases", db_id)
+            kind = UPDATED
             cursor.execute("""
                 UPDATE cases SET
                     case_id = ?, region = ?, tipo_caso = ?,
@@ -609,10 +543,14 @@ class RegisterTab(QWidget):
                 tiempo_real, std_time, efficiency, estado, case_value,
                 count_production, comments
             ))
+            db_id = cursor.lastrowid
+            old_row = None
+            kind = INSERTED
             msg = "Case Saved"
 
         conn.commit()
         conn.close()
+        change = RowChange(kind, "cases", db_id, fetch_row("cases", db_id), old_row)
 
         # Show success message with color
         self.result_label.setText(msg)
@@ -625,4 +563,4 @@ class RegisterTab(QWidget):
         self.end_time.setTime(QTime(0, 0))  # Clear end time
         
         # Emit signal to notify other tabs
-        self.case_saved.emit()
+        self.case_changed.emit(change)
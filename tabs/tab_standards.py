@@ -1,37 +1,21 @@
 import json
+import logging
 import os
-import sys
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QPushButton, QLabel,
-    QTreeWidget, QTreeWidgetItem, QFileDialog, QMessageBox, QLineEdit,
-    QHeaderView, QDialog, QFormLayout, QDialogButtonBox, QComboBox
+    QTreeView, QFileDialog, QMessageBox, QLineEdit,
+    QHeaderView, QDialog, QFormLayout, QDialogButtonBox, QComboBox, QDateEdit, QTextEdit
 )
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QFont
-
-
-def get_resource_path(relative_path):
-    """Get absolute path to resource - works for dev and PyInstaller"""
-    if getattr(sys, 'frozen', False):
-        exe_dir = os.path.dirname(sys.executable)
-        exe_path = os.path.join(exe_dir, relative_path)
-        if os.path.exists(exe_path):
-            return exe_path
-        return os.path.join(sys._MEIPASS, relative_path)
-    else:
-        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        return os.path.join(base, relative_path)
-
+from PySide6.QtCore import Qt, Signal, QDate
+from PySide6.QtGui import QFont, QStandardItemModel, QStandardItem
+from db.data_service import get_data_service
+from db.database import get_base_path
+from db.standards import (
+    get_standards_registry, save_json_atomic, validate_standards, record_standards_version
+)
+from engine.rebaseline import plan_rebaseline, apply_rebaseline
 
-def get_writable_path(relative_path):
-    """Get writable path for saving files"""
-    if getattr(sys, 'frozen', False):
-        # When running as exe, save in exe directory
-        exe_dir = os.path.dirname(sys.executable)
-        return os.path.join(exe_dir, relative_path)
-    else:
-        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        return os.path.join(base, relative_path)
+logger = logging.getLogger(__name__)
 
 
 def card(title, widget):
@@ -131,33 +115,147 @@ class AddTypeDialog(QDialog):
             return None
 
 
+class RebaselineDialog(QDialog):
+    """
+    Recompute stored std_time/efficiency/estado/case_value for a date range
+    with the saved standard versions, each case against the standard in
+    effect on its date. Preview runs a dry run and shows the diff; Apply
+    writes the previewed plan in one transaction.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Re-baseline Stored Cases")
+        self.setMinimumWidth(560)
+        self.plan = None
+        self.updated_rows = 0
+        
+        layout = QVBoxLayout()
+        
+        form_layout = QFormLayout()
+        self.date_from = QDateEdit()
+        self.date_from.setCalendarPopup(True)
+        self.date_from.setDate(QDate.currentDate().addYears(-1))
+        self.date_from.dateChanged.connect(self.clear_plan)
+        form_layout.addRow("From:", self.date_from)
+        self.date_to = QDateEdit()
+        self.date_to.setCalendarPopup(True)
+        self.date_to.setDate(QDate.currentDate())
+        self.date_to.dateChanged.connect(self.clear_plan)
+        form_layout.addRow("To:", self.date_to)
+        layout.addLayout(form_layout)
+        
+        # Dry-run report
+        self.report = QTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setPlaceholderText("Click Preview to see which stored results would change.")
+        layout.addWidget(self.report)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        self.preview_btn = QPushButton("Preview")
+        self.preview_btn.clicked.connect(self.preview)
+        buttons_layout.addWidget(self.preview_btn)
+        self.apply_btn = QPushButton("Apply")
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.apply)
+        buttons_layout.addWidget(self.apply_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.reject)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+        
+        self.setLayout(layout)
+    
+    def clear_plan(self):
+        self.plan = None
+        self.apply_btn.setEnabled(False)
+    
+    def preview(self):
+        """Run the dry run on a worker thread"""
+        self.clear_plan()
+        self.preview_btn.setEnabled(False)
+        self.report.setPlainText("Computing...")
+        get_data_service().submit(
+            "standards.rebaseline", plan_rebaseline,
+            self.date_from.date().toString("yyyy-MM-dd"),
+            self.date_to.date().toString("yyyy-MM-dd"),
+            on_result=self.show_plan, on_error=self.show_error
+        )
+    
+    def show_plan(self, plan):
+        self.plan = plan
+        self.preview_btn.setEnabled(True)
+        lines = plan.report_lines()
+        lines.append("")
+        lines.append(f"{plan.changed_rows} rows would be updated.")
+        self.report.setPlainText("\n".join(lines))
+        self.apply_btn.setEnabled(plan.changed_rows > 0)
+    
+    def show_error(self, error):
+        self.preview_btn.setEnabled(True)
+        self.report.setPlainText(f"Re-baseline failed:\n{error}")
+    
+    def apply(self):
+        if self.plan is None:
+            return
+        reply = QMessageBox.question(
+            self, "Confirm Re-baseline",
+            f"Update {self.plan.changed_rows} stored cases with the standards in effect on their dates?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.apply_btn.setEnabled(False)
+        self.preview_btn.setEnabled(False)
+        planned = self.plan.changed_rows
+        get_data_service().submit(
+            "standards.rebaseline", apply_rebaseline, self.plan,
+            on_result=lambda updated: self.on_applied(updated, planned), on_error=self.show_error
+        )
+    
+    def on_applied(self, updated, planned):
+        self.updated_rows += updated
+        self.plan = None
+        self.preview_btn.setEnabled(True)
+        self.report.append(f"\nUpdated {updated} rows.")
+        if updated != planned:
+            # Rows edited between Preview and Apply keep their new values
+            self.report.append(
+                f"{planned - updated} of {planned} previewed rows changed since the preview "
+                f"and were left alone. Preview again to include them."
+            )
+
+
 class StandardsTab(QWidget):
     standards_updated = Signal()  # Signal emitted when standards are modified
+    cases_rebaselined = Signal()  # Signal emitted when stored cases were re-baselined
     
     def __init__(self):
         super().__init__()
         self.standards = {}
+        self.unsaved = False  # Tree edits not yet saved (and versioned)
         self.load_standards()
         self.init_ui()
     
     def load_standards(self):
         """Load standards from JSON file"""
-        standards_path = get_resource_path(os.path.join("data", "standards.json"))
         try:
-            with open(standards_path, "r") as f:
-                self.standards = json.load(f)
+            # Private, editable copy of the shared registry's standards
+            self.standards = get_standards_registry().standards_copy()
         except Exception as e:
             print(f"Error loading standards: {e}")
             self.standards = {}
+        self.unsaved = False
     
     def save_standards(self):
         """Save standards to JSON file"""
-        standards_path = get_writable_path(os.path.join("data", "standards.json"))
+        # Saved next to the exe (or the sources), never inside the bundle
+        standards_path = os.path.join(get_base_path(), "data", "standards.json")
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(standards_path), exist_ok=True)
-            with open(standards_path, "w") as f:
-                json.dump(self.standards, f, indent=4)
+            # Compact JSON written atomically, previous versions kept as backups
+            save_json_atomic(standards_path, self.standards)
+            # Other tabs pick the new file up on their next load_standards()
+            get_standards_registry().invalidate()
             return True
         except Exception as e:
             print(f"Error saving standards: {e}")
@@ -194,14 +292,29 @@ class StandardsTab(QWidget):
         reload_btn.clicked.connect(self.reload_standards)
         header_layout.addWidget(reload_btn)
         
+        # Re-baseline button
+        rebaseline_btn = QPushButton("Re-baseline")
+        rebaseline_btn.setMaximumWidth(100)
+        rebaseline_btn.clicked.connect(self.rebaseline_cases)
+        header_layout.addWidget(rebaseline_btn)
+        
         main_layout.addLayout(header_layout)
         
-        # Tree widget for displaying standards
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Region / Type", "Standard Time (min)"])
+        # Tree of standards, backed by an item model so edits, adds and
+        # deletes touch single rows and keep expansion/selection intact
+        self.tree_model = QStandardItemModel(0, 2, self)
+        self.tree_model.setHorizontalHeaderLabels(["Region / Type", "Standard Time (min)"])
+        self.region_items = {}  # region -> its column-0 item
+        self.shown = {}         # region -> {type: value} as displayed, to diff against
+        self.region_font = QFont("Segoe UI", 11, QFont.Weight.Bold)
+        
+        self.tree = QTreeView()
+        self.tree.setModel(self.tree_model)
         self.tree.setAlternatingRowColors(True)
         self.tree.setRootIsDecorated(True)
-        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
+        self.tree.doubleClicked.connect(self.on_item_double_clicked)
         
         # Set column widths
         header = self.tree.header()
@@ -211,15 +324,15 @@ class StandardsTab(QWidget):
         
         # Style the tree
         self.tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 background-color: #2b2b2b;
                 border: 1px solid #3c3c3c;
                 border-radius: 6px;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 4px;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #3c3c3c;
             }
             QHeaderView::section {
@@ -272,6 +385,14 @@ class StandardsTab(QWidget):
         save_btn.clicked.connect(self.save_changes)
         action_layout.addWidget(save_btn)
         
+        # Date the saved standards take effect (cases before it keep the old ones)
+        action_layout.addWidget(QLabel("Effective from:"))
+        self.effective_from = QDateEdit()
+        self.effective_from.setCalendarPopup(True)
+        self.effective_from.setDate(QDate.currentDate())
+        self.effective_from.setFixedWidth(100)
+        action_layout.addWidget(self.effective_from)
+        
         action_layout.addStretch()
         main_layout.addLayout(action_layout)
         
@@ -285,24 +406,110 @@ class StandardsTab(QWidget):
         self.populate_tree()
     
     def populate_tree(self):
-        """Populate the tree widget with standards data"""
-        self.tree.clear()
+        """Build the whole tree from self.standards (initial load)"""
+        self.tree_model.removeRows(0, self.tree_model.rowCount())
+        self.region_items = {}
+        self.shown = {}
         
         for region, data in sorted(self.standards.items()):
-            region_item = QTreeWidgetItem([region, ""])
-            region_item.setFont(0, QFont("Segoe UI", 11, QFont.Weight.Bold))
-            region_item.setExpanded(True)
-            
+            row = self.make_region_row(region)
             if "Aligners" in data:
+                # Children are added before the region joins the model: no per-row signals
                 for case_type, time_value in sorted(data["Aligners"].items()):
-                    type_item = QTreeWidgetItem([case_type, f"{time_value:.2f}"])
-                    type_item.setTextAlignment(1, Qt.AlignmentFlag.AlignCenter)
-                    region_item.addChild(type_item)
-            
-            self.tree.addTopLevelItem(region_item)
+                    row[0].appendRow(self.make_type_row(case_type, time_value))
+            self.tree_model.appendRow(row)
+            self.region_items[region] = row[0]
+            self.shown[region] = dict(data.get("Aligners", {}))
+        self.tree.expandAll()
+    
+    def sync_tree(self):
+        """Bring the tree in line with self.standards with targeted row updates"""
+        for region in list(self.region_items):
+            if region not in self.standards:
+                self.remove_region_row(region)
+        
+        for region, data in self.standards.items():
+            types = data.get("Aligners", {})
+            if self.shown.get(region) == types:
+                continue  # Unchanged region: no rows touched
+            if region not in self.region_items:
+                self.insert_region_row(region)
+            for case_type in list(self.shown[region]):
+                if case_type not in types:
+                    self.remove_type_row(region, case_type)
+            shown = self.shown[region]
+            for case_type, time_value in types.items():
+                if shown.get(case_type) != time_value:
+                    self.set_type_row(region, case_type, time_value)
+    
+    def make_region_row(self, region):
+        region_item = QStandardItem(region)
+        region_item.setFont(self.region_font)  # One shared font for all regions
+        return [region_item, QStandardItem("")]
+    
+    def make_type_row(self, case_type, time_value):
+        value_item = QStandardItem(f"{time_value:.2f}")
+        value_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        return [QStandardItem(case_type), value_item]
+    
+    def sorted_row(self, parent, text):
+        """Row where text belongs among parent's (sorted) children"""
+        low, high = 0, parent.rowCount()
+        while low < high:
+            mid = (low + high) // 2
+            if parent.child(mid, 0).text() < text:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+    
+    def insert_region_row(self, region):
+        root = self.tree_model.invisibleRootItem()
+        row = self.make_region_row(region)
+        root.insertRow(self.sorted_row(root, region), row)
+        self.region_items[region] = row[0]
+        self.shown[region] = {}
+        self.tree.expand(row[0].index())
+        return row[0]
+    
+    def remove_region_row(self, region):
+        region_item = self.region_items.pop(region, None)
+        self.shown.pop(region, None)
+        if region_item is not None:
+            self.tree_model.removeRow(region_item.row())
+    
+    def set_type_row(self, region, case_type, time_value):
+        """Insert a type row in sorted position, or update its value in place"""
+        region_item = self.region_items.get(region) or self.insert_region_row(region)
+        self.shown[region][case_type] = time_value
+        row = self.sorted_row(region_item, case_type)
+        if row < region_item.rowCount() and region_item.child(row, 0).text() == case_type:
+            value_item = region_item.child(row, 1)
+            text = f"{time_value:.2f}"
+            if value_item.text() != text:
+                value_item.setText(text)
+        else:
+            region_item.insertRow(row, self.make_type_row(case_type, time_value))
+    
+    def remove_type_row(self, region, case_type):
+        region_item = self.region_items.get(region)
+        if region_item is None:
+            return
+        self.shown[region].pop(case_type, None)
+        row = self.sorted_row(region_item, case_type)
+        if row < region_item.rowCount() and region_item.child(row, 0).text() == case_type:
+            region_item.removeRow(row)
     
-    def on_item_double_clicked(self, item, column):
+    def current_item(self):
+        """Column-0 item of the selected row, or None"""
+        index = self.tree.currentIndex()
+        if not index.isValid():
+            return None
+        return self.tree_model.itemFromIndex(index.siblingAtColumn(0))
+    
+    def on_item_double_clicked(self, index):
         """Handle double-click to edit a type"""
+        item = self.tree_model.itemFromIndex(index.siblingAtColumn(0))
         if item.parent() is not None:  # It's a type item, not a region
             self.edit_item(item)
     
@@ -311,8 +518,8 @@ class StandardsTab(QWidget):
         if item.parent() is None:
             return  # Can't edit region headers
         
-        region = item.parent().text(0)
-        case_type = item.text(0)
+        region = item.parent().text()
+        case_type = item.text()
         current_value = self.standards.get(region, {}).get("Aligners", {}).get(case_type, 0)
         
         dialog = EditStandardDialog(region, case_type, current_value, self)
@@ -320,11 +527,12 @@ class StandardsTab(QWidget):
             new_value = dialog.get_value()
             if new_value is not None and new_value > 0:
                 self.standards[region]["Aligners"][case_type] = new_value
-                item.setText(1, f"{new_value:.2f}")
+                self.unsaved = True
+                self.set_type_row(region, case_type, new_value)
     
     def edit_selected(self):
         """Edit the currently selected item"""
-        item = self.tree.currentItem()
+        item = self.current_item()
         if item and item.parent() is not None:
             self.edit_item(item)
         else:
@@ -341,18 +549,19 @@ class StandardsTab(QWidget):
                     if "Aligners" not in self.standards[region]:
                         self.standards[region]["Aligners"] = {}
                     self.standards[region]["Aligners"][data['type']] = data['value']
-                    self.populate_tree()
+                    self.unsaved = True
+                    self.set_type_row(region, data['type'], data['value'])
     
     def delete_selected(self):
         """Delete the currently selected item"""
-        item = self.tree.currentItem()
+        item = self.current_item()
         if not item:
             QMessageBox.information(self, "Info", "Please select an item to delete.")
             return
         
         if item.parent() is None:
             # Deleting a region
-            region = item.text(0)
+            region = item.text()
             reply = QMessageBox.question(
                 self, "Confirm Delete",
                 f"Delete entire region '{region}' and all its types?",
@@ -360,11 +569,12 @@ class StandardsTab(QWidget):
             )
             if reply == QMessageBox.StandardButton.Yes:
                 del self.standards[region]
-                self.populate_tree()
+                self.unsaved = True
+                self.remove_region_row(region)
         else:
             # Deleting a type
-            region = item.parent().text(0)
-            case_type = item.text(0)
+            region = item.parent().text()
+            case_type = item.text()
             reply = QMessageBox.question(
                 self, "Confirm Delete",
                 f"Delete type '{case_type}' from '{region}'?",
@@ -372,16 +582,46 @@ class StandardsTab(QWidget):
             )
             if reply == QMessageBox.StandardButton.Yes:
                 del self.standards[region]["Aligners"][case_type]
-                self.populate_tree()
+                self.unsaved = True
+                self.remove_type_row(region, case_type)
     
     def save_changes(self):
         """Save changes to file and notify other tabs"""
         if self.save_standards():
+            # Record the changed types as a new version in the database
+            try:
+                record_standards_version(
+                    self.standards, self.effective_from.date().toString("yyyy-MM-dd")
+                )
+            except Exception as e:
+                # The file is saved; keep the edits marked unsaved so saving
+                # again retries the version (startup would record it as today)
+                logger.exception("Recording the standards version failed")
+                QMessageBox.warning(
+                    self, "Error",
+                    f"Standard times were saved, but their new version could not be "
+                    f"recorded in the database:\n{e}\n\nSave again to retry."
+                )
+                return
+            self.unsaved = False
             QMessageBox.information(self, "Success", "Standard times saved successfully!")
             self.standards_updated.emit()
         else:
             QMessageBox.warning(self, "Error", "Failed to save standard times.")
     
+    def rebaseline_cases(self):
+        """Open the re-baseline dialog; it works from the saved standard versions"""
+        if self.unsaved:
+            QMessageBox.information(
+                self, "Unsaved Changes",
+                "Save or reload the standard times before re-baselining stored cases."
+            )
+            return
+        dialog = RebaselineDialog(self)
+        dialog.exec()
+        if dialog.updated_rows:
+            self.cases_rebaselined.emit()
+    
     def import_json(self):
         """Import standards from a JSON file"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -393,18 +633,10 @@ class StandardsTab(QWidget):
                     new_standards = json.load(f)
                 
                 # Validate structure
-                valid = True
-                for region, data in new_standards.items():
-                    if not isinstance(data, dict) or "Aligners" not in data:
-                        valid = False
-                        break
-                    if not isinstance(data["Aligners"], dict):
-                        valid = False
-                        break
-                
-                if valid:
+                if validate_standards(new_standards):
                     self.standards = new_standards
-                    self.populate_tree()
+                    self.unsaved = True
+                    self.sync_tree()
                     QMessageBox.information(self, "Success", "Standards imported successfully!")
                 else:
                     QMessageBox.warning(self, "Error", "Invalid JSON format. Expected structure:\n{\n  \"Region\": {\n    \"Aligners\": {\n      \"Type\": value\n    }\n  }\n}")
@@ -427,7 +659,7 @@ class StandardsTab(QWidget):
     def reload_standards(self):
         """Reload standards from file"""
         self.load_standards()
-        self.populate_tree()
+        self.sync_tree()
         QMessageBox.information(self, "Reloaded", "Standards reloaded from file.")
     
     def get_standards(self):
@@ -0,0 +1,18 @@
+from db.database import is_full_scan
+
+
+def test_full_scan_in_both_plan_formats():
+    assert is_full_scan("SCAN cases")
+    assert is_full_scan("SCAN TABLE cases")
+    assert is_full_scan("SCAN TABLE cases AS c")
+    assert is_full_scan("SCAN c")
+
+
+def test_index_walks_are_not_full_scans():
+    assert not is_full_scan("SCAN cases USING INDEX idx_cases_order")
+    assert not is_full_scan("SCAN TABLE cases USING INDEX idx_cases_order")
+    assert not is_full_scan("SCAN TABLE cases USING COVERING INDEX idx_cases_daily")
+    assert not is_full_scan("SEARCH TABLE cases USING INDEX idx_cases_daily (fecha=?)")
+    assert not is_full_scan("SEARCH cases USING COVERING INDEX idx_cases_daily (fecha=?)")
+    assert not is_full_scan("SCAN CONSTANT ROW")
+    assert not is_full_scan("USE TEMP B-TREE FOR ORDER BY")
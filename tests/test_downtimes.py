@@ -0,0 +1,80 @@
+import pytest
+from db.database import configure_connections, close_connections, get_connection, get_daily_rollup, init_db, rollup_downtime
+from db.downtimes import add_downtime, delete_downtime, merge_overlapping_downtimes, query_downtimes
+from db.overlaps import get_overlap_index
+
+FECHA = "2026-01-05"
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path):
+    configure_connections(path=str(tmp_path / "cases.db"))
+    get_overlap_index().invalidate()
+    init_db()
+    yield
+    close_connections()
+    get_overlap_index().invalidate()
+    configure_connections()
+
+
+def stored(fecha=FECHA):
+    return sorted((start, end, duracion, razon) for _id, start, end, duracion, razon in query_downtimes(fecha))
+
+
+def test_add_merges_across_midnight():
+    add_downtime(FECHA, "23:30", "00:30", "Power cut")
+    _row_id, absorbed = add_downtime(FECHA, "23:50", "00:10", "Scanner down")
+    assert absorbed == 1
+    assert stored() == [("23:30", "00:30", 60, "Power cut + Scanner down")]
+
+    # Extending the start keeps the end past midnight
+    add_downtime(FECHA, "23:00", "23:40", "Meeting")
+    assert stored() == [("23:00", "00:30", 90, "Power cut + Scanner down + Meeting")]
+
+    # Early morning of the same date is a separate downtime
+    add_downtime(FECHA, "00:10", "00:40", "Training")
+    assert len(stored()) == 2
+    assert rollup_downtime(get_daily_rollup(FECHA)) == 120
+
+
+def test_add_leaves_touching_downtimes_apart():
+    add_downtime(FECHA, "08:00", "09:00", "Meeting")
+    _row_id, absorbed = add_downtime(FECHA, "09:00", "09:30", "Training")
+    assert absorbed == 0
+    assert len(stored()) == 2
+
+
+def test_delete_updates_the_rollup():
+    row_id, _absorbed = add_downtime(FECHA, "08:00", "09:00", "Meeting")
+    delete_downtime(row_id)
+    assert stored() == []
+    assert rollup_downtime(get_daily_rollup(FECHA)) == 0
+
+
+def test_merge_overlapping_downtimes():
+    conn = get_connection()
+    conn.executemany("""
+        INSERT INTO downtimes (fecha, hora_inicio, hora_fin, razon, duracion) VALUES (?, ?, ?, ?, ?)
+    """, [
+        (FECHA, "08:00", "09:00", "Meeting", 60),
+        (FECHA, "08:30", "09:15", "Training", 45),
+        (FECHA, "23:45", "00:15", "Power cut", 30),
+        (FECHA, "23:50", "00:05", "Power cut", 15),
+        ("2026-01-06", "10:00", "10:30", "Meeting", 30),
+        ("2026-01-06", "11:00", "11:30", "Meeting", 30),
+    ])
+    conn.commit()
+    conn.close()
+
+    conn = get_connection()
+    assert merge_overlapping_downtimes(conn, dry_run=True) == {FECHA: 2}
+    conn.close()
+    assert len(stored()) == 4
+
+    conn = get_connection()
+    assert merge_overlapping_downtimes(conn) == {FECHA: 2}
+    conn.commit()
+    conn.close()
+    assert stored() == [("08:00", "09:15", 75, "Meeting + Training"), ("23:45", "00:15", 30, "Power cut")]
+    assert len(stored("2026-01-06")) == 2
+    assert rollup_downtime(get_daily_rollup(FECHA)) == 105
@@ -0,0 +1,81 @@
+import random
+from engine.intervals import DayIntervals, IntervalIndex, interval_minutes, merge_intervals
+
+
+def brute_force(intervals, start, end):
+    return sorted(
+        (s, key) for key, (s, e) in intervals.items() if s < end and e > start and start < end
+    )
+
+
+def found(index, intervals, start, end):
+    return sorted((intervals[key][0], key) for key in index.overlapping(start, end))
+
+
+def test_long_interval_does_not_hide_or_slow_later_lookups():
+    index = IntervalIndex([(0, 1440)], ["all day"])
+    for n in range(1000):
+        index.add(60 + n, 61 + n, n)
+    # Only the long interval and the one-minute slot at 500 overlap [500, 501)
+    assert index.overlapping(500, 501) == ["all day", 440]
+    assert index.overlapping(1400, 1500) == ["all day"]
+    assert index.overlapping(1440, 1500) == []
+
+
+def test_add_and_remove_in_place():
+    index = IntervalIndex([(480, 540), (500, 520)], ["a", "b"])
+    index.add(530, 600, "c")
+    assert index.overlapping(535, 536) == ["a", "c"]
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.overlapping(535, 536) == ["c"]
+    # Adding an existing key moves it
+    index.add(700, 710, "c")
+    assert index.overlapping(535, 536) == []
+    assert index.overlapping(705, 706) == ["c"]
+    assert len(index) == 2
+    assert index.overlapping(505, 506, exclude="b") == []
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    index = IntervalIndex()
+    intervals = {}
+    for step in range(3000):
+        if intervals and rng.random() < 0.3:
+            key = rng.choice(list(intervals))
+            del intervals[key]
+            assert index.remove(key)
+        else:
+            start = rng.randrange(0, 1440)
+            length = rng.choice([1, 5, 30, 600, 1440])
+            intervals[step] = (start, start + length)
+            index.add(start, start + length, step)
+        start = rng.randrange(0, 1500)
+        end = start + rng.randrange(0, 120)
+        assert found(index, intervals, start, end) == brute_force(intervals, start, end)
+    assert len(index) == len(intervals)
+
+
+def test_merge_intervals():
+    assert merge_intervals([(30, 60), (0, 10), (5, 20), (60, 70), (40, 50), (80, 80)]) == [
+        (0, 20), (30, 60), (60, 70)
+    ]
+    assert merge_intervals([]) == []
+
+
+def test_interval_minutes_past_midnight():
+    assert interval_minutes("23:30", "00:30") == (1410, 1470)
+    assert interval_minutes("08:00", "08:00") == (480, 480)
+
+
+def test_day_intervals_keeps_absorbed_keys():
+    day = DayIntervals([(480, 540), (500, 600), (700, 720), (1410, 1470), (600, 600)], ["a", "b", "c", "d", "e"])
+    assert list(zip(day.starts, day.ends, day.keys)) == [
+        (480, 600, ["a", "b"]), (700, 720, ["c"]), (1410, 1470, ["d"])
+    ]
+    assert len(day) == 3
+    assert list(day.overlapping(590, 710)) == [0, 1]
+    # Touching intervals do not overlap
+    assert list(day.overlapping(600, 700)) == []
+    assert list(day.overlapping(1439, 1440)) == [2]